@@ -0,0 +1,122 @@
+"""
+HTTP API for AutoResearch, with an asynchronous job model:
+
+    POST /jobs                 {"topic": ...}  -> 202 + the queued job (its 'job_id')
+    GET  /jobs/{job_id}        status and per-stage progress (?outputs=true: stage outputs too)
+    GET  /jobs/{job_id}/report the report, once the job is done
+    GET  /health               queue depth and worker counts
+    GET  /llm                  per-role LLM call counts, latency percentiles and calls in flight
+    GET  /corpus               size and coverage of the persistent research corpus
+    DELETE /corpus/sources?url=... removes a stored source from the research corpus
+
+Research runs on the job queue's worker threads (see 'src/jobs.py'), so
+slow crews never block request handling. JOBS_MAX_CONCURRENT runs go at
+once and up to JOBS_MAX_QUEUED wait; further submissions get HTTP 429
+with a Retry-After header.
+
+Run it with:
+    uvicorn api.main:app --port 8000
+"""
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.jobs import JobQueue, QueueFull
+from src.llm_setup import llm_stats
+from src.settings import RUN_MODE
+
+
+class JobRequest(BaseModel):
+    topic: str = Field(..., min_length=1, max_length=500, description="The research topic.")
+    run_mode: Literal["hybrid", "agent"] = Field(RUN_MODE, description="See 'run_crew'.")
+    use_cache: bool = Field(True, description="Reuse cached plans and reports of similar topics.")
+
+
+def create_app(jobs: Optional[JobQueue] = None) -> FastAPI:
+    """
+    Builds the API around a job queue (default: one running 'run_crew').
+    Tests can pass a queue with a fake runner.
+    """
+    jobs = jobs or JobQueue()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        jobs.start()
+        yield
+        jobs.shutdown(wait=False)
+
+    app = FastAPI(title="AutoResearch API", lifespan=lifespan)
+    app.state.jobs = jobs
+
+    def find_job(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+        return job
+
+    @app.post("/jobs", status_code=202)
+    def submit_job(request: JobRequest):
+        topic = request.topic.strip()
+        if not topic:
+            raise HTTPException(status_code=422, detail="The topic is empty.")
+        try:
+            job = jobs.submit(topic, run_mode=request.run_mode, use_cache=request.use_cache)
+        except QueueFull as e:
+            return JSONResponse(status_code=429, content={"detail": str(e)},
+                                headers={"Retry-After": str(jobs.retry_after())})
+        return job.to_dict()
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: str, outputs: bool = False):
+        return find_job(job_id).to_dict(include_outputs=outputs)
+
+    @app.get("/jobs/{job_id}/report")
+    def get_report(job_id: str):
+        job = find_job(job_id)
+        if job.status in ("failed", "cancelled"):
+            raise HTTPException(status_code=409, detail=f"Job {job.status}: {job.error}")
+        if job.status != "done":
+            raise HTTPException(status_code=409, detail=f"Job is {job.status}; the report is not ready yet.")
+        return {"job_id": job.job_id, "topic": job.topic, "report": job.report}
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", **jobs.stats()}
+
+    @app.get("/llm")
+    def llm():
+        return llm_stats()
+
+    def research_corpus():
+        # Imported here: opening the corpus pulls in the embedding backends
+        from src.tools.research_corpus import get_research_corpus
+
+        corpus = get_research_corpus()
+        if corpus is None:
+            raise HTTPException(status_code=404, detail="The research corpus is disabled.")
+        return corpus
+
+    @app.get("/corpus")
+    def corpus_stats():
+        return research_corpus().stats()
+
+    @app.delete("/corpus/sources")
+    def delete_source(url: str):
+        if not research_corpus().delete(url):
+            raise HTTPException(status_code=404, detail=f"No stored source '{url}'.")
+        return {"deleted": url}
+
+    return app
+
+
+app = create_app()
@@ -9,13 +9,33 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 try:
-    # Now we can import our crew function
-    from src.crew.main_crew import run_crew
+    from src.jobs import JobQueue, QueueFull
 except ImportError as e:
     st.error(f"Error importing modules: {e}. "
              "Please ensure you are in the correct directory and all dependencies are installed.")
     st.stop()
 
+# Stage outputs shown while a run is in progress, in pipeline order
+STAGE_OUTPUTS = {
+    "plan": "📋 Research plan",
+    "sources": "🌐 Sources found",
+    "summaries": "🧩 Summaries",
+    "draft": "📝 Draft",
+}
+
+
+# --- Shared Resources ---
+# Held once per server process (not per session or rerun): preloading the crew
+# imports the heavy libraries and builds the LLM clients and caches, and the
+# job queue runs the crews in background threads, so a rerun or page reload
+# neither rebuilds them nor restarts a run.
+@st.cache_resource(show_spinner="Loading the research crew...")
+def get_job_queue() -> JobQueue:
+    from src.crew.main_crew import preload
+
+    preload()
+    return JobQueue().start()
+
 # --- Streamlit Page Configuration ---
 st.set_page_config(
     page_title="AutoResearch AI",
@@ -52,49 +72,80 @@ topic = st.text_input(
     "e.g., 'latest advancements in quantum computing for finance'",
     label_visibility="collapsed"
 )
+use_cache = st.checkbox(
+    "Reuse cached plans and reports for similar topics",
+    value=True,
+    help="Untick to force a fresh run, even if a near-identical topic was researched recently."
+)
+
+try:
+    jobs = get_job_queue()
+except EnvironmentError as e:
+    st.error(f"Configuration Error: {e}. Please check your .env file.")
+    st.stop()
 
-# State to hold the report
-if 'report' not in st.session_state:
-    st.session_state.report = None
+# The current job's id lives in the URL, so it survives a page reload
+job_id = st.query_params.get("job")
+job = jobs.get(job_id) if job_id else None
 
-if st.button("Start Research", type="primary", use_container_width=True):
+if st.button("Start Research", type="primary", use_container_width=True,
+             disabled=job is not None and job.status in ("queued", "running")):
     if topic:
-        st.session_state.report = None # Clear previous report
-        st.header("2. Research in Progress...")
-        
-        # This container will show the agent's progress
-        status_container = st.empty()
-        
         try:
-            # We can't easily capture the verbose log from crewAI in real-time here,
-            # so we'll just show a spinner. The console will still show the verbose logs.
-            with st.spinner("The AI agent crew is working... This may take a few minutes."):
-                status_container.info("Initializing Crew... \n\n"
-                                    "Step 1: Planner Agent is creating the research plan...")
-                
-                # --- This is the call to our backend ---
-                final_report = run_crew(topic)
-                # ----------------------------------------
-                
-                st.session_state.report = final_report
-                status_container.empty() # Clear the status message
-                st.balloons()
-
-        except EnvironmentError as e:
-            st.error(f"Configuration Error: {e}. Please check your .env file.")
-        except Exception as e:
-            st.error(f"An unexpected error occurred: {e}")
+            job = jobs.submit(topic, use_cache=use_cache)
+            st.query_params["job"] = job.job_id
+        except QueueFull:
+            st.warning(f"Too many research runs are waiting. Please try again in about "
+                       f"{jobs.retry_after()} seconds.")
     else:
         st.warning("Please enter a research topic.")
 
+
+def show_outputs(job) -> None:
+    outputs = job.to_dict(include_outputs=True)["outputs"]
+    for name, label in STAGE_OUTPUTS.items():
+        if name in outputs:
+            with st.expander(label, expanded=name == "draft" and job.status != "done"):
+                st.markdown(outputs[name])
+
+
+@st.experimental_fragment(run_every=1)
+def show_progress(job) -> None:
+    """Redrawn every second (only this part of the page) until the job ends."""
+    if job.status not in ("queued", "running"):
+        st.rerun()
+    info = job.to_dict()
+    if job.status == "queued":
+        st.info(f"Waiting for a free worker... ({jobs.stats()['queued']} in the queue)")
+    else:
+        done = [s["name"] for s in info["stages"] if s["status"] == "done"]
+        current = f" Now: **{info['stage']}**." if info["stage"] else ""
+        st.info(f"The AI agent crew is working ({info['seconds']:.0f}s)... "
+                f"Done: {', '.join(done) or 'nothing yet'}.{current}")
+    show_outputs(job)
+
+
+if job is not None:
+    st.header("2. Research in Progress..." if job.status in ("queued", "running") else "2. Research Steps")
+    st.caption(f"Topic: {job.topic}")
+    if job.status in ("queued", "running"):
+        show_progress(job)
+    else:
+        show_outputs(job)
+        if job.status in ("failed", "cancelled"):
+            st.error(f"An unexpected error occurred: {job.error}")
+
 # --- Display the Final Report ---
-if st.session_state.report:
+if job is not None and job.status == "done":
+    if st.session_state.get("celebrated") != job.job_id:
+        st.session_state.celebrated = job.job_id
+        st.balloons()
     st.header("3. Final Research Report")
-    st.markdown(st.session_state.report)
+    st.markdown(job.report)
     
     st.download_button(
         label="Download Report as Markdown",
-        data=st.session_state.report,
-        file_name=f"autoresearch_report_{topic.replace(' ', '_')[:20]}.md",
+        data=job.report,
+        file_name=f"autoresearch_report_{job.topic.replace(' ', '_')[:20]}.md",
         mime="text/markdown",
     )
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: chunking, LangChain splitter vs. the fast splitter.
+
+Splits large documents with RecursiveCharacterTextSplitter and with
+'fast_split' (src/tools/chunking.py), both at CHUNK_SIZE / CHUNK_OVERLAP,
+and reports time, throughput, chunk counts and sizes. Also times a second
+lookup of the same text through the chunk cache (no splitting at all).
+
+Usage:
+    python benchmarks/bench_chunking.py                      # synthetic 1, 5 and 20 MB documents
+    python benchmarks/bench_chunking.py --sizes-mb 2,50
+    python benchmarks/bench_chunking.py --pages path/to/saved_pages/
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.settings import CHUNK_OVERLAP, CHUNK_SIZE
+from src.tools.chunking import ChunkCache, fast_split, langchain_split
+from src.tools.extraction import extract_text
+
+WORDS = ("model reasoning agent benchmark latency token transformer retrieval "
+         "dataset training inference attention context memory search paper").split()
+
+
+def synthetic_document(size: int, rng: random.Random) -> str:
+    """Paragraphs of sentences, with some line-broken lists, about 'size' characters long."""
+    parts, length = [], 0
+    while length < size:
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+                     for _ in range(rng.randint(1, 8))]
+        part = "\n".join(sentences) if rng.random() < 0.15 else " ".join(sentences)
+        parts.append(part)
+        length += len(part) + 2
+    return "\n\n".join(parts)
+
+
+def load_documents(pages: str, sizes_mb):
+    if pages:
+        documents = []
+        for f in sorted(glob.glob(os.path.join(pages, "*"))):
+            with open(f, "rb") as fh:
+                raw = fh.read()
+            text = raw.decode("utf-8", "replace") if f.endswith(".txt") else extract_text(raw)
+            documents.append((os.path.basename(f), text))
+        return documents
+    rng = random.Random(0)
+    return [(f"synthetic {mb:g} MB", synthetic_document(int(mb * 1024 * 1024), rng)) for mb in sizes_mb]
+
+
+def timed(fn, *args, repeat: int = 3):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Folder of saved .html/.txt documents (default: synthetic)")
+    parser.add_argument("--sizes-mb", default="1,5,20", help="Sizes of the synthetic documents (MB)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per splitter (the median is reported)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.pages, [float(s) for s in args.sizes_mb.split(",")])
+    print(f"chunk_size={CHUNK_SIZE}, chunk_overlap={CHUNK_OVERLAP}\n")
+    print(f"{'document':<24}{'splitter':<12}{'seconds':>10}{'MB/s':>10}{'chunks':>9}{'mean len':>10}{'max len':>9}")
+    for name, text in documents:
+        megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+        for label, split in (("langchain", langchain_split), ("fast", fast_split)):
+            seconds, spans = timed(split, text, CHUNK_SIZE, CHUNK_OVERLAP, repeat=args.repeat)
+            lengths = spans[:, 1] - spans[:, 0]
+            print(f"{name[:23]:<24}{label:<12}{seconds:>10.3f}{megabytes / seconds:>10.1f}{len(spans):>9}"
+                  f"{lengths.mean() if len(spans) else 0:>10.0f}{lengths.max() if len(spans) else 0:>9}")
+
+        cache = ChunkCache(splitter="fast")
+        cache.chunk(text)
+        seconds, _ = timed(cache.chunk, text, repeat=args.repeat)
+        print(f"{'':<24}{'cached':<12}{seconds:>10.3f}{megabytes / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: embedding backends for the RAG tool.
+
+For every selected backend this reports embedding throughput (chunks/sec)
+and, against a reference backend (the first remote one, e.g. 'openai'),
+retrieval overlap@k: the average share of top-k chunks both backends
+retrieve for the same query.
+
+Usage:
+    python benchmarks/bench_embeddings.py --pages path/to/saved_pages/
+    python benchmarks/bench_embeddings.py --backends hashing,openai --k 4
+    python benchmarks/bench_embeddings.py --queries queries.txt
+
+Without --pages a synthetic corpus is used (fine for throughput, but
+overlap numbers are only meaningful on real text).
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.tools.embeddings import LOCAL_BACKENDS, create_embeddings
+from src.tools.extraction import extract_text
+
+
+def load_chunks(pages: str):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+    if pages:
+        texts = []
+        for f in sorted(glob.glob(os.path.join(pages, "*"))):
+            with open(f, "rb") as fh:
+                raw = fh.read()
+            texts.append(raw.decode("utf-8", "replace") if f.endswith(".txt") else extract_text(raw))
+    else:
+        rng = random.Random(0)
+        words = ("model reasoning agent benchmark latency token transformer retrieval dataset "
+                 "training inference attention context memory search paper quantum finance "
+                 "football aerodynamics spin drag protein folding climate policy").split()
+        texts = [" ".join(rng.choice(words) for _ in range(3000)) for _ in range(40)]
+    chunks = []
+    for t in texts:
+        chunks.extend(splitter.split_text(t))
+    return chunks
+
+
+def load_queries(path: str, chunks, n: int):
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            return [line.strip() for line in fh if line.strip()]
+    # Use the opening words of random chunks as queries
+    rng = random.Random(1)
+    return [" ".join(c.split()[:12]) for c in rng.sample(chunks, min(n, len(chunks)))]
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True).clip(min=1e-12)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True).clip(min=1e-12)
+    scores = queries @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Folder of saved .html/.txt documents (default: synthetic)")
+    parser.add_argument("--queries", help="File with one query per line (default: sampled from chunks)")
+    parser.add_argument("--num-queries", type=int, default=50)
+    parser.add_argument("--backends", help="Comma-separated backends (default: hashing, plus openai if OPENAI_API_KEY is set)")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.backends:
+        backends = args.backends.split(",")
+    else:
+        backends = (["openai"] if os.getenv("OPENAI_API_KEY") else []) + ["hashing"]
+
+    chunks = load_chunks(args.pages)
+    queries = load_queries(args.queries, chunks, args.num_queries)
+    print(f"Corpus: {len(chunks)} chunks, {len(queries)} queries, k={args.k}\n")
+
+    results = {}
+    for name in backends:
+        embeddings, model_id = create_embeddings(name)
+        start = time.perf_counter()
+        vectors = []
+        for i in range(0, len(chunks), args.batch_size):
+            vectors.extend(embeddings.embed_documents(chunks[i:i + args.batch_size]))
+        elapsed = time.perf_counter() - start
+        query_vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+        hits = top_k(np.asarray(vectors, dtype=np.float32), query_vectors, args.k)
+        results[name] = (model_id, len(chunks) / elapsed, hits)
+
+    reference = next((b for b in backends if b not in LOCAL_BACKENDS), None)
+    print(f"{'backend':<10}{'model':<28}{'chunks/sec':>12}{f'overlap@{args.k}':>14}")
+    for name in backends:
+        model_id, throughput, hits = results[name]
+        if reference and name != reference:
+            ref_hits = results[reference][2]
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(hits, ref_hits)])
+            overlap_text = f"{overlap:.2f}"
+        else:
+            overlap_text = "(reference)" if name == reference else "n/a"
+        print(f"{name:<10}{model_id:<28}{throughput:>12.1f}{overlap_text:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: import time of the entry points.
+
+Each module is imported in a fresh interpreter (so nothing is cached in
+'sys.modules'), several times, and the median wall time is reported next
+to the bare interpreter start-up. The script exits with status 1 if an
+entry point takes longer than --budget seconds to import (start-up
+excluded), so slow imports creeping back in are caught.
+
+'-X importtime' output for one module lists its slowest imports (--why).
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget 1.0 --repeat 5
+    python benchmarks/bench_import.py --why src.crew.main_crew
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# What the CLI, the API workers, the Streamlit app and tests import first
+MODULES = [
+    "src.settings",
+    "src.main",
+    "src.jobs",
+    "api.main",
+    "src.crew.main_crew",
+]
+
+
+def _environment() -> dict:
+    env = dict(os.environ)
+    # Importing must not need the API keys; a dummy one keeps a regression visible as slowness, not a crash
+    env.setdefault("GEMINI_API_KEY", "offline")
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def time_import(module: str, repeat: int) -> float:
+    """Median wall seconds of 'python -c "import <module>"' in a fresh interpreter."""
+    code = f"import {module}" if module else "pass"
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=project_root, env=_environment(), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def slowest_imports(module: str, top: int = 15) -> list:
+    """The modules with the largest cumulative import time ('-X importtime')."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=project_root,
+                            env=_environment(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1e6, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Max seconds an entry point may take to import (start-up excluded)")
+    parser.add_argument("--why", metavar="MODULE", help="Show the slowest imports of one module")
+    args = parser.parse_args()
+
+    if args.why:
+        print(f"Slowest imports of {args.why} (cumulative seconds):")
+        for seconds, name in slowest_imports(args.why):
+            print(f"  {seconds:>7.3f}  {name}")
+        return
+
+    startup = time_import("", args.repeat)
+    print(f"Interpreter start-up: {startup:.3f}s (median of {args.repeat})\n")
+    print(f"  {'module':<24}{'import (s)':>12}")
+    ok = True
+    for module in MODULES:
+        seconds = max(0.0, time_import(module, args.repeat) - startup)
+        over = seconds > args.budget
+        ok = ok and not over
+        print(f"  {module:<24}{seconds:>12.3f}{'  OVER BUDGET' if over else ''}")
+    print(f"\nBudget: {args.budget:.2f}s per entry point")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Benchmark: the whole pipeline, offline and reproducible.
+
+Runs 'run_crew' (hybrid run mode) for N topics, and each tool on its own,
+against local stand-ins (see benchmarks/standins.py): a scripted chat
+model instead of Gemini, a local server playing Google CSE, arXiv and
+the scraped websites, and the local 'hashing' embedding backend.
+
+Reports end-to-end latency, per-stage latency (from the run traces),
+throughput and peak memory. Results can be saved as a named baseline
+and later runs compared against it; the script exits with status 1 if a
+metric regressed by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_pipeline.py --topics 5
+    python benchmarks/bench_pipeline.py --llm-latency 0.5 --net-latency 0.05
+    python benchmarks/bench_pipeline.py --save-baseline default
+    python benchmarks/bench_pipeline.py --baseline default --tolerance 0.25
+    python benchmarks/bench_pipeline.py --pages path/to/saved_pages/ --recorded llm_outputs.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from standins import StandInServer, scripted_llm
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+TOPICS = [
+    "retrieval-augmented generation for scientific literature",
+    "quantum computing for portfolio optimization",
+    "protein folding with deep learning",
+    "carbon capture materials",
+    "autonomous agents for software engineering",
+    "battery chemistry for electric aviation",
+    "spin and drag in football aerodynamics",
+    "privacy-preserving federated learning",
+]
+
+# Lower is better for every compared metric
+COMPARED = ("e2e_p50", "e2e_max", "per_topic_seconds", "peak_rss_mb")
+
+
+def configure_environment(server: StandInServer, cache_dir: str, semantic_cache: bool, corpus: bool) -> None:
+    """Points every setting at the stand-ins. Must run before 'src' is imported."""
+    os.environ.update(server.environment())
+    os.environ.update({
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "offline",
+        "RUN_MODE": "hybrid",
+        "EMBEDDING_BACKEND": "hashing",
+        # tiktoken would download its vocabulary; token budgets use the length estimate
+        "TOKEN_ENCODING": "",
+        "ARXIV_MIN_INTERVAL": "0",
+        "AUTORESEARCH_CACHE_DIR": cache_dir,
+        "TRACE_ENABLED": "true",
+        "TRACE_DIR": os.path.join(cache_dir, "traces"),
+        # A warm report-level hit would skip the whole pipeline being measured
+        "SEMANTIC_CACHE_ENABLED": "true" if semantic_cache else "false",
+        # Covered sub-questions would skip the search stage being measured
+        "CORPUS_ENABLED": "true" if corpus else "false",
+    })
+
+
+def install_llm(make_llm) -> None:
+    """
+    Makes stand-ins every agent's LLM client (the runs attach their counters to them).
+    Each role gets its own instance from 'make_llm', so the registry's per-role stats stay apart.
+    """
+    from src.llm_setup import LLM_CONFIGS, set_llm
+
+    for name in LLM_CONFIGS:
+        set_llm(name, make_llm())
+
+
+def latest_profile(trace_dir: str) -> dict:
+    """Reads the profile record of the most recent trace file."""
+    path = max(glob.glob(os.path.join(trace_dir, "*.jsonl")), key=os.path.getmtime)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("type") == "profile":
+                return record
+    return {}
+
+
+def bench_pipeline(topics, verbose: bool):
+    from src.crew.main_crew import run_crew
+    from src.settings import TRACE_DIR
+
+    latencies, stages = [], {}
+    for topic in topics:
+        start = time.perf_counter()
+        sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            report = run_crew(topic)
+        latencies.append(time.perf_counter() - start)
+        if "## References" not in str(report):
+            print(f"warning: report for '{topic}' has no References section")
+        for stage in latest_profile(TRACE_DIR).get("stages", []):
+            stages.setdefault(stage["name"], []).append(stage["wall_seconds"])
+    return latencies, stages
+
+
+def bench_tools(iterations: int):
+    """Latency of each tool on its own, with fresh (uncached) inputs."""
+    from src.tools.rag_tools import rag_query_tool
+    from src.tools.retrieval import corpus_store
+    from src.tools.search_tools import arxiv_search, google_search, scrape_website
+
+    results = {}
+
+    def timed(name, fn, args_list):
+        timings = []
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+        results[name] = statistics.median(timings)
+
+    queries = [f"tool benchmark query {i} {time.time_ns()}" for i in range(iterations)]
+    links = [google_search(q)[0]["link"] for q in queries]
+    timed("google_search", google_search, [(q + " again",) for q in queries])
+    timed("scrape_website", scrape_website, [(link,) for link in links])
+    timed("arxiv_search", arxiv_search, [(q,) for q in queries])
+
+    context = [{"source": link, "content": scrape_website(link)} for link in links]
+    corpus_id = corpus_store.register(context)
+    rag = rag_query_tool.func
+    timed("rag_query_tool", rag, [(f"What about {q}?", corpus_id) for q in queries])
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> bool:
+    print(f"\nComparison with baseline '{baseline['name']}' (tolerance {tolerance:.0%}, min delta {min_delta}):")
+    ok = True
+    rows = [(k, results[k], baseline["results"].get(k)) for k in COMPARED]
+    rows += [(f"stage:{k}", v, baseline["results"]["stages"].get(k)) for k, v in results["stages"].items()]
+    rows += [(f"tool:{k}", v, baseline["results"]["tools"].get(k)) for k, v in results["tools"].items()]
+    for name, value, base in rows:
+        if base is None:
+            print(f"  {name:<28}{value:>10.3f}   (not in baseline)")
+            continue
+        change = (value - base) / base if base else 0.0
+        # Small absolute differences are run-to-run noise, whatever their ratio
+        regressed = change > tolerance and value - base > min_delta
+        ok = ok and not regressed
+        print(f"  {name:<28}{value:>10.3f}{base:>10.3f}{change:>+9.0%}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=3, help="Number of topics to run end to end")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM sleeps per call")
+    parser.add_argument("--net-latency", type=float, default=0.0, help="Seconds the stand-in server sleeps per request")
+    parser.add_argument("--pages", help="Folder of saved .html pages to serve (default: synthetic pages)")
+    parser.add_argument("--recorded", help="JSON file of recorded LLM outputs ({'plan'|'summarize'|'draft': text})")
+    parser.add_argument("--tool-iterations", type=int, default=5)
+    parser.add_argument("--warm", action="store_true", help="Run every topic once before measuring (warm caches)")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Enable the semantic plan/report cache (off by default)")
+    parser.add_argument("--corpus", action="store_true",
+                        help="Enable the persistent research corpus (off by default)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the peak of Python allocations (slower)")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--baseline", metavar="NAME", help="Compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric counts as regressed")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="Smallest absolute increase (seconds / MB) that can count as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the crew's console output and logs")
+    args = parser.parse_args()
+
+    server = StandInServer(latency=args.net_latency, pages_dir=args.pages).start()
+    cache_dir = tempfile.mkdtemp(prefix="autoresearch-bench-")
+    configure_environment(server, cache_dir, args.semantic_cache, args.corpus)
+    try:
+        install_llm(lambda: scripted_llm(args.llm_latency, args.recorded))
+        # Heavy imports happen on first use; measure runs, not imports (see bench_import.py)
+        from src.crew.main_crew import preload
+        preload()
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+
+        topics = [TOPICS[i % len(TOPICS)] + (f" ({i // len(TOPICS)})" if i >= len(TOPICS) else "")
+                  for i in range(args.topics)]
+        if args.warm:
+            bench_pipeline(topics, args.verbose)
+        if args.trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        latencies, stages = bench_pipeline(topics, args.verbose)
+        total = time.perf_counter() - start
+        tools = bench_tools(args.tool_iterations)
+
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results = {
+            "topics": len(topics),
+            "e2e_p50": statistics.median(latencies),
+            "e2e_max": max(latencies),
+            "per_topic_seconds": total / len(topics),
+            "throughput_topics_per_min": len(topics) / total * 60,
+            # ru_maxrss is in KB on Linux and in bytes on macOS
+            "peak_rss_mb": peak_rss_kb / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            "stages": {name: statistics.mean(v) for name, v in stages.items()},
+            "tools": tools,
+            "requests": dict(server.requests),
+        }
+        if args.trace_memory:
+            results["peak_python_alloc_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\nPipeline: {results['topics']} topics, LLM latency {args.llm_latency}s, "
+          f"network latency {args.net_latency}s{', warm caches' if args.warm else ''}")
+    print(f"  end-to-end p50 / max     {results['e2e_p50']:.3f}s / {results['e2e_max']:.3f}s")
+    print(f"  throughput               {results['throughput_topics_per_min']:.1f} topics/min")
+    print(f"  peak RSS                 {results['peak_rss_mb']:.0f} MB")
+    if "peak_python_alloc_mb" in results:
+        print(f"  peak Python allocations  {results['peak_python_alloc_mb']:.0f} MB")
+    print(f"  stand-in requests        {results['requests']}")
+    print("\nPer stage (mean seconds):")
+    for name, seconds in results["stages"].items():
+        print(f"  {name:<24}{seconds:>8.3f}")
+    print("\nPer tool (median seconds):")
+    for name, seconds in results["tools"].items():
+        print(f"  {name:<24}{seconds:>8.4f}")
+
+    config = {k: getattr(args, k) for k in ("topics", "llm_latency", "net_latency", "pages", "recorded", "warm")}
+    ok = True
+    if args.baseline:
+        with open(os.path.join(BASELINE_DIR, f"{args.baseline}.json"), encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"\nnote: baseline was recorded with {baseline.get('config')}")
+        ok = compare(results, baseline, args.tolerance, args.min_delta)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "name": args.save_baseline,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                            "cpus": os.cpu_count()},
+                "config": config,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved baseline to {path}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Micro-benchmark: scrape text extraction, old vs. new.
+
+Compares the original 'scrape_website_tool' pipeline (download everything,
+build a full BeautifulSoup DOM, then truncate to MAX_CHARS_TO_SCRAPE) with
+the current one (stop reading at SCRAPE_MAX_BYTES, stream-parse without a
+DOM, stop as soon as MAX_CHARS_TO_SCRAPE characters were extracted).
+
+The old pipeline needs BeautifulSoup, which the project no longer depends
+on: 'pip install beautifulsoup4' before running this benchmark.
+
+Usage:
+    python benchmarks/bench_scrape.py --pages path/to/saved_pages/
+    python benchmarks/bench_scrape.py                # synthetic corpus
+    python benchmarks/bench_scrape.py --save-corpus /tmp/pages
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.settings import SCRAPE_MAX_BYTES
+from src.tools.search_tools import MAX_CHARS_TO_SCRAPE, extract_text
+
+
+def legacy_extract(html: bytes) -> str:
+    """The original scrape_website_tool extraction, kept verbatim for comparison."""
+    # Imported here: only this baseline needs BeautifulSoup (not in requirements.txt)
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.decompose()
+
+    text = soup.get_text()
+
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+    return text[:MAX_CHARS_TO_SCRAPE]
+
+
+def current_extract(html: bytes) -> str:
+    # The streaming fetch never hands more than SCRAPE_MAX_BYTES to the parser
+    return extract_text(html[:SCRAPE_MAX_BYTES])
+
+
+# --- Synthetic Corpus ---
+WORDS = ("model reasoning agent benchmark latency token transformer retrieval "
+         "dataset training inference attention context memory search paper").split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+
+def synthetic_page(rng: random.Random, paragraphs: int) -> bytes:
+    nav = "".join(f'<li><a href="/p{i}">Link {i}</a></li>' for i in range(60))
+    script = "<script>" + "var x = {a: 1, b: [1, 2, 3]};" * 400 + "</script>"
+    body = "".join(
+        f"<div class='c'><h2>{_sentence(rng)}</h2><p>{' '.join(_sentence(rng) for _ in range(6))}</p></div>"
+        for _ in range(paragraphs)
+    )
+    footer = "<footer>" + "<p>Copyright, terms, privacy.</p>" * 50 + "</footer>"
+    return (
+        f"<html><head><title>Page</title><style>{'.c{color:red}' * 500}</style>{script}</head>"
+        f"<body><nav><ul>{nav}</ul></nav><main>{body}</main>{footer}</body></html>"
+    ).encode("utf-8")
+
+
+def synthetic_corpus(seed: int = 0):
+    rng = random.Random(seed)
+    # From a small blog post up to a multi-megabyte page
+    sizes = [20, 50, 100, 300, 1000, 3000, 8000]
+    return [(f"synthetic_{n}.html", synthetic_page(rng, n)) for n in sizes]
+
+
+def load_corpus(path: str):
+    files = sorted(glob.glob(os.path.join(path, "*.htm*")))
+    if not files:
+        sys.exit(f"No .html files found in {path}")
+    corpus = []
+    for f in files:
+        with open(f, "rb") as fh:
+            corpus.append((os.path.basename(f), fh.read()))
+    return corpus
+
+
+def time_it(fn, html: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Folder of saved .html pages (default: synthetic corpus)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page (median is reported)")
+    parser.add_argument("--save-corpus", help="Write the synthetic corpus to this folder and exit")
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+        for name, html in synthetic_corpus():
+            with open(os.path.join(args.save_corpus, name), "wb") as fh:
+                fh.write(html)
+        print(f"Wrote synthetic corpus to {args.save_corpus}")
+        return
+
+    corpus = load_corpus(args.pages) if args.pages else synthetic_corpus()
+
+    print(f"{'page':<28}{'size KB':>10}{'legacy ms':>12}{'current ms':>12}{'speedup':>10}{'bytes read':>12}")
+    total_legacy = total_current = 0.0
+    total_bytes = total_read = 0
+    for name, html in corpus:
+        legacy = time_it(legacy_extract, html, args.repeat)
+        current = time_it(current_extract, html, args.repeat)
+        read = min(len(html), SCRAPE_MAX_BYTES)
+        total_legacy += legacy
+        total_current += current
+        total_bytes += len(html)
+        total_read += read
+        print(f"{name[:27]:<28}{len(html) / 1024:>10.0f}{legacy * 1000:>12.1f}{current * 1000:>12.1f}"
+              f"{legacy / current if current else float('inf'):>9.1f}x{read / 1024:>10.0f}KB")
+
+    print("-" * 84)
+    print(f"{'total':<28}{total_bytes / 1024:>10.0f}{total_legacy * 1000:>12.1f}{total_current * 1000:>12.1f}"
+          f"{total_legacy / total_current if total_current else float('inf'):>9.1f}x{total_read / 1024:>10.0f}KB")
+    print(f"Bandwidth saved by the byte budget: {(1 - total_read / total_bytes) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
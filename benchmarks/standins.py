@@ -0,0 +1,274 @@
+"""
+Local stand-ins for every external service the pipeline talks to, so
+benchmarks run offline and reproducibly:
+
+- 'ScriptedChatModel': a LangChain chat model that answers each Task
+  with scripted (or recorded) output instead of calling Gemini.
+- 'StandInServer': one local HTTP server playing the Google Custom
+  Search API, the arXiv API and the websites the search results link to.
+
+Embeddings need no stand-in: the benchmarks use the local 'hashing' backend.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_TOPIC_RE = re.compile(r"topic(?: is)?: '([^']*)'")
+_SECTION_RE = re.compile(r"^### (.+)$", re.MULTILINE)
+_SOURCE_RE = re.compile(r"\[Source: [^\]]+\]")
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+# --- Fake LLM ---
+class ScriptedChatModel(BaseChatModel):
+    """
+    Answers the pipeline's Tasks without a real LLM.
+
+    The Task is recognized from its prompt ('plan', 'summarize' or 'draft').
+    By default the answer is generated from the prompt itself (a plan for
+    the topic, a summary that keeps the snippets' source tags, a report
+    built from that summary). A dict of recorded outputs can replace any
+    of them. 'latency' seconds are slept per call to mimic a remote model.
+    """
+
+    latency: float = 0.0
+    recorded: Dict[str, str] = {}
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        task = self._task(prompt)
+        answer = self.recorded.get(task) or getattr(self, f"_answer_{task}")(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls += 1
+        text = f"Thought: I now know the final answer\nFinal Answer: {answer}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    @staticmethod
+    def _task(prompt: str) -> str:
+        if "'ResearchPlan' schema" in prompt:
+            return "plan"
+        if "already retrieved for you" in prompt:
+            return "summarize"
+        return "draft"
+
+    @staticmethod
+    def _topic(prompt: str) -> str:
+        match = _TOPIC_RE.search(prompt)
+        return match.group(1) if match else "the topic"
+
+    def _answer_plan(self, prompt: str) -> str:
+        topic = self._topic(prompt)
+        aspects = ["recent advances", "core methods", "open challenges", "real-world applications"]
+        plan = [
+            {
+                "sub_question": f"What are the {aspect} in {topic}?",
+                "source_type": "academic papers" if i % 2 else "recent news",
+                "keywords": [f"{topic} {aspect}", topic],
+            }
+            for i, aspect in enumerate(aspects)
+        ]
+        return json.dumps({"research_plan": plan})
+
+    def _answer_summarize(self, prompt: str) -> str:
+        body = prompt.split("already retrieved for you", 1)[-1]
+        parts = _SECTION_RE.split(body)
+        sections = []
+        # parts = [preamble, question1, snippets1, question2, snippets2, ...]
+        for question, snippets in zip(parts[1::2], parts[2::2]):
+            tags = list(dict.fromkeys(_SOURCE_RE.findall(snippets)))[:2]
+            sentence = " ".join(snippets.split()[:40])
+            claim = f"{sentence} {' '.join(tags)}" if tags else "No relevant information was found."
+            sections.append(f"## {question.strip()}\n{claim}")
+        return "\n\n".join(sections) or "No findings."
+
+    def _answer_draft(self, prompt: str) -> str:
+        topic = self._topic(prompt)
+        tags = list(dict.fromkeys(_SOURCE_RE.findall(prompt)))
+        findings = "\n".join(f"- Finding supported by the sources {tag}" for tag in tags) or "- No findings."
+        return (
+            f"# Report: {topic}\n\n## Abstract\nAn overview of {topic}.\n\n"
+            f"## Introduction\nThis report covers {topic}.\n\n## Key Findings\n{findings}\n\n"
+            f"## Challenges / Future Scope\nOpen questions remain."
+        )
+
+
+def scripted_llm(latency: float = 0.0, recorded_path: Optional[str] = None) -> ScriptedChatModel:
+    """Builds the fake LLM, optionally with recorded outputs from a JSON file ({task: output})."""
+    recorded = {}
+    if recorded_path:
+        with open(recorded_path, encoding="utf-8") as f:
+            recorded = json.load(f)
+    return ScriptedChatModel(latency=latency, recorded=recorded)
+
+
+# --- Fake Google CSE / arXiv / Websites ---
+def _atom_feed(query: str, start: int, max_results: int, ids: List[str]) -> bytes:
+    if not ids:
+        rng = random.Random(_seed(query))
+        # A search matches at most 10 papers (the pipeline asks for 3)
+        ids = [f"{rng.randint(2001, 2412)}.{rng.randint(10000, 99999)}" for _ in range(10)][start:start + max_results]
+    entries = []
+    for paper_id in ids:
+        rng = random.Random(_seed(paper_id))
+        words = " ".join(rng.choice(("model", "agent", "retrieval", "latency", "reasoning", "benchmark",
+                                     "transformer", "dataset", "memory", "search")) for _ in range(150))
+        entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{paper_id}v1</id>
+    <updated>2024-01-02T00:00:00Z</updated>
+    <published>2024-01-01T00:00:00Z</published>
+    <title>Paper {paper_id} on {escape(query[:60])}</title>
+    <summary>{words}</summary>
+    <author><name>Author {rng.randint(1, 999)}</name></author>
+    <link href="http://arxiv.org/abs/{paper_id}v1" rel="alternate" type="text/html"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>""")
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+        f"  <title>ArXiv Query</title>\n  <id>http://arxiv.org/api/stand-in</id>\n"
+        f"  <updated>2024-01-02T00:00:00Z</updated>\n"
+        f"  <opensearch:totalResults>{len(entries)}</opensearch:totalResults>\n"
+        f"  <opensearch:startIndex>{start}</opensearch:startIndex>\n"
+        f"  <opensearch:itemsPerPage>{len(entries)}</opensearch:itemsPerPage>"
+        + "".join(entries) + "\n</feed>\n"
+    ).encode("utf-8")
+
+
+class StandInServer:
+    """
+    A local HTTP server for the Google CSE API ('/customsearch/v1'), the
+    arXiv API ('/arxiv/query') and web pages ('/pages/<name>.html').
+
+    Pages are served from 'pages_dir' (in rotation) when given, otherwise
+    generated deterministically with the scrape benchmark's page generator.
+    'latency' seconds are slept per request to mimic the network.
+    """
+
+    def __init__(self, latency: float = 0.0, pages_dir: Optional[str] = None, page_paragraphs: int = 300):
+        self.latency = latency
+        self.page_paragraphs = page_paragraphs
+        self.pages = []
+        if pages_dir:
+            self.pages = sorted(
+                os.path.join(pages_dir, f) for f in os.listdir(pages_dir) if f.endswith((".html", ".htm"))
+            )
+        self.requests: Dict[str, int] = {"google": 0, "arxiv": 0, "page": 0}
+        self._lock = threading.Lock()
+        self._page_cache: Dict[str, bytes] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def environment(self) -> Dict[str, str]:
+        """Env vars that point the pipeline at this server."""
+        return {
+            "GOOGLE_CSE_URL": f"{self.url}/customsearch/v1",
+            "ARXIV_API_URL": f"{self.url}/arxiv/query",
+            "GOOGLE_API_KEY": "offline",
+            "GOOGLE_CSE_ID": "offline",
+        }
+
+    def _count(self, kind: str) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+
+    def _page(self, name: str) -> bytes:
+        with self._lock:
+            page = self._page_cache.get(name)
+        if page is None:
+            if self.pages:
+                with open(self.pages[_seed(name) % len(self.pages)], "rb") as f:
+                    page = f.read()
+            else:
+                # Imported here: bench_scrape loads 'src.settings', which must only
+                # happen after the benchmark pointed the settings at this server
+                from bench_scrape import synthetic_page
+                page = synthetic_page(random.Random(_seed(name)), self.page_paragraphs)
+            with self._lock:
+                self._page_cache[name] = page
+        return page
+
+    def _google(self, params: Dict[str, List[str]]) -> bytes:
+        query = params.get("q", [""])[0]
+        num = int(params.get("num", ["3"])[0])
+        items = [
+            {
+                "title": f"Result {i} for {query}",
+                "snippet": f"A short snippet about {query}.",
+                "link": f"{self.url}/pages/{_seed(query) % 100000}-{i}.html",
+            }
+            for i in range(num)
+        ]
+        return json.dumps({"items": items}).encode("utf-8")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+                if parsed.path == "/customsearch/v1":
+                    server._count("google")
+                    self._send(server._google(params), "application/json")
+                elif parsed.path == "/arxiv/query":
+                    server._count("arxiv")
+                    ids = [i for i in params.get("id_list", [""])[0].split(",") if i]
+                    body = _atom_feed(params.get("search_query", [""])[0], int(params.get("start", ["0"])[0]),
+                                      int(params.get("max_results", ["3"])[0]), ids)
+                    self._send(body, "application/atom+xml")
+                elif parsed.path.startswith("/pages/"):
+                    server._count("page")
+                    self._send(server._page(parsed.path[len("/pages/"):]), "text/html; charset=utf-8")
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
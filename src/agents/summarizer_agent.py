@@ -1,20 +1,5 @@
-from crewai import Agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-import os
+from src.llm_setup import get_llm
 
-from langchain.chat_models import ChatOpenAI
-
-# --- Import the new tool ---
-from src.tools.rag_tools import rag_query_tool
-
-llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.5-flash-preview-09-2025",
-    # model="models/gemini-pro",
-
-    verbose=True,
-    temperature=0.3, # Slightly more creative for summarization
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
 # openai_key = os.getenv("OPENAI_API_KEY")
 # if not openai_key:
 #     raise EnvironmentError("OPENAI_API_KEY missing in .env")
@@ -25,26 +10,39 @@ llm = ChatGoogleGenerativeAI(
 #     temperature=0.2,
 #     openai_api_key=openai_key     # explicit pass (optional if env var is set)
 # )
-summarizer_agent = Agent(
-    role="Specialized Research Summarizer",
-    goal=(
-        "Receive a large block of unstructured text and a JSON research plan. "
-        "For *each* sub-question in the plan, use the `rag_query_tool` "
-        "to find the *most relevant* information from the text. "
-        "Then, compile a concise summary based *only* on the relevant snippets."
-    ),
-    backstory=(
-        "You are an expert in information retrieval and data synthesis. "
-        "You don't just read and summarize; you intelligently query the provided "
-        "text using RAG to extract *only* the most precise, relevant information. "
-        "Your skill lies in ignoring the noise and focusing on the signal, "
-        "answering each research question directly with supporting evidence "
-        "from the provided context."
-    ),
-    llm=llm,
-    allow_delegation=False,
-    verbose=True,
-    # --- Give the new tool to the agent ---
-    tools=[rag_query_tool]
-)
 
+
+def create_summarizer_agent(llm=None):
+    """
+    Builds the summarizer agent.
+
+    Args:
+        llm (optional): The chat model to use (default: the shared 'summarizer' client
+                        from 'src/llm_setup.py').
+    """
+    # Imported here: crewai takes seconds to import
+    from crewai import Agent
+    from src.tools.rag_tools import rag_query_tool, rag_batch_query_tool
+
+    return Agent(
+        role="Specialized Research Summarizer",
+        goal=(
+            "Receive a JSON research plan and the id of the retrieved sources ('corpus_id'). "
+            "For *all* sub-questions in the plan, use the `rag_batch_query_tool` with that corpus_id "
+            "to find the *most relevant* information from the sources. "
+            "Then, compile a concise summary based *only* on the relevant snippets."
+        ),
+        backstory=(
+            "You are an expert in information retrieval and data synthesis. "
+            "You don't just read and summarize; you intelligently query the provided "
+            "text using RAG to extract *only* the most precise, relevant information. "
+            "Your skill lies in ignoring the noise and focusing on the signal, "
+            "answering each research question directly with supporting evidence "
+            "from the provided context."
+        ),
+        llm=llm or get_llm("summarizer"),
+        allow_delegation=False,
+        verbose=True,
+        # --- Give the new tool to the agent ---
+        tools=[rag_batch_query_tool, rag_query_tool]
+    )
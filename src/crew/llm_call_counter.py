@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.crew.run_stats import current_run_stats
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """LangChain callback that times every LLM call into the current run's stats."""
+
+    def __init__(self):
+        self._starts: Dict = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _start(self, run_id):
+        # One counter is shared by the LLM calls of every run in the process
+        with self._lock:
+            self._starts[run_id] = (time.perf_counter(), current_run_stats())
+
+    def _finish(self, run_id):
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        start, stats = started
+        if stats is not None:
+            stats.record_llm_call(time.perf_counter() - start)
+
+
+llm_call_counter = LLMCallCounter()
@@ -68,46 +68,338 @@
 #     print("\n--- FINAL REPORT ---")
 #     print(report)
 
-from crewai import Crew, Process
-from src.agents.planner_agent import planner_agent
-from src.agents.search_agent import search_agent
-from src.agents.summarizer_agent import summarizer_agent
-from src.agents.writer_agent import writer_agent
-# from src.agents.critic_agent import critic_agent  <-- REMOVED
-
-from src.crew.tasks import (
-    plan_task,
-    search_task,
-    summarize_task,
-    draft_task
-    # critique_task,      <-- REMOVED
-    # final_report_task   <-- REMOVED
-)
+import logging
+import time
+
+from src.agents.planner_agent import create_planner_agent
+from src.agents.search_agent import create_search_agent
+from src.agents.summarizer_agent import create_summarizer_agent
+from src.agents.writer_agent import create_writer_agent
+# from src.agents.critic_agent import create_critic_agent  <-- REMOVED
+
+from src.crew.tasks import create_tasks, ConsolidatedData, ResearchPlan
+from src.crew.mechanical import attach_references, format_plan, format_retrieved_snippets, format_sources
+from src.crew.outputs import output_to_dict
+from src.crew.run_stats import attach_llm_counter, current_run_stats, start_run_stats
+from src.crew.token_budget import budget_snippets, budget_sources, record_draft_input
+from src.llm_setup import llm_stats
+from src.settings import RUN_MODE
+from src.tracing import attach_tracing, finish_trace, span, start_trace
+
+# Importing this module is cheap: crewai, langchain_core (the LLM cache and
+# callbacks), the LLM clients, the search and retrieval stacks (FAISS,
+# crewai_tools) and the semantic cache are only imported and built on the
+# first run (or by 'preload').
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Span names of the Tasks (see 'src/tracing.py'), mapped to the run's Tasks
+TRACED_TASKS = {
+    "plan": "plan_task",
+    "search": "search_task",
+    "summarize": "summarize_task",
+    "draft": "draft_task",
+}
+HYBRID_TRACED_TASKS = {
+    "plan": "plan_task",
+    "summarize": "summarize_snippets_task",
+    "draft": "write_report_task",
+}
+
+# --- Per-Run Agents and Tasks ---
+# crewAI keeps a run's state on the Agent and Task objects (interpolated
+# prompts, outputs, executors), so every run builds its own. The agents of
+# all runs share the process-wide LLM clients (see 'src/llm_setup.py').
+
+# Stage outputs reported by the Tasks (see 'on_output' of 'run_crew')
+OUTPUT_TASKS = {
+    "plan_task": "plan",
+    "search_task": "sources",
+    "summarize_task": "summaries",
+    "draft_task": "draft",
+    "summarize_snippets_task": "summaries",
+    "write_report_task": "draft",
+}
+
+def _output_markdown(name: str, output) -> str:
+    """Markdown view of a stage output (a plan, the sources, or a Task's text)."""
+    if isinstance(output, ResearchPlan):
+        return format_plan(output)
+    if isinstance(output, ConsolidatedData):
+        return format_sources(output)
+    if name == "plan":
+        from src.crew.search_stage import parse_research_plan
+        try:
+            return format_plan(parse_research_plan(output))
+        except ValueError:
+            pass
+    if name == "sources":
+        data = output_to_dict(output)
+        if data is not None:
+            try:
+                return format_sources(ConsolidatedData.model_validate(data))
+            except ValueError:
+                pass
+    return str(getattr(output, "raw_output", output))
+
+def _emitter(on_output):
+    """Wraps 'on_output' so a failing callback never fails the run."""
+    def emit(name: str, output) -> None:
+        if on_output is None:
+            return
+        try:
+            on_output(name, _output_markdown(name, output))
+        except Exception as e:
+            log.warning(f"Run: Output callback failed for '{name}': {e}")
+    return emit
+
+def _new_run(on_output=None) -> dict:
+    """
+    Builds the agents and tasks of one run.
+
+    Args:
+        on_output (callable, optional): Receives the Tasks' outputs (see 'run_crew').
+
+    Returns:
+        dict: The agents and tasks by name ('planner_agent', 'plan_task', ...),
+              plus 'emit', which reports a stage output.
+    """
+    # Imported here: the limiter is a LangChain callback, and langchain_core is slow to import
+    from src.llm_limits import attach_llm_limiter
+
+    agents = {
+        "planner_agent": create_planner_agent(),
+        "search_agent": create_search_agent(),
+        "summarizer_agent": create_summarizer_agent(),
+        "writer_agent": create_writer_agent(),
+    }
+    for agent in agents.values():
+        # Count (and time) every LLM call, trace Tasks and LLM calls, and keep all
+        # LLM calls of the process within LLM_MAX_CONCURRENCY / LLM_MAX_RPM (once per client)
+        attach_llm_counter(agent.llm)
+        attach_llm_limiter(agent.llm)
+        attach_tracing(agent)
+    run = {**agents, **create_tasks(**agents), "emit": _emitter(on_output)}
+    for key in ("summarize_task", "summarize_snippets_task"):
+        # Log the size of the summary the writer gets against its token budget
+        run[key].callback = _chain(run[key].callback, record_draft_input)
+    if on_output is not None:
+        for key, name in OUTPUT_TASKS.items():
+            # Reported first: the search Task's own callback then shrinks its output to a corpus id
+            run[key].callback = _chain(lambda output, name=name: run["emit"](name, output), run[key].callback)
+    return run
+
+def _chain(first, second):
+    """Combines two Task callbacks (either may be None)."""
+    if first is None or second is None:
+        return first or second
+    def callback(output):
+        first(output)
+        second(output)
+    return callback
+
+def preload() -> None:
+    """
+    Imports the heavy libraries and builds the LLM clients ahead of the
+    first run, e.g. when a server starts.
+    """
+    import src.crew.search_stage  # noqa: F401
+    import src.tools.retrieval  # noqa: F401
+    from src.crew.semantic_cache import get_semantic_cache
+    from src.llm_cache import install_llm_cache
+
+    install_llm_cache()
+    _new_run()
+    get_semantic_cache()
 
 # Define the crew
-def run_crew(topic: str):
+def run_crew(topic: str, run_mode: str = RUN_MODE, use_cache: bool = True, listener=None, on_output=None):
     """
     Initializes and kicks off the research crew.
+
+    Args:
+        topic (str): The research topic.
+        run_mode (str): 'hybrid' does the mechanical steps (search, scrape,
+                        bundling, RAG lookups, References) in plain Python and
+                        calls the LLM only to plan, summarize and write.
+                        'agent' runs the original 4-task crew.
+        use_cache (bool): If False, the semantic cache is bypassed: no cached
+                          report or plan is reused (the new ones are still stored).
+        listener (callable, optional): Called with ('start' | 'end', span) as
+                                       the run's spans open and close, e.g. to
+                                       report progress (see 'src/jobs.py').
+        on_output (callable, optional): Called with (name, markdown) as each
+                                        stage output is ready: 'plan',
+                                        'sources', 'summaries', 'draft'.
+
+    Near-identical topics reuse earlier work through the semantic cache
+    (see 'src/crew/semantic_cache.py'): a fresh report of a similar topic
+    is returned as is, and otherwise a similar topic's plan skips planning.
+
+    The run's LLM call counts and the estimated calls/seconds saved are
+    logged at the end, and available from 'current_run_stats()'. The run
+    is also traced (see 'src/tracing.py'): the spans are written to
+    TRACE_DIR as JSON lines and a time/token profile is logged.
+
+    Runs are independent (each builds its own agents and tasks), so several
+    can run at once in different threads; all of them share the LLM
+    clients and limits (see 'src/llm_setup.py', 'src/llm_limits.py').
     """
+    from src.crew.semantic_cache import get_semantic_cache
+    # Imported here: the LLM cache plugs into langchain_core, which is slow to import
+    from src.llm_cache import get_installed_llm_cache, install_llm_cache
+
+    # Every agent's LLM shares one persistent completion cache (LLM_CACHE_MODE)
+    install_llm_cache()
+    run = _new_run(on_output)
+    traced = TRACED_TASKS if run_mode == "agent" else HYBRID_TRACED_TASKS
+    stats = start_run_stats(run_mode)
+    tracer = start_trace(topic, tasks={name: run[key] for name, key in traced.items()}, listener=listener)
+    try:
+        cache = get_semantic_cache()
+        cached_report = plan = None
+        if cache is not None and use_cache:
+            with span("semantic_cache"):
+                cached_report = cache.lookup_report(topic)
+                if cached_report is None:
+                    plan = cache.lookup_plan(topic)
+
+        if cached_report is not None:
+            result = cached_report
+        elif run_mode == "agent":
+            result = _run_agent_crew(run, topic, plan)
+        else:
+            result = _run_hybrid_crew(run, topic, plan)
+
+        if cache is not None and cached_report is None and str(result).strip():
+            cache.store_report(topic, str(result))
+    except Exception as e:
+        finish_trace(tracer, e)
+        raise
+    finish_trace(tracer)
+    log.info(f"Run stats: {stats.summary()}")
+    llm_cache = get_installed_llm_cache()
+    if llm_cache is not None:
+        log.info(f"LLM Cache stats: {llm_cache.stats()}")
+    if cache is not None:
+        log.info(f"Semantic Cache stats: {cache.stats()}")
+    log.info(f"LLM stats (process): {llm_stats()['all']}")
+    return result
+
+def _remember_plan(topic: str, plan) -> None:
+    """Stores a freshly made plan in the semantic cache (best effort)."""
+    from src.crew.semantic_cache import get_semantic_cache
+
+    cache = get_semantic_cache()
+    if cache is not None:
+        cache.store_plan(topic, plan)
+
+def _run_hybrid_crew(run: dict, topic: str, plan=None) -> str:
+    """
+    Runs the pipeline with the mechanical steps done in code.
+    If a (cached) plan is given, planning is skipped.
+    """
+    from crewai import Crew, Process
+    from src.crew.search_stage import parse_research_plan, run_search_stage
+    from src.tools.dedup import dedupe_sources
+    from src.tools.retrieval import start_session
+
+    stats = current_run_stats()
+    plan_task = run["plan_task"]
+    summarize_snippets_task = run["summarize_snippets_task"]
+
+    # 1. Plan (LLM)
+    if plan is None:
+        plan_crew = Crew(
+            agents=[run["planner_agent"]],
+            tasks=[plan_task],
+            verbose=2,
+            process=Process.sequential
+        )
+        plan_output = plan_crew.kickoff(inputs={'topic': topic})
+        plan = parse_research_plan(plan_task.output or plan_output)
+        _remember_plan(topic, plan)
+    else:
+        run["emit"]("plan", plan)
+
+    # 2. Search + scrape + bundle (code, concurrent)
+    with span("search"):
+        consolidated_data = run_search_stage(plan)
+        # Drop syndicated copies, then compact the pages and fit them into the 'sources' token budget
+        consolidated_data = budget_sources(dedupe_sources(consolidated_data))
+    run["emit"]("sources", consolidated_data)
+
+    # 3. RAG lookups for all sub-questions (code, one batched search)
+    start = time.perf_counter()
+    with span("rag_lookup"):
+        session = start_session(consolidated_data)
+    answers = budget_snippets(session.answers) if session is not None else {}
+    # The agent crew makes one batched RAG tool call for all sub-questions, not one each
+    stats.record_step("rag_lookup", 1, time.perf_counter() - start)
+
+    # 4. Summarize + write (LLM)
+    crew = Crew(
+        agents=[run["summarizer_agent"], run["writer_agent"]],
+        tasks=[summarize_snippets_task, run["write_report_task"]],
+        verbose=2,
+        process=Process.sequential
+    )
+    report = crew.kickoff(inputs={
+        'topic': topic,
+        'snippets': format_retrieved_snippets(plan, answers, consolidated_data.no_results)
+    })
+
+    # 5. References (code)
+    start = time.perf_counter()
+    summary = summarize_snippets_task.output.raw_output if summarize_snippets_task.output else ""
+    with span("references"):
+        report = attach_references(str(report), summary)
+    stats.record_step("references", 1, time.perf_counter() - start)
+    return report
+
+def _run_agent_crew(run: dict, topic: str, plan=None):
+    """
+    Runs the original 4-task crew, where every stage is driven by an LLM.
+    If a (cached) plan is given, the plan Task is skipped and the plan is
+    handed to the search Task as if the planner had produced it.
+    """
+    from crewai import Crew, Process
+    from crewai.tasks.task_output import TaskOutput
+    from src.crew.search_stage import parse_research_plan
+
+    planner_agent = run["planner_agent"]
+    plan_task = run["plan_task"]
+
     # Define the agents
     agents = [
         planner_agent,
-        search_agent,
-        summarizer_agent,
-        writer_agent
+        run["search_agent"],
+        run["summarizer_agent"],
+        run["writer_agent"]
         # critic_agent  <-- REMOVED
     ]
 
     # Define the tasks
     tasks = [
         plan_task,
-        search_task,
-        summarize_task,
-        draft_task
+        run["search_task"],
+        run["summarize_task"],
+        run["draft_task"]
         # critique_task,      <-- REMOVED
         # final_report_task   <-- REMOVED
     ]
 
+    if plan is not None:
+        # The search Task reads the plan from plan_task's output (its context)
+        plan_json = plan.model_dump_json()
+        plan_task.output = TaskOutput(description=plan_task.description,
+                                      exported_output=plan_json, raw_output=plan_json)
+        agents.remove(planner_agent)
+        tasks.remove(plan_task)
+        run["emit"]("plan", plan)
+
     # Instantiate your crew with a sequential process
     crew = Crew(
         agents=agents,
@@ -120,5 +412,11 @@ def run_crew(topic: str):
     # We pass the topic to the crew's kickoff method,
     # which will be available to all tasks.
     result = crew.kickoff(inputs={'topic': topic})
+
+    if plan is None:
+        try:
+            _remember_plan(topic, parse_research_plan(plan_task.output))
+        except ValueError as e:
+            log.warning(f"Semantic Cache: Not storing the plan for '{topic}': {e}")
     return result
 
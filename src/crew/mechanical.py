@@ -0,0 +1,72 @@
+import re
+from typing import Dict, List, Sequence
+
+from src.crew.tasks import ConsolidatedData, ResearchPlan
+
+# Mechanical pipeline steps done in plain Python in the 'hybrid' run mode.
+# Each replaces an LLM round trip in the original all-agent crew.
+
+_SOURCE_TAG_RE = re.compile(r"\[Source:\s*([^\]]+?)\s*\]")
+_REFERENCES_RE = re.compile(r"^#{1,6}\s*References\b.*\Z", re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+
+def format_retrieved_snippets(plan: ResearchPlan, answers: Dict[str, str], no_results: Sequence[str] = ()) -> str:
+    """
+    Lays out the retrieved snippets for the summarizer, one Markdown
+    section per sub-question (replaces the summarizer's RAG tool calls).
+    Sub-questions the search found nothing for ('no_results') say so, so
+    the report can state the gap.
+    """
+    sections = []
+    for sq in plan.research_plan:
+        snippets = answers.get(sq.sub_question)
+        if sq.sub_question in no_results:
+            gap = "No search results were found for this sub-question."
+            snippets = f"{gap} Related snippets of the other sources:\n{snippets}" if snippets else gap
+        sections.append(f"### {sq.sub_question}\n{snippets or 'No relevant information found for this sub-question.'}")
+    return "\n\n".join(sections)
+
+
+def extract_sources(text: str) -> List[str]:
+    """Returns the unique [Source: ...] values of a text, in order of first appearance."""
+    seen = []
+    for source in _SOURCE_TAG_RE.findall(text):
+        if source not in seen and source != "Unknown Source":
+            seen.append(source)
+    return seen
+
+
+def build_references(sources: List[str]) -> str:
+    """Builds the report's References section: a numbered list of raw URLs."""
+    lines = ["## References", ""]
+    lines.extend(f"{n}. {source}" for n, source in enumerate(sources, start=1))
+    return "\n".join(lines)
+
+
+def attach_references(report: str, summary: str) -> str:
+    """
+    Replaces whatever References section the writer produced (if any) with
+    one built from the summary's [Source: ...] tags.
+    """
+    body = _REFERENCES_RE.sub("", report).rstrip()
+    sources = extract_sources(summary) or extract_sources(report)
+    if not sources:
+        return body
+    return f"{body}\n\n{build_references(sources)}\n"
+
+
+# --- Stage Outputs ---
+# Markdown views of intermediate results, for progress displays.
+def format_plan(plan: ResearchPlan) -> str:
+    """Lays out a research plan: one numbered line per sub-question."""
+    lines = []
+    for n, sq in enumerate(plan.research_plan, start=1):
+        lines.append(f"{n}. **{sq.sub_question}**  \n   _{sq.source_type}_: {', '.join(sq.keywords)}")
+    return "\n".join(lines)
+
+
+def format_sources(data: ConsolidatedData) -> str:
+    """Lists the retrieved sources, with the size of their content, and the sub-questions without results."""
+    lines = [f"- {item.source} ({len(item.content):,} characters)" for item in data.sources]
+    lines += [f"- No results for: {question}" for question in data.no_results]
+    return "\n".join(lines) or "No sources found."
@@ -0,0 +1,43 @@
+import json
+import re
+from typing import Optional
+
+# LLMs often wrap their JSON in a ```json ... ``` fence
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+
+def output_to_dict(output) -> Optional[dict]:
+    """
+    Best-effort conversion of a task output into a dict.
+
+    Accepts a crewAI TaskOutput (its 'exported_output' / 'raw_output'),
+    a Pydantic model, a dict, or a JSON string (optionally fenced).
+
+    Returns:
+        Optional[dict]: The parsed object, or None if it isn't a JSON object.
+    """
+    for attr in ("exported_output", "raw_output"):
+        if hasattr(output, attr) and getattr(output, attr):
+            converted = output_to_dict(getattr(output, attr))
+            if converted is not None:
+                return converted
+    if hasattr(output, "model_dump"):
+        try:
+            return output.model_dump()
+        except Exception:
+            # crewAI's TaskOutput coerces an 'output_json' dict into a bare
+            # BaseModel that can't be dumped; the raw output is used instead.
+            return None
+    if isinstance(output, dict):
+        return output
+    if isinstance(output, str):
+        text = output.strip()
+        match = _FENCE_RE.match(text)
+        if match:
+            text = match.group(1)
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
+    return None
@@ -0,0 +1,129 @@
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# LLM round trips the 'agent' run mode spends on each mechanical step that
+# the 'hybrid' run mode does in plain Python instead. Retries after
+# malformed JSON are not counted, so the estimate is conservative.
+LLM_CALLS_PER_STEP = {
+    "search": 1,       # build the OR query, pick the tool by source_type, call it
+    "scrape": 1,       # pick the top hit and call scrape_website_tool
+    "bundle": 1,       # emit the ConsolidatedData JSON
+    "corpus": 2,       # a sub-question answered by the research corpus: no search + scrape calls
+    "rag_lookup": 1,   # summarizer's one rag_batch_query_tool call for all sub-questions
+    "references": 0,   # de-duplicating [Source: ...] tags (part of the writer's answer)
+}
+
+
+class RunStats:
+    """
+    Per-run counters for LLM calls and the mechanical steps done in code.
+
+    LLM calls are recorded by 'LLMCallCounter' (see
+    'src/crew/llm_call_counter.py'); code steps are recorded with
+    'record_step'. 'summary()' turns them into an estimate of the LLM
+    calls and seconds the run saved compared to the all-agent crew.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        # step name -> [count, wall seconds, serial seconds]
+        self.steps: Dict[str, list] = {}
+        # stage name -> {"tokens": ..., "budget": ..., "before": ...} (see 'src/crew/token_budget.py')
+        self.token_usage: Dict[str, dict] = {}
+        # level ('sources' / 'chunks') -> near-duplicates dropped (see 'src/tools/dedup.py')
+        self.dedup: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record_llm_call(self, seconds: float) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def record_step(self, name: str, count: int = 1, wall_seconds: float = 0.0,
+                    serial_seconds: Optional[float] = None) -> None:
+        """
+        Records a mechanical step done in code.
+
+        Args:
+            name (str): Step name (a key of LLM_CALLS_PER_STEP).
+            count (int): How many times the step ran (e.g. once per sub-question).
+            wall_seconds (float): Wall time the step took.
+            serial_seconds (float, optional): Time the step would have taken
+                                              one item at a time (for parallel steps).
+        """
+        with self._lock:
+            entry = self.steps.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += wall_seconds
+            entry[2] += serial_seconds if serial_seconds is not None else wall_seconds
+
+    def record_tokens(self, stage: str, tokens: int, budget: int, before: Optional[int] = None) -> None:
+        """Records the tokens a stage handed to the LLM, against its budget."""
+        with self._lock:
+            self.token_usage[stage] = {"tokens": tokens, "budget": budget,
+                                       "before": before if before is not None else tokens}
+
+    def record_dedup(self, level: str, total: int, removed: int, tokens: int, embeddings: int = 0) -> None:
+        """Records the near-duplicates dropped at one level, and the tokens and embeddings that saved."""
+        with self._lock:
+            entry = self.dedup.setdefault(level, {"total": 0, "removed": 0, "tokens_avoided": 0,
+                                                  "embeddings_avoided": 0})
+            entry["total"] += total
+            entry["removed"] += removed
+            entry["tokens_avoided"] += tokens
+            entry["embeddings_avoided"] += embeddings
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return sum(LLM_CALLS_PER_STEP.get(name, 0) * count for name, (count, _, _) in self.steps.items())
+
+    def summary(self) -> dict:
+        avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        parallel_gain = sum(serial - wall for _, wall, serial in self.steps.values())
+        return {
+            "mode": self.mode,
+            "total_seconds": round(time.perf_counter() - self.started, 2),
+            "llm_calls": self.llm_calls,
+            "llm_seconds": round(self.llm_seconds, 2),
+            "code_steps": {name: count for name, (count, _, _) in self.steps.items()},
+            "token_usage": dict(self.token_usage),
+            "dedup": dict(self.dedup),
+            "llm_calls_saved": self.llm_calls_saved,
+            # Saved calls at this run's average LLM latency, plus time won by running steps in parallel
+            "seconds_saved_estimate": round(self.llm_calls_saved * avg_llm + parallel_gain, 2),
+        }
+
+
+# --- Current Run ---
+_current: contextvars.ContextVar = contextvars.ContextVar("run_stats", default=None)
+
+
+def start_run_stats(mode: str) -> RunStats:
+    """Creates the stats object for the current run (context-local)."""
+    stats = RunStats(mode)
+    _current.set(stats)
+    return stats
+
+
+def current_run_stats() -> Optional[RunStats]:
+    return _current.get()
+
+
+def attach_llm_counter(llm) -> None:
+    """Adds the shared LLM call counter to an LLM's callbacks (once)."""
+    # Imported here: the counter is a LangChain callback, and langchain_core is slow to import
+    from src.crew.llm_call_counter import llm_call_counter
+
+    callbacks = llm.callbacks if isinstance(llm.callbacks, list) else []
+    if llm_call_counter not in callbacks:
+        llm.callbacks = callbacks + [llm_call_counter]
@@ -0,0 +1,186 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.crew.outputs import output_to_dict
+from src.crew.run_stats import current_run_stats
+from src.crew.tasks import ConsolidatedData, ResearchPlan, SourceItem, SubQuestion
+from src.settings import SEARCH_MAX_WORKERS
+from src.tools.arxiv_client import get_arxiv_service
+from src.tools.http_cache import get_http_cache
+from src.tools.search_tools import arxiv_search, google_search, scrape_website
+from src.tracing import propagate_context
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Words in a 'source_type' that mean the sub-question should go to ArXiv
+ACADEMIC_HINTS = ("academic", "paper", "arxiv", "journal", "scholar", "research")
+
+
+def build_query(keywords: List[str]) -> str:
+    """Joins a sub-question's keywords into a single ' OR ' query string."""
+    return " OR ".join(k.strip() for k in keywords if k and k.strip())
+
+
+def choose_backend(source_type: str) -> str:
+    """Returns 'arxiv' for academic source types and 'google' for everything else."""
+    source_type = (source_type or "").lower()
+    return "arxiv" if any(hint in source_type for hint in ACADEMIC_HINTS) else "google"
+
+
+def parse_research_plan(output) -> ResearchPlan:
+    """
+    Validates the plan task's output into a 'ResearchPlan'.
+
+    Raises:
+        ValueError: If the output is not a valid research plan.
+    """
+    data = output_to_dict(output)
+    if data is None:
+        raise ValueError(f"Planner output is not a JSON object: {str(output)[:200]}")
+    return ResearchPlan.model_validate(data)
+
+
+def _search_google(query: str) -> Optional[SourceItem]:
+    results = google_search(query, num=3)
+    if not results:
+        return None
+    top = results[0]
+    snippet = top["snippet"]
+
+    # Try the full page first, fall back to the search snippet (e.g. on 403 Forbidden)
+    try:
+        text = scrape_website(top["link"])
+    except Exception as e:
+        log.warning(f"Search Stage: Error scraping '{top['link']}': {e}. Using snippet.")
+        text = ""
+    if not text or len(text) < len(snippet):
+        return SourceItem(source=top["link"], content=snippet, kind="snippet")
+    return SourceItem(source=top["link"], content=text, kind="page")
+
+
+def _search_arxiv(query: str) -> Optional[SourceItem]:
+    results = arxiv_search(query, max_results=3)
+    if not results:
+        return None
+    top = results[0]
+    # For papers, the abstract is the content
+    return SourceItem(source=top["url"], content=f"{top['title']}\n{top['summary']}", kind="abstract")
+
+
+def search_sub_question(sub_question: SubQuestion) -> Optional[SourceItem]:
+    """
+    Runs search + scrape for one sub-question, with no LLM involved.
+
+    1. Joins the keywords with ' OR '.
+    2. Dispatches to ArXiv or Google based on 'source_type'
+       (falling back to the other backend if the first finds nothing).
+    3. Turns the top hit into a 'SourceItem'.
+
+    Returns:
+        Optional[SourceItem]: The retrieved source, or None if nothing was found.
+    """
+    query = build_query(sub_question.keywords) or sub_question.sub_question
+    backend = choose_backend(sub_question.source_type)
+    order = [_search_arxiv, _search_google] if backend == "arxiv" else [_search_google, _search_arxiv]
+
+    for search in order:
+        try:
+            item = search(query)
+        except Exception as e:
+            log.error(f"Search Stage: {search.__name__} failed for '{query}': {e}")
+            continue
+        if item is not None:
+            return item
+
+    log.warning(f"Search Stage: No results for sub-question '{sub_question.sub_question}'")
+    return None
+
+
+def search_research_corpus(sub_questions: List[SubQuestion]) -> Dict[str, SourceItem]:
+    """
+    Looks the sub-questions up in the research corpus first (one batched
+    embedding call). A well-covered sub-question gets the stored source that
+    answers it, and is not searched on the web.
+
+    Returns:
+        Dict[str, SourceItem]: The stored source of each covered sub-question.
+    """
+    # Imported here: opening the corpus pulls in the embedding backends
+    from src.tools.research_corpus import get_research_corpus
+
+    corpus = get_research_corpus()
+    if corpus is None or not len(corpus):
+        return {}
+    try:
+        covered = corpus.covered_sources([sq.sub_question for sq in sub_questions])
+    except Exception as e:
+        log.warning(f"Search Stage: Research corpus lookup failed: {e}")
+        return {}
+    for question, (url, _) in covered.items():
+        log.info(f"Search Stage: '{question}' is covered by the research corpus ('{url}'); skipping web search.")
+    return {question: SourceItem(source=url, content=content, kind="corpus")
+            for question, (url, content) in covered.items()}
+
+
+def run_search_stage(plan: ResearchPlan, max_workers: int = SEARCH_MAX_WORKERS) -> ConsolidatedData:
+    """
+    Executes the whole search stage in code, all sub-questions concurrently.
+    Sub-questions the research corpus already covers are not searched.
+
+    Wall time is roughly that of the slowest sub-question rather than the
+    sum of all of them, and no LLM round trips are needed. Sources are
+    returned in plan order, so the output is deterministic.
+
+    Args:
+        plan (ResearchPlan): The validated plan from the planner.
+        max_workers (int): Size of the worker pool.
+
+    Returns:
+        ConsolidatedData: The original plan bundled with the retrieved sources.
+                          Sub-questions nothing was found for are listed in
+                          'no_results', so the report can state the gap.
+    """
+    start = time.perf_counter()
+    stored = search_research_corpus(plan.research_plan)
+    sub_questions = [sq for sq in plan.research_plan if sq.sub_question not in stored]
+    log.info(f"Search Stage: Searching {len(sub_questions)} sub-questions with {max_workers} workers "
+             f"({len(stored)} answered by the research corpus).")
+
+    def _timed_search(sub_question):
+        item_start = time.perf_counter()
+        item = search_sub_question(sub_question)
+        return item, time.perf_counter() - item_start
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="search") as pool:
+        results = list(pool.map(propagate_context(_timed_search), sub_questions))
+
+    # Back in plan order
+    found = dict(zip((sq.sub_question for sq in sub_questions), (item for item, _ in results)))
+    items = [stored.get(sq.sub_question) or found.get(sq.sub_question) for sq in plan.research_plan]
+    no_results = [sq.sub_question for sq, item in zip(plan.research_plan, items) if item is None]
+
+    sources = []
+    seen = set()
+    for item in items:
+        if item is not None and item.source not in seen:
+            seen.add(item.source)
+            sources.append(item)
+
+    elapsed = time.perf_counter() - start
+    log.info(f"Search Stage: Retrieved {len(sources)} sources in {elapsed:.2f}s "
+             f"({len(no_results)} sub-questions without results).")
+
+    stats = current_run_stats()
+    if stats is not None:
+        stats.record_step("search", len(sub_questions), elapsed, sum(t for _, t in results))
+        if stored:
+            stats.record_step("corpus", len(stored))
+        stats.record_step("scrape", len(sub_questions))
+        stats.record_step("bundle")
+    log.info(f"Search Stage: HTTP cache stats: {get_http_cache().stats()}")
+    log.info(f"Search Stage: ArXiv stats: {get_arxiv_service().stats()}")
+    return ConsolidatedData(plan=plan, sources=sources, no_results=no_results)
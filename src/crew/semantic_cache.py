@@ -0,0 +1,205 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.crew.tasks import ResearchPlan
+from src.settings import (
+    CACHE_DIR,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_PLAN_THRESHOLD,
+    SEMANTIC_CACHE_PLAN_TTL,
+    SEMANTIC_CACHE_REPORT_THRESHOLD,
+    SEMANTIC_CACHE_REPORT_TTL,
+)
+from src.tools.http_cache import normalize_query
+from src.tracing import record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Levels of the cache: table name -> (similarity threshold, freshness window)
+LEVELS = ("plans", "reports")
+
+
+class SemanticCache:
+    """
+    Reuses research plans and finished reports across near-identical topics
+    ('LLM reasoning advances' vs. 'latest advancements in LLM reasoning').
+
+    Topics are embedded with the RAG embedding backend. A lookup returns
+    the stored entry of the most similar topic if its cosine similarity
+    reaches the level's threshold and the entry is still within the
+    level's freshness window. Two levels:
+
+    - 'plans':   a hit lets the run skip the planning Task.
+    - 'reports': a hit returns the stored final report (no run at all).
+
+    The cache is best effort: if embedding a topic fails, lookups miss
+    and stores are skipped.
+    """
+
+    def __init__(self, path: str, embeddings, model_id: str,
+                 thresholds: Optional[dict] = None, ttls: Optional[dict] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.thresholds = thresholds or {"plans": SEMANTIC_CACHE_PLAN_THRESHOLD,
+                                         "reports": SEMANTIC_CACHE_REPORT_THRESHOLD}
+        self.ttls = ttls or {"plans": SEMANTIC_CACHE_PLAN_TTL, "reports": SEMANTIC_CACHE_REPORT_TTL}
+        self.hits = dict.fromkeys(LEVELS, 0)
+        self.misses = dict.fromkeys(LEVELS, 0)
+        # A run looks up and then stores the same topic: embed it only once
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for table in LEVELS:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " model TEXT NOT NULL,"
+                " topic TEXT NOT NULL,"
+                " embedding BLOB NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_model ON {table} (model, created_at)")
+        self._conn.commit()
+
+    def _embed(self, topic: str) -> Optional[np.ndarray]:
+        key = normalize_query(topic)
+        with self._lock:
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+                return self._vectors[key]
+        try:
+            vector = np.asarray(self.embeddings.embed_query(key), dtype=np.float32)
+        except Exception as e:
+            log.warning(f"Semantic Cache: Could not embed topic '{topic}': {e}")
+            return None
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            self._vectors[key] = vector
+            while len(self._vectors) > 64:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _nearest(self, level: str, topic: str) -> Optional[Tuple[str, str, float]]:
+        """Returns (topic, value, similarity) of the best fresh match above the threshold."""
+        vector = self._embed(topic)
+        if vector is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT topic, embedding, value FROM {level} WHERE model = ? AND created_at >= ?",
+                (self.model_id, time.time() - self.ttls[level]),
+            ).fetchall()
+        if not rows:
+            return None
+        matrix = np.stack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.thresholds[level]:
+            return None
+        return rows[best][0], rows[best][2], float(similarities[best])
+
+    def _lookup(self, level: str, topic: str) -> Optional[str]:
+        match = self._nearest(level, topic)
+        with self._lock:
+            if match is None:
+                self.misses[level] += 1
+            else:
+                self.hits[level] += 1
+        if match is None:
+            record(cache_misses=1)
+            return None
+        cached_topic, value, similarity = match
+        record(cache_hits=1)
+        log.info(f"Semantic Cache: '{topic}' matches cached {level[:-1]} for "
+                 f"'{cached_topic}' (similarity {similarity:.3f}).")
+        return value
+
+    def _store(self, level: str, topic: str, value: str) -> None:
+        vector = self._embed(topic)
+        if vector is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO {level} (model, topic, embedding, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                (self.model_id, topic, vector.tobytes(), value, time.time()),
+            )
+            # Entries past the freshness window can never be served again
+            self._conn.execute(f"DELETE FROM {level} WHERE created_at < ?", (time.time() - self.ttls[level],))
+            self._conn.commit()
+
+    # --- Plans ---
+    def lookup_plan(self, topic: str) -> Optional[ResearchPlan]:
+        value = self._lookup("plans", topic)
+        return ResearchPlan.model_validate_json(value) if value is not None else None
+
+    def store_plan(self, topic: str, plan: ResearchPlan) -> None:
+        self._store("plans", topic, plan.model_dump_json())
+
+    # --- Reports ---
+    def lookup_report(self, topic: str) -> Optional[str]:
+        return self._lookup("reports", topic)
+
+    def store_report(self, topic: str, report: str) -> None:
+        self._store("reports", topic, report)
+
+    # --- Stats ---
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for level in LEVELS:
+                (entries,) = self._conn.execute(f"SELECT COUNT(*) FROM {level}").fetchone()
+                lookups = self.hits[level] + self.misses[level]
+                result[level] = {
+                    "hits": self.hits[level],
+                    "misses": self.misses[level],
+                    "hit_rate": (self.hits[level] / lookups) if lookups else 0.0,
+                    "entries": entries,
+                    "threshold": self.thresholds[level],
+                }
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            for level in LEVELS:
+                self._conn.execute(f"DELETE FROM {level}")
+            self._conn.commit()
+            self.hits = dict.fromkeys(LEVELS, 0)
+            self.misses = dict.fromkeys(LEVELS, 0)
+
+
+# --- Shared Cache Instance ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Returns the process-wide semantic cache (created on first use), or
+    None if SEMANTIC_CACHE_ENABLED is off or no embedding backend is usable.
+    """
+    global _cache
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            # Imported here: the RAG tools pull in the embedding backends
+            from src.tools.rag_tools import get_embedding_model_id, get_embeddings
+            try:
+                _cache = SemanticCache(os.path.join(CACHE_DIR, "semantic.sqlite3"),
+                                       get_embeddings(), get_embedding_model_id())
+            except Exception as e:
+                log.warning(f"Semantic Cache: Disabled, no usable embedding backend: {e}")
+                return None
+        return _cache
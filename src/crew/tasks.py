@@ -6,7 +6,7 @@
 # from src.agents.critic_agent import critic_agent
 
 # from pydantic import BaseModel, Field
-# from typing import List, Dict
+# from typing import List
 
 # # --- Pydantic Schema for the Plan ---
 # class SubQuestion(BaseModel):
@@ -198,15 +198,8 @@
 #     context=[draft_task, critique_task],
 #     max_retries=2  # <-- ADDED FOR RESILIENCE
 # )
-from crewai import Task
-from src.agents.planner_agent import planner_agent
-from src.agents.search_agent import search_agent
-from src.agents.summarizer_agent import summarizer_agent
-from src.agents.writer_agent import writer_agent
-# from src.agents.critic_agent import critic_agent (REMOVED to reduce API calls)
-
 from pydantic import BaseModel, Field
-from typing import List, Dict
+from typing import List
 
 # --- Pydantic Schema for the Plan ---
 class SubQuestion(BaseModel):
@@ -222,151 +215,237 @@ class SourceItem(BaseModel):
     """A single item of retrieved content, with its source."""
     source: str = Field(..., description="The URL or ArXiv ID of the content.")
     content: str = Field(..., description="The scraped text or summary from that source.")
+    # Only page text carries page chrome (menus, cookie notices) to strip. Sources
+    # bundled by the agent don't say, and are left as they are.
+    kind: str = Field("snippet", description="What the content is: 'page' (scraped text), 'snippet' "
+                                             "(search result snippet), 'abstract' (paper) or 'corpus'.")
 
 # --- Consolidated Data Schema ---
 class ConsolidatedData(BaseModel):
     """A model to bundle the plan and search results together for the next step."""
     plan: ResearchPlan = Field(..., description="The original research plan.")
     sources: List[SourceItem] = Field(..., description="The list of retrieved sources and their content.")
+    no_results: List[str] = Field(default_factory=list,
+                                  description="The sub-questions the search found no sources for.")
 
 
 # --- Task Definitions ---
-
-# Task 1: Planning
-plan_task = Task(
-    description=(
-        "1. Break down the user's main research topic: '{topic}' into a list of 3-4 specific, "
-        "targetable sub-questions. "
-        "2. For each sub-question, identify the best type of source to search (e.g., 'academic papers' for technical details, "
-        "'recent news' for current events, 'blogs' for opinions). "
-        "3. Create a list of 1-2 precise search keywords for each sub-question. "
-        "4. Compile this into a valid JSON object. You must output *only* this JSON object."
-    ),
-    expected_output=(
-        "A valid JSON object structured according to the 'ResearchPlan' schema. "
-        "This JSON is your *only* output. No preamble or conversational text."
-    ),
-    agent=planner_agent,
-    output_json=ResearchPlan,
-    max_retries=2 # Add retry for API flakiness
-)
-
-# Task 2: Searching & Scraping (--- THIS TASK IS UPDATED ---)
-search_task = Task(
-    description=(
-        "You will receive a 'ResearchPlan' object. You must store this plan. "
-        "Then, for each sub-question in the 'plan.research_plan' list: "
-        
-        "1. **Formulate the query:** Take the `keywords` list. Join them with ' OR ' "
-        "   to create a single query string. "
-        
-        "2. **Search:** Use the `google_search_tool` or `arxiv_search_tool` (based on `source_type`). "
-        
-        "3. **Process Results:** From the search results, identify the single most relevant "
-        "   result. You will get its URL, and if it's from Google, a 'Snippet'. "
-        
-        "4. **Scrape:** Use the `scrape_website_tool`. "
-        "   - If it's an ArXiv paper, use the paper's summary as the 'content' and its URL as the 'source'. "
-        "   - If it's a Google result, you MUST call the tool with *both* arguments: "
-        "     `scrape_website_tool(url=THE_URL, snippet=THE_SNIPPET)`. "
-        "     The tool will try to scrape the URL, but if it fails (e.g., 403 Forbidden), "
-        "     it will automatically return the snippet as the content. "
-        
-        "5. **Format:** Create a `SourceItem` object. Put the URL in the 'source' field "
-        "   and the resulting text (either the full scrape or the snippet) in the 'content' field. "
-        
-        "6. Collect all these `SourceItem` objects into a list. "
-        
-        "7. **Bundle:** Finally, create a 'ConsolidatedData' object. Put the *original 'ResearchPlan' object* "
-        "   you received into the 'plan' field, and put your new list of 'SourceItem' objects "
-        "   into the 'sources' field."
-    ),
-    expected_output=(
-        "A valid JSON object structured according to the 'ConsolidatedData' schema. "
-        "This object contains *both* the original plan and the new search results."
-    ),
-    agent=search_agent,
-    context=[plan_task],
-    output_json=ConsolidatedData,
-    max_retries=2 # Add retry for API flakiness
-)
-
-# Task 3: Summarization
-summarize_task = Task(
-    description=(
-        "You will receive **one** 'ConsolidatedData' object. "
-        "This object contains two attributes: 'plan' (the ResearchPlan) and 'sources' (the list of SourceItems). "
-        "Your job is to generate a summary for *each* sub-question in the 'plan.research_plan' list. "
-        
-        "**You must follow this process exactly:**"
-        "1. Access the research plan from the 'plan' attribute. "
-        "2. Access the list of sources from the 'sources' attribute. This is your 'context_list'. "
-        "3. For the *first* sub-question in the 'plan.research_plan' list: "
-        "4. Call the `rag_query_tool` using that sub-question as the `question` "
-        "   and the `context_list` (from the 'sources' attribute). "
-        "5. The tool will return relevant snippets, *with their sources*. "
-        "6. Read these snippets (or the 'No valid content' message) and write a concise "
-        "   summary that answers the sub-question, making sure to include any "
-        "   `[Source: ...]` tags you find. "
-        "7. Repeat this process for *all* sub-questions in the 'plan.research_plan' list. "
-        "8. Compile all the individual summaries (with their sources) into a "
-        "   single, well-structured Markdown document, organized by the sub-questions."
-    ),
-    expected_output=(
-        "A structured summary of the key findings, organized by research sub-question. "
-        "This summary *must* be based on the snippets retrieved by the "
-        "`rag_query_tool` and *must* include the `[Source: ...]` tags "
-        "provided by the tool."
-    ),
-    agent=summarizer_agent,
-    context=[search_task],
-    max_retries=2 # Add retry for API flakiness
-)
-
-
-# Task 4: Drafting (Combined Final Task)
-draft_task = Task(
-    description=(
-        "You will receive a structured summary of findings (which includes `[Source: ...]` tags). "
-        "Your job is to synthesize this information into a **final, polished, professional research report.** "
-        "The report must be in Markdown format. "
-        
-        "**Before writing, you must self-critique:** "
-        "1. 'Does this summary fully answer the user's original topic?' "
-        "2. 'Is the logical flow clear?' "
-        "3. 'Are all claims supported by a source tag?' "
-        
-        "**Then, write the report including:** "
-        "1. An Abstract (a brief overview of the topic and key findings). "
-        "2. An Introduction (based on the original topic). "
-        "3. Key Findings (based on the summarized text, organized by theme or sub-question). "
-        "4. Challenges / Future Scope (if mentioned in the findings). "
-        "5. A **References** section. You must parse all the `[Source: ...]` tags "
-        "   from the summary. For each unique source, create a numbered list item "
-        "   that contains **only the raw, full URL**. "
-        "   **Example:** "
-        "   ### References"
-        "   1. https://arxiv.org/abs/2105.09492"
-        "   2. https://www.forbes.com/article/..."
-        "   **Do NOT add titles, authors, or any other bibliographic information. Just the links.**"
-
-        "**IMPORTANT: Do NOT add a date, author name, or any other metadata. "
-        "The report should start directly with the main title (e.Sg., '# Report Title...').**"
-    ),
-    expected_output=(
-        "The final, polished research report in Markdown format. "
-        "This single, comprehensive document should be ready for publication and "
-        "include all sections, including a 'References' section with raw URLs."
-    ),
-    agent=writer_agent,
-    context=[summarize_task],
-    max_retries=2 # Add retry for API flakiness
-)
-
-
-
-# Task 5: Critiquing  <-- REMOVED
-# Task 6: Final Revision <-- REMOVED
-
-
-
+# The Tasks are built per run: crewAI keeps a run's state on them (interpolated
+# prompts, outputs), so concurrent runs must not share Task objects.
+def create_tasks(planner_agent, search_agent, summarizer_agent, writer_agent) -> dict:
+    """
+    Builds a fresh set of the pipeline's Tasks for the given agents.
+
+    Returns:
+        dict: The Tasks by name ('plan_task', 'search_task', ...).
+    """
+    # Imported here: crewai and the retrieval stack (FAISS) are slow to import
+    from crewai import Task
+    from src.tools.retrieval import register_search_output
+
+    # Task 1: Planning
+    plan_task = Task(
+        description=(
+            "1. Break down the user's main research topic: '{topic}' into a list of 3-4 specific, "
+            "targetable sub-questions. "
+            "2. For each sub-question, identify the best type of source to search (e.g., 'academic papers' for technical details, "
+            "'recent news' for current events, 'blogs' for opinions). "
+            "3. Create a list of 1-2 precise search keywords for each sub-question. "
+            "4. Compile this into a valid JSON object. You must output *only* this JSON object."
+        ),
+        expected_output=(
+            "A valid JSON object structured according to the 'ResearchPlan' schema. "
+            "This JSON is your *only* output. No preamble or conversational text."
+        ),
+        agent=planner_agent,
+        output_json=ResearchPlan,
+        max_retries=2 # Add retry for API flakiness
+    )
+
+    # Task 2: Searching & Scraping (--- THIS TASK IS UPDATED ---)
+    search_task = Task(
+        description=(
+            "You will receive a 'ResearchPlan' object. You must store this plan. "
+            "Then, for each sub-question in the 'plan.research_plan' list: "
+
+            "1. **Formulate the query:** Take the `keywords` list. Join them with ' OR ' "
+            "   to create a single query string. "
+
+            "2. **Search:** Use the `google_search_tool` or `arxiv_search_tool` (based on `source_type`). "
+
+            "3. **Process Results:** From the search results, identify the single most relevant "
+            "   result. You will get its URL, and if it's from Google, a 'Snippet'. "
+
+            "4. **Scrape:** Use the `scrape_website_tool`. "
+            "   - If it's an ArXiv paper, use the paper's summary as the 'content' and its URL as the 'source'. "
+            "   - If it's a Google result, call the tool with its URL: "
+            "     `scrape_website_tool(url=THE_URL)`. "
+            "     The tool will try to scrape the URL, but if it fails (e.g., 403 Forbidden), "
+            "     it will automatically return that result's search snippet as the content. "
+
+            "5. **Format:** Create a `SourceItem` object. Put the URL in the 'source' field "
+            "   and the resulting text (either the full scrape or the snippet) in the 'content' field. "
+
+            "6. Collect all these `SourceItem` objects into a list. "
+
+            "7. **Bundle:** Finally, create a 'ConsolidatedData' object. Put the *original 'ResearchPlan' object* "
+            "   you received into the 'plan' field, and put your new list of 'SourceItem' objects "
+            "   into the 'sources' field."
+        ),
+        expected_output=(
+            "A valid JSON object structured according to the 'ConsolidatedData' schema. "
+            "This object contains *both* the original plan and the new search results."
+        ),
+        agent=search_agent,
+        context=[plan_task],
+        output_json=ConsolidatedData,
+        # Build the run's FAISS index once and answer every sub-question up front,
+        # then hand the summarizer a corpus id instead of the scraped text
+        callback=register_search_output,
+        max_retries=2 # Add retry for API flakiness
+    )
+
+    # Task 3: Summarization
+    summarize_task = Task(
+        description=(
+            "You will receive **one** JSON object with the search results. "
+            "It has three attributes: 'plan' (the ResearchPlan), 'corpus_id' (the id of the retrieved sources, "
+            "whose text is stored server-side) and 'sources' (the list of source URLs). "
+            "Your job is to generate a summary for *each* sub-question in the 'plan.research_plan' list. "
+
+            "**You must follow this process exactly:**"
+            "1. Access the research plan from the 'plan' attribute. "
+            "2. Take the short id from the 'corpus_id' attribute (e.g. 'corpus-3f9a0c1b2d4e'). "
+            "3. Call the `rag_batch_query_tool` **once**, passing *all* sub-questions from the "
+            "   'plan.research_plan' list as `questions` and that `corpus_id`. "
+            "   The sources are indexed a single time and every sub-question is answered in the same call. "
+            "   (Only fall back to `rag_query_tool` for a single sub-question if the batch call fails.) "
+            "4. The tool will return relevant snippets for each sub-question, *with their sources*. "
+            "5. For each sub-question, read its snippets (or the 'No relevant information' message) and write a concise "
+            "   summary that answers the sub-question, making sure to include any "
+            "   `[Source: ...]` tags you find. "
+            "6. Compile all the individual summaries (with their sources) into a "
+            "   single, well-structured Markdown document, organized by the sub-questions."
+        ),
+        expected_output=(
+            "A structured summary of the key findings, organized by research sub-question. "
+            "This summary *must* be based on the snippets retrieved by the "
+            "`rag_batch_query_tool` and *must* include the `[Source: ...]` tags "
+            "provided by the tool."
+        ),
+        agent=summarizer_agent,
+        context=[search_task],
+        max_retries=2 # Add retry for API flakiness
+    )
+
+
+    # Task 4: Drafting (Combined Final Task)
+    draft_task = Task(
+        description=(
+            "You will receive a structured summary of findings (which includes `[Source: ...]` tags). "
+            "Your job is to synthesize this information into a **final, polished, professional research report.** "
+            "The report must be in Markdown format. "
+
+            "**Before writing, you must self-critique:** "
+            "1. 'Does this summary fully answer the user's original topic?' "
+            "2. 'Is the logical flow clear?' "
+            "3. 'Are all claims supported by a source tag?' "
+
+            "**Then, write the report including:** "
+            "1. An Abstract (a brief overview of the topic and key findings). "
+            "2. An Introduction (based on the original topic). "
+            "3. Key Findings (based on the summarized text, organized by theme or sub-question). "
+            "4. Challenges / Future Scope (if mentioned in the findings). "
+            "5. A **References** section. You must parse all the `[Source: ...]` tags "
+            "   from the summary. For each unique source, create a numbered list item "
+            "   that contains **only the raw, full URL**. "
+            "   **Example:** "
+            "   ### References"
+            "   1. https://arxiv.org/abs/2105.09492"
+            "   2. https://www.forbes.com/article/..."
+            "   **Do NOT add titles, authors, or any other bibliographic information. Just the links.**"
+
+            "**IMPORTANT: Do NOT add a date, author name, or any other metadata. "
+            "The report should start directly with the main title (e.Sg., '# Report Title...').**"
+        ),
+        expected_output=(
+            "The final, polished research report in Markdown format. "
+            "This single, comprehensive document should be ready for publication and "
+            "include all sections, including a 'References' section with raw URLs."
+        ),
+        agent=writer_agent,
+        context=[summarize_task],
+        max_retries=2 # Add retry for API flakiness
+    )
+
+
+    # --- Hybrid Run Mode Tasks ---
+    # Used when the mechanical steps run in code (see src/crew/main_crew.py).
+    # Search, RAG retrieval and the References list are handled in Python, so
+    # the LLM only summarizes the snippets it is given and writes the report.
+    # The inputs arrive through '{snippets}' instead of a 'context', so neither
+    # task depends on 'search_task'.
+    summarize_snippets_task = Task(
+        description=(
+            "The research topic is: '{topic}'. "
+            "Below are the most relevant snippets for *each* sub-question of the research plan, "
+            "already retrieved for you (you do NOT need to call any tool). "
+            "Each snippet ends with its `[Source: ...]` tag. "
+            "For each sub-question, write a concise summary that answers it based *only* on its snippets, "
+            "keeping the `[Source: ...]` tag after every claim. "
+            "If a sub-question has no relevant information, say so briefly. "
+            "Compile all the summaries into a single, well-structured Markdown document, "
+            "organized by the sub-questions.\n\n"
+            "{snippets}"
+        ),
+        expected_output=(
+            "A structured summary of the key findings, organized by research sub-question. "
+            "This summary *must* be based on the provided snippets and *must* include "
+            "their `[Source: ...]` tags."
+        ),
+        agent=summarizer_agent,
+        max_retries=2 # Add retry for API flakiness
+    )
+
+    write_report_task = Task(
+        description=(
+            "You will receive a structured summary of findings (which includes `[Source: ...]` tags) "
+            "on the topic: '{topic}'. "
+            "Your job is to synthesize this information into a **final, polished, professional research report.** "
+            "The report must be in Markdown format. "
+
+            "**Before writing, you must self-critique:** "
+            "1. 'Does this summary fully answer the user's original topic?' "
+            "2. 'Is the logical flow clear?' "
+            "3. 'Are all claims supported by a source tag?' "
+
+            "**Then, write the report including:** "
+            "1. An Abstract (a brief overview of the topic and key findings). "
+            "2. An Introduction (based on the original topic). "
+            "3. Key Findings (based on the summarized text, organized by theme or sub-question). "
+            "4. Challenges / Future Scope (if mentioned in the findings). "
+            "Keep the `[Source: ...]` tags next to the claims they support. "
+            "**Do NOT write a References section; it is generated automatically from the source tags.** "
+
+            "**IMPORTANT: Do NOT add a date, author name, or any other metadata. "
+            "The report should start directly with the main title (e.g., '# Report Title...').**"
+        ),
+        expected_output=(
+            "The final, polished research report in Markdown format, "
+            "with `[Source: ...]` tags and without a References section."
+        ),
+        agent=writer_agent,
+        max_retries=2 # Add retry for API flakiness
+    )
+
+    # Task 5: Critiquing  <-- REMOVED
+    # Task 6: Final Revision <-- REMOVED
+
+    return {
+        "plan_task": plan_task,
+        "search_task": search_task,
+        "summarize_task": summarize_task,
+        "draft_task": draft_task,
+        "summarize_snippets_task": summarize_snippets_task,
+        "write_report_task": write_report_task,
+    }
@@ -0,0 +1,243 @@
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from src.crew.run_stats import current_run_stats
+from src.crew.tasks import ConsolidatedData, SourceItem
+from src.settings import TOKEN_BUDGETS, TOKEN_ENCODING
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Characters per token of the estimate used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+# Sub-questions of a typical plan (the planner is asked for 3-4); a single
+# RAG lookup gets this share of the summarize budget
+SUB_QUESTIONS_PER_PLAN = 4
+
+# Lines of page chrome that carry no content (cookie banners, share buttons, ...)
+_BOILERPLATE_RE = re.compile(
+    r"\b(cookies?|subscribe|newsletter|sign (up|in)|log ?in|all rights reserved|privacy policy|"
+    r"terms of (use|service)|share (this|on)|follow us|advertisement|skip to (main )?content|"
+    r"related (posts|articles|stories)|read more|click here|accept all|copyright)\b",
+    re.IGNORECASE,
+)
+# A boilerplate line is only dropped if it is this short (a real paragraph may mention cookies)
+MAX_BOILERPLATE_CHARS = 160
+# Lines with fewer words than this are menu items or captions, unless they end a sentence or head a paragraph
+MIN_LINE_WORDS = 4
+_SENTENCE_END = (".", "?", "!", ":")
+_SOURCE_TAG_RE = re.compile(r"\s*\[Source: [^\]]*\]\s*$")
+
+
+# --- Token Counting ---
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """The tiktoken encoding (TOKEN_ENCODING), or None to estimate instead."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if TOKEN_ENCODING:
+                try:
+                    # Imported here: only needed once a stage is budgeted
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+                except Exception as e:
+                    # tiktoken downloads its vocabulary on first use, which fails offline
+                    log.warning(f"Token Budget: Can't load the '{TOKEN_ENCODING}' tokenizer ({e}); "
+                                f"estimating {CHARS_PER_TOKEN} characters per token.")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the tokens of a text with the local tokenizer. It is not Gemini's
+    own tokenizer, but close enough to keep a stage within its budget.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts a text to at most 'max_tokens' tokens, at the end of a sentence or line if there is one nearby."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    # Prefer a clean break, unless it would throw away more than a third of the budget
+    end = max(cut.rfind(". "), cut.rfind("\n"))
+    if end >= len(cut) * 2 // 3:
+        cut = cut[:end + 1]
+    return cut.rstrip()
+
+
+# --- Compaction ---
+def compact_text(text: str, page: bool = False) -> str:
+    """
+    Removes what a reader (or an LLM) would skip: whitespace runs and
+    repeated lines. Scraped page text ('page') also loses its page chrome
+    (cookie notices, share buttons, 'Read more' links) and menu-like
+    fragments of a few words, but never a sentence (a line ending with
+    . ? ! or :) or a title (a line followed by a paragraph). Search
+    snippets and arXiv abstracts are not page text: short lines there
+    are titles or hard-wrapped text.
+    """
+    lines = [line for line in (" ".join(line.split()) for line in text.splitlines()) if line]
+    kept = []
+    seen = set()
+    for n, line in enumerate(lines):
+        key = line.lower()
+        if key in seen:
+            continue
+        if page and not _is_sentence_or_title(line, lines[n + 1] if n + 1 < len(lines) else ""):
+            if len(line) <= MAX_BOILERPLATE_CHARS and _BOILERPLATE_RE.search(line):
+                continue
+            if len(line.split()) < MIN_LINE_WORDS:
+                continue
+        seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def _is_sentence_or_title(line: str, next_line: str) -> bool:
+    return line.endswith(_SENTENCE_END) or len(next_line.split()) >= 2 * MIN_LINE_WORDS
+
+
+# --- Allocation ---
+def allocate(budget: int, sizes: Sequence[int], weights: Sequence[float]) -> List[int]:
+    """
+    Shares a token budget between items in proportion to their weights
+    (relevance). No item gets more than it needs ('sizes'); what a small
+    item leaves unused goes to the others, again by weight.
+
+    Returns:
+        List[int]: The tokens allotted to each item.
+    """
+    shares = [0] * len(sizes)
+    open_items = [i for i, size in enumerate(sizes) if size > 0]
+    remaining = budget
+    while open_items and remaining > 0:
+        weight = {i: max(weights[i], 0.0) for i in open_items}
+        total = sum(weight.values())
+        if total <= 0:
+            weight, total = dict.fromkeys(open_items, 1.0), float(len(open_items))
+        offers = {i: remaining * weight[i] / total for i in open_items}
+        fits = [i for i in open_items if sizes[i] <= offers[i]]
+        if not fits:
+            # Nobody can be fully served: split what is left by weight
+            for i in open_items:
+                shares[i] = int(offers[i])
+            break
+        for i in fits:
+            shares[i] = sizes[i]
+            remaining -= sizes[i]
+        open_items = [i for i in open_items if i not in fits]
+    return shares
+
+
+def source_relevance(data: ConsolidatedData) -> List[float]:
+    """
+    How relevant each source is to the plan: the BM25 score of its text for
+    all sub-questions and keywords together. Every source keeps a floor of
+    a tenth of the mean score, so none is dropped entirely.
+    """
+    # Imported here: BM25 needs numpy, which the callers usually have loaded already
+    from src.tools.bm25 import BM25Index
+
+    if not data.sources:
+        return []
+    query = " ".join(f"{sq.sub_question} {' '.join(sq.keywords)}" for sq in data.plan.research_plan)
+    scores = BM25Index([item.content for item in data.sources]).scores(query)
+    floor = max(float(scores.mean()) * 0.1, 1e-6)
+    return [max(float(score), floor) for score in scores]
+
+
+# --- Stage Budgets ---
+def record_usage(stage: str, used: int, budget: int, before: Optional[int] = None) -> None:
+    """Logs a stage's token usage against its budget and adds it to the run's stats."""
+    trimmed = f" (from {before:,} before compaction)" if before is not None and before != used else ""
+    message = f"Token Budget: '{stage}' uses {used:,} of {budget:,} tokens{trimmed}."
+    if used > budget:
+        log.warning(message)
+    else:
+        log.info(message)
+    stats = current_run_stats()
+    if stats is not None:
+        stats.record_tokens(stage, used, budget, before)
+
+
+def budget_sources(data: ConsolidatedData, budget: int = TOKEN_BUDGETS["sources"]) -> ConsolidatedData:
+    """
+    Compacts the sources (page chrome is only stripped from sources of kind
+    'page') and fits them into the 'sources' budget, shared by relevance
+    (see 'source_relevance'). Used before the sources are indexed or handed
+    to an agent.
+    """
+    before = sum(count_tokens(item.content) for item in data.sources)
+    contents = [compact_text(item.content, page=item.kind == "page") or item.content for item in data.sources]
+    sizes = [count_tokens(content) for content in contents]
+    shares = allocate(budget, sizes, source_relevance(data))
+    sources = [
+        SourceItem(source=item.source, content=truncate_to_tokens(content, share) if share < size else content,
+                   kind=item.kind)
+        for item, content, size, share in zip(data.sources, contents, sizes, shares)
+    ]
+    record_usage("sources", sum(count_tokens(item.content) for item in sources), budget, before)
+    return ConsolidatedData(plan=data.plan, sources=sources, no_results=data.no_results)
+
+
+def budget_snippets(answers: Dict[str, str], budget: int = TOKEN_BUDGETS["summarize"]) -> Dict[str, str]:
+    """
+    Fits the retrieved snippets of every sub-question into the 'summarize'
+    budget. Each snippet keeps its [Source: ...] tag; snippets are weighted
+    by their retrieval rank (1, 1/2, 1/3, ...), so the best matches of each
+    sub-question are cut last.
+
+    Args:
+        answers (Dict[str, str]): Formatted snippets by question (see 'format_snippets').
+
+    Returns:
+        Dict[str, str]: The same questions, with compacted and trimmed snippets.
+    """
+    items = []
+    for question, text in answers.items():
+        for rank, snippet in enumerate(s for s in (text or "").split("\n---\n") if s.strip()):
+            match = _SOURCE_TAG_RE.search(snippet)
+            tag = match.group(0).strip() if match else ""
+            body = compact_text(snippet[:match.start()] if match else snippet)
+            items.append((question, rank, body, tag))
+
+    before = sum(count_tokens(text or "") for text in answers.values())
+    # Each snippet's tag is kept whole, so it is paid for up front
+    tag_tokens = [count_tokens(f" {tag}") if tag else 0 for _, _, _, tag in items]
+    sizes = [count_tokens(body) for _, _, body, _ in items]
+    shares = allocate(max(0, budget - sum(tag_tokens)), sizes, [1.0 / (rank + 1) for _, rank, _, _ in items])
+
+    fitted: Dict[str, List[str]] = {question: [] for question in answers}
+    for (question, _, body, tag), size, share in zip(items, sizes, shares):
+        body = truncate_to_tokens(body, share) if share < size else body
+        if body:
+            fitted[question].append(f"{body} {tag}".strip())
+    result = {question: "\n---\n".join(snippets) for question, snippets in fitted.items()}
+    record_usage("summarize", sum(count_tokens(text) for text in result.values()), budget, before)
+    return result
+
+
+def record_draft_input(output) -> None:
+    """Callback of the summarize Tasks: logs the summary the writer reads against the 'draft' budget."""
+    text = str(getattr(output, "raw_output", output) or "")
+    record_usage("draft", count_tokens(text), TOKEN_BUDGETS["draft"])
@@ -0,0 +1,257 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from src.settings import JOBS_KEEP_FINISHED, JOBS_MAX_CONCURRENT, JOBS_MAX_QUEUED, RUN_MODE
+
+if TYPE_CHECKING:
+    # Only for the type hints
+    from src.tracing import Span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# 'queued' -> 'running' -> 'done' | 'failed', or 'queued' -> 'cancelled' (on shutdown)
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class QueueFull(RuntimeError):
+    """Raised by 'JobQueue.submit' when JOBS_MAX_QUEUED jobs are already waiting."""
+
+
+class Job:
+    """
+    One research run submitted to the job queue.
+
+    Its progress comes from the run's trace: every stage or Task directly
+    under the run ('semantic_cache', 'plan', 'search', 'rag_lookup',
+    'summarize', 'draft', 'references') is listed in 'stages' as it starts
+    and ends, and 'stage' is the one currently running. The stage outputs
+    ('plan', 'sources', 'summaries', 'draft', as Markdown) are collected
+    in 'outputs' as they complete.
+    """
+
+    def __init__(self, topic: str, run_mode: str = RUN_MODE, use_cache: bool = True):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.run_mode = run_mode
+        self.use_cache = use_cache
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        # stage name -> {"status": 'running' | 'done' | 'failed', "seconds": ...}
+        self.stages: Dict[str, dict] = OrderedDict()
+        self.outputs: Dict[str, str] = OrderedDict()
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.report: Optional[str] = None
+        self.error: Optional[str] = None
+        self._root_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def on_span(self, event: str, span: "Span") -> None:
+        """Tracer listener (see 'run_crew'): turns top-level spans into stage progress."""
+        with self._lock:
+            if span.kind == "run":
+                self._root_id = span.span_id
+                return
+            if span.parent_id != self._root_id or span.parent_id is None:
+                return
+            if event == "start":
+                self.stage = span.name
+                self.stages[span.name] = {"status": "running", "seconds": None}
+            else:
+                self.stages[span.name] = {"status": "failed" if span.error else "done",
+                                          "seconds": round(span.wall_seconds, 3)}
+                if self.stage == span.name:
+                    self.stage = None
+
+    def on_output(self, name: str, text: str) -> None:
+        """Output callback (see 'run_crew'): keeps a stage output."""
+        with self._lock:
+            self.outputs[name] = text
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def to_dict(self, include_outputs: bool = False, include_report: bool = False) -> dict:
+        with self._lock:
+            result = {
+                "job_id": self.job_id,
+                "topic": self.topic,
+                "run_mode": self.run_mode,
+                "status": self.status,
+                "stage": self.stage,
+                "stages": [{"name": name, **info} for name, info in self.stages.items()],
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+                "error": self.error,
+            }
+            if include_outputs:
+                result["outputs"] = dict(self.outputs)
+        if include_report:
+            result["report"] = self.report
+        return result
+
+
+def _run_crew(job: Job) -> str:
+    # Imported here: importing the crew builds the agents (and needs the API keys)
+    from src.crew.main_crew import run_crew
+
+    return str(run_crew(job.topic, run_mode=job.run_mode, use_cache=job.use_cache,
+                        listener=job.on_span, on_output=job.on_output))
+
+
+class JobQueue:
+    """
+    Runs research jobs in the background on a bounded pool of worker
+    threads, so callers (HTTP handlers, UIs) never wait for a crew.
+
+    - At most 'max_workers' jobs run at once.
+    - At most 'max_queued' jobs wait for a worker; beyond that 'submit'
+      raises 'QueueFull' (backpressure) instead of queueing without bound.
+    - Finished jobs are kept (with their reports) up to 'keep_finished'.
+
+    'runner' runs one job and returns its report (default: 'run_crew').
+    Tests can pass a fake one; it gets the 'Job' and may call
+    'job.on_span' / 'job.on_output' to report progress.
+    """
+
+    def __init__(self, runner: Optional[Callable[[Job], str]] = None, max_workers: int = JOBS_MAX_CONCURRENT,
+                 max_queued: int = JOBS_MAX_QUEUED, keep_finished: int = JOBS_KEEP_FINISHED):
+        self.runner = runner or _run_crew
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        # Durations of recent jobs, to suggest when to retry after 'QueueFull'
+        self._recent_seconds = []
+
+    def start(self) -> "JobQueue":
+        with self._lock:
+            if not self._workers:
+                self._workers = [
+                    threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                    for i in range(self.max_workers)
+                ]
+                for worker in self._workers:
+                    worker.start()
+        return self
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers once the running jobs finish. Jobs still waiting
+        in the queue are never run: they are marked 'cancelled'.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        self._cancel_queued()
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _cancel_queued(self) -> None:
+        cancelled = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                continue
+            with job._lock:
+                job.status = "cancelled"
+                job.error = "Cancelled: the job queue shut down before the job ran."
+                job.finished = time.time()
+            cancelled += 1
+        if cancelled:
+            log.info(f"Job Queue: Cancelled {cancelled} queued jobs.")
+
+    def submit(self, topic: str, run_mode: str = RUN_MODE, use_cache: bool = True) -> Job:
+        """
+        Queues a research job.
+
+        Raises:
+            QueueFull: If 'max_queued' jobs are already waiting.
+        """
+        self.start()
+        job = Job(topic, run_mode, use_cache)
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.status == "queued")
+            if queued >= self.max_queued:
+                raise QueueFull(f"Job Queue: {queued} jobs are already waiting (max {self.max_queued}).")
+            self._jobs[job.job_id] = job
+        self._queue.put(job)
+        log.info(f"Job Queue: Queued job {job.job_id} for '{topic}' ({queued + 1} waiting).")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up (for HTTP 'Retry-After')."""
+        with self._lock:
+            recent = list(self._recent_seconds)
+        mean = sum(recent) / len(recent) if recent else 30.0
+        return max(1, int(mean / self.max_workers))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATES, 0)
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {**counts, "max_workers": self.max_workers, "max_queued": self.max_queued}
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        with job._lock:
+            job.status = "running"
+            job.started = time.time()
+        log.info(f"Job Queue: Running job {job.job_id} for '{job.topic}'.")
+        try:
+            # A fresh context per job, so its run stats and trace don't leak into the next one
+            report = contextvars.copy_context().run(self.runner, job)
+            with job._lock:
+                job.report = report
+                job.status = "done"
+        except Exception as e:
+            log.error(f"Job Queue: Job {job.job_id} for '{job.topic}' failed: {e}")
+            with job._lock:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+        with job._lock:
+            job.finished = time.time()
+            job.stage = None
+        with self._lock:
+            self._recent_seconds = (self._recent_seconds + [job.seconds])[-20:]
+            self._prune()
+
+    def _prune(self) -> None:
+        # Caller must hold the lock
+        finished = [j for j in self._jobs.values() if j.status in FINISHED_STATES]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.job_id]
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+
+from src.settings import CACHE_DIR, LLM_CACHE_MAX_BYTES, LLM_CACHE_MODE, LLM_CACHE_TTL
+from src.tracing import record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# 'on':     serve hits, call the LLM (and store the answer) on a miss
+# 'record': always call the LLM and overwrite the stored answer
+# 'replay': serve hits, raise 'LLMCacheMiss' on a miss (no LLM calls at all)
+# 'off':    no caching
+LLM_CACHE_MODES = ("on", "record", "replay", "off")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in 'replay' mode when a prompt has no recorded completion."""
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hashes a LangChain cache lookup into one key. 'llm_string' holds the
+    model, its parameters (temperature, ...), stop words and bound tools;
+    'prompt' is the serialized list of messages.
+    """
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LLMCache(BaseCache):
+    """
+    A persistent LLM completion cache, plugged into LangChain with
+    'set_llm_cache' so every chat model in the process shares it.
+
+    - Completions are keyed by (model + parameters, messages) and stored
+      zlib-compressed in SQLite.
+    - Entries older than 'ttl' seconds are treated as misses.
+    - Once the compressed entries exceed 'max_bytes', the least-recently-used
+      ones are evicted.
+    """
+
+    def __init__(self, path: str, mode: str = LLM_CACHE_MODE, ttl: int = LLM_CACHE_TTL,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'. Expected one of {LLM_CACHE_MODES}.")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " stored_size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used)"
+        )
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.mode == "record":
+            return None
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (self.ttl <= 0 or now - row[1] <= self.ttl):
+                self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+            else:
+                row = None
+                self.misses += 1
+
+        if row is None:
+            record(cache_misses=1)
+            if self.mode == "replay":
+                raise LLMCacheMiss(f"LLM Cache: No recorded completion for prompt {key[:12]} (replay mode).")
+            return None
+        record(cache_hits=1)
+        return loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        compressed = zlib.compress(dumps(return_val).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, stored_size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key(prompt, llm_string), compressed, len(compressed), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller must hold the lock
+        if self.ttl > 0:
+            self._conn.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl,))
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM completions").fetchone()
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, stored_size FROM completions ORDER BY last_used ASC"
+        ).fetchall():
+            if total - freed <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            freed += size
+            evicted += 1
+        log.info(f"LLM Cache: Evicted {evicted} completions ({freed} bytes).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM completions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "entries": entries,
+                "stored_bytes": stored,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self.hits = self.misses = 0
+
+
+# --- Shared Cache Instance ---
+def install_llm_cache(mode: str = LLM_CACHE_MODE) -> Optional[LLMCache]:
+    """
+    Installs the persistent LLM cache as LangChain's global cache, shared
+    by every agent's LLM. Calling it again keeps the installed cache (only
+    switching its mode).
+
+    Returns:
+        Optional[LLMCache]: The cache, or None if 'mode' is 'off'.
+    """
+    current = get_llm_cache()
+    if mode == "off":
+        if isinstance(current, LLMCache):
+            set_llm_cache(None)
+        return None
+    if isinstance(current, LLMCache):
+        current.mode = mode
+        return current
+    cache = LLMCache(os.path.join(CACHE_DIR, "llm.sqlite3"), mode=mode)
+    set_llm_cache(cache)
+    log.info(f"LLM Cache: Installed at '{cache.path}' (mode '{mode}').")
+    return cache
+
+
+def get_installed_llm_cache() -> Optional[LLMCache]:
+    """Returns the installed LLM cache, if any."""
+    current = get_llm_cache()
+    return current if isinstance(current, LLMCache) else None
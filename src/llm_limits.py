@@ -0,0 +1,76 @@
+import logging
+import threading
+from typing import Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.settings import LLM_MAX_CONCURRENCY, LLM_MAX_RPM
+from src.tools.arxiv_client import RateLimiter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+class LLMLimiter(BaseCallbackHandler):
+    """
+    Process-wide limits on LLM calls, shared by every agent and every run
+    (e.g. the concurrent runs of the batch CLI):
+
+    - at most 'max_concurrency' calls in flight at once;
+    - at most 'max_rpm' calls started per minute (0 = no limit).
+
+    It is a LangChain callback: a call waits in 'on_llm_start' /
+    'on_chat_model_start' until it may proceed, and frees its slot when it
+    ends or fails. (Calls answered by the LLM cache also take a slot,
+    briefly.)
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_rpm: int = LLM_MAX_RPM):
+        self.max_concurrency = max_concurrency
+        self.max_rpm = max_rpm
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self._rate = RateLimiter(60.0 / max_rpm) if max_rpm > 0 else None
+        self._held: Dict = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._acquire(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._acquire(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+
+    def _acquire(self, run_id) -> None:
+        with self._lock:
+            # The same handler can be reached twice for one call (inherited + local callbacks)
+            if run_id in self._held:
+                return
+            self._held[run_id] = False
+        if self._slots is not None:
+            self._slots.acquire()
+            with self._lock:
+                self._held[run_id] = True
+        if self._rate is not None:
+            self._rate.wait()
+
+    def _release(self, run_id) -> None:
+        with self._lock:
+            holds_slot = self._held.pop(run_id, False)
+        if holds_slot:
+            self._slots.release()
+
+
+llm_limiter = LLMLimiter()
+
+
+def attach_llm_limiter(llm) -> None:
+    """Adds the shared LLM limiter to an LLM's callbacks (once)."""
+    callbacks = llm.callbacks if isinstance(llm.callbacks, list) else []
+    if llm_limiter not in callbacks:
+        llm.callbacks = callbacks + [llm_limiter]
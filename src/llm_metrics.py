@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Latencies kept per role for the percentiles (the most recent calls)
+LATENCY_WINDOW = 1024
+
+
+def _percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMMetrics(BaseCallbackHandler):
+    """
+    Aggregate accounting of one role's LLM client, across every run in the
+    process (unlike 'RunStats', which is per run):
+
+    - calls and errors;
+    - latency percentiles over the last LATENCY_WINDOW calls;
+    - calls in flight now, and the most ever in flight at once.
+
+    The LLM registry ('src/llm_setup.py') attaches one to each client it
+    hands out. Calls answered by the LLM cache are counted too (with their
+    short latency). A 'parent' (the registry's 'all' metrics) also records
+    every call, for the process-wide totals.
+    """
+
+    def __init__(self, role: str, parent: Optional["LLMMetrics"] = None):
+        self.role = role
+        self.parent = parent
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._starts: Dict = {}
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, failed=False)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, failed=True)
+
+    def _start(self, run_id) -> None:
+        with self._lock:
+            # The same handler can be reached twice for one call (inherited + local callbacks)
+            if run_id in self._starts:
+                return
+            self._starts[run_id] = time.perf_counter()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.parent is not None:
+            self.parent._start(run_id)
+
+    def _finish(self, run_id, failed: bool) -> None:
+        with self._lock:
+            start = self._starts.pop(run_id, None)
+            if start is None:
+                return
+            seconds = time.perf_counter() - start
+            self.in_flight -= 1
+            self.calls += 1
+            self.errors += failed
+            self.total_seconds += seconds
+            self._latencies.append(seconds)
+        if self.parent is not None:
+            self.parent._finish(run_id, failed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "total_seconds": round(self.total_seconds, 3),
+                "p50_seconds": round(_percentile(ordered, 0.50), 3),
+                "p90_seconds": round(_percentile(ordered, 0.90), 3),
+                "p99_seconds": round(_percentile(ordered, 0.99), 3),
+            }
+
+
+def attach_llm_metrics(llm, metrics: LLMMetrics) -> None:
+    """Adds a role's metrics to an LLM's callbacks (once)."""
+    callbacks = llm.callbacks if isinstance(llm.callbacks, list) else []
+    if metrics not in callbacks:
+        llm.callbacks = callbacks + [metrics]
@@ -1,21 +1,147 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
 import os
+import threading
+from typing import Dict
+
+from dotenv import load_dotenv
 
 # Load environment variables from .env file
 # This is the first thing we do to ensure keys are available
 load_dotenv()
 
-# Check if the API key is available
-if not os.getenv("GEMINI_API_KEY"):
-    raise EnvironmentError("GEMINI_API_KEY not found in .env file. Please set it.")
+from src.settings import LLM_MODEL, LLM_TRANSPORT
+
+# We use "gemini-2.5-flash-preview-09-2025" as it's strong and fast (LLM_MODEL).
+GEMINI_MODEL = LLM_MODEL
 
-# Initialize the Gemini LLM
-# We use "gemini-2.5-flash-preview-09-2025" as it's strong and fast.
+# Settings of each agent's (role's) LLM client.
 # 'convert_system_message_to_human=True' helps with compatibility.
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-preview-09-2025",
-    verbose=True,
-    temperature=0.1, # Low temperature for factual, consistent agent behavior
-    convert_system_message_to_human=True
-)
\ No newline at end of file
+LLM_CONFIGS: Dict[str, dict] = {
+    # Low temperature for factual, consistent agent behavior
+    "planner": {"model": GEMINI_MODEL, "temperature": 0.1, "convert_system_message_to_human": True},
+    "search": {"model": GEMINI_MODEL, "temperature": 0.1, "convert_system_message_to_human": True},
+    # Slightly more creative for summarization
+    "summarizer": {"model": GEMINI_MODEL, "temperature": 0.3},
+    "writer": {"model": GEMINI_MODEL, "temperature": 0.1, "convert_system_message_to_human": True},
+    # Critics should be precise, not overly creative
+    "critic": {"model": GEMINI_MODEL, "temperature": 0.2},
+}
+
+
+def create_llm(temperature: float = 0.1, model: str = GEMINI_MODEL, **kwargs):
+    """
+    Builds a Gemini chat model on the shared transport (LLM_TRANSPORT).
+
+    Raises:
+        EnvironmentError: If GEMINI_API_KEY is not set.
+    """
+    gemini_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_key:
+        raise EnvironmentError("GEMINI_API_KEY not found in .env file. Please set it.")
+    # Imported here: the Google SDK takes about a second to import
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=gemini_key,
+        transport=LLM_TRANSPORT,
+        verbose=True,
+        temperature=temperature,
+        **kwargs
+    )
+
+
+# --- LLM Registry ---
+class LLMRegistry:
+    """
+    The process-wide LLM clients, one per role ('planner', 'search',
+    'summarizer', 'writer', 'critic'), configured from 'LLM_CONFIGS'.
+
+    All clients share one transport: the Google SDK keeps one service
+    client (one gRPC channel, or one pooled HTTP session with 'rest') for
+    the whole process. Building a chat model re-configures the SDK and
+    drops that service client, so the registry builds every role's client
+    in one go, before any of them makes a call; after that the connection
+    is only ever reused.
+
+    Each client gets an 'LLMMetrics' callback, so 'stats()' reports per-role
+    and process-wide call counts, latency percentiles and calls in flight.
+    """
+
+    def __init__(self, configs: Dict[str, dict] = LLM_CONFIGS):
+        self.configs = configs
+        self._llms: Dict[str, object] = {}
+        self._metrics: Dict[str, object] = {}
+        self._total = None
+        self._lock = threading.Lock()
+
+    def get(self, role: str):
+        """
+        Returns the client of a role, building the missing clients on first use.
+
+        Raises:
+            KeyError: If the role has no entry in 'LLM_CONFIGS'.
+        """
+        if role not in self.configs:
+            raise KeyError(f"Unknown LLM role '{role}' (known: {', '.join(self.configs)}).")
+        with self._lock:
+            if role not in self._llms:
+                for name, config in self.configs.items():
+                    if name not in self._llms:
+                        self._llms[name] = self._with_metrics(name, create_llm(**config))
+            return self._llms[role]
+
+    def set(self, role: str, llm) -> None:
+        """Replaces a role's client (e.g. with a stand-in model in benchmarks)."""
+        with self._lock:
+            self._llms[role] = self._with_metrics(role, llm)
+
+    def stats(self) -> dict:
+        """Call counts, latency percentiles and calls in flight, per role and for 'all' roles."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            total = self._total
+        return {
+            "transport": LLM_TRANSPORT,
+            "roles": {role: m.stats() for role, m in metrics.items()},
+            "all": total.stats() if total is not None else None,
+        }
+
+    def _with_metrics(self, role: str, llm):
+        # Caller must hold the lock.
+        # Imported here: the metrics are a LangChain callback, and langchain_core is slow to import
+        from src.llm_metrics import LLMMetrics, attach_llm_metrics
+
+        if self._total is None:
+            self._total = LLMMetrics("all")
+        if role not in self._metrics:
+            self._metrics[role] = LLMMetrics(role, parent=self._total)
+        attach_llm_metrics(llm, self._metrics[role])
+        return llm
+
+
+llm_registry = LLMRegistry()
+
+
+def get_llm(name: str):
+    """
+    Returns the process-wide LLM client of an agent ('planner', 'search',
+    'summarizer', 'writer' or 'critic'), created on first use.
+    """
+    return llm_registry.get(name)
+
+
+def set_llm(name: str, llm) -> None:
+    """Replaces an agent's LLM client (e.g. with a stand-in model in benchmarks)."""
+    llm_registry.set(name, llm)
+
+
+def llm_stats() -> dict:
+    """Aggregate LLM call stats of the process (see 'LLMRegistry.stats')."""
+    return llm_registry.stats()
+
+
+def __getattr__(name: str):
+    # The module used to build 'llm' at import time; it is now built on first access
+    if name == "llm":
+        return get_llm("planner")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,167 @@
+"""
+Batch research CLI: researches every topic of a topics file concurrently
+and writes one Markdown report per topic.
+
+The topics file has one topic per line (blank lines and '#' comments are
+skipped). Topics whose report already exists in the output folder are
+skipped, so an interrupted batch resumes where it stopped (--force redoes
+them). All runs share the process-wide LLM limits (LLM_MAX_CONCURRENCY,
+LLM_MAX_RPM) and caches.
+
+Usage:
+    python -m src.main topics.txt
+    python -m src.main topics.txt --workers 5 --out reports/
+    python -m src.main topics.txt --run-mode agent --no-cache --force
+"""
+import argparse
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+
+from src.llm_setup import llm_stats
+from src.settings import BATCH_MAX_WORKERS, REPORTS_DIR, RUN_MODE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+def read_topics(path: str) -> List[str]:
+    """Reads the topics file (one per line, without blanks, '#' comments and duplicates)."""
+    with open(path, encoding="utf-8") as f:
+        topics = [line.strip() for line in f]
+    return list(dict.fromkeys(t for t in topics if t and not t.startswith("#")))
+
+
+def report_path(out_dir: str, topic: str) -> str:
+    """The report file of a topic: a readable slug plus a short hash (unique per topic)."""
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")[:60] or "topic"
+    digest = hashlib.sha256(topic.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(out_dir, f"{slug}-{digest}.md")
+
+
+def write_report(path: str, report: str) -> None:
+    # Written to a temporary file first: a report file only exists once complete
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(report)
+    os.replace(tmp_path, path)
+
+
+def research_topic(topic: str, path: str, run_mode: str, use_cache: bool) -> dict:
+    """Runs one topic and writes its report. Never raises: failures are returned."""
+    # Imported here: importing the crew builds the agents (and needs the API keys)
+    from src.crew.main_crew import run_crew
+
+    start = time.perf_counter()
+    try:
+        # A fresh context per topic, so its run stats and trace don't leak into the next one
+        report = contextvars.copy_context().run(run_crew, topic, run_mode=run_mode, use_cache=use_cache)
+        write_report(path, str(report))
+        status, error = "done", None
+    except Exception as e:
+        log.error(f"Batch: Topic '{topic}' failed: {e}")
+        status, error = "failed", str(e)
+    return {"topic": topic, "status": status, "seconds": time.perf_counter() - start,
+            "report": path if status == "done" else None, "error": error}
+
+
+def run_batch(topics: List[str], out_dir: str = REPORTS_DIR, workers: int = BATCH_MAX_WORKERS,
+              run_mode: str = RUN_MODE, use_cache: bool = True, force: bool = False) -> dict:
+    """
+    Researches the topics on a pool of 'workers' threads.
+
+    Returns:
+        dict: The batch summary: per-topic results (status 'done', 'failed'
+              or 'skipped' and seconds), wall time, throughput and the
+              per-role LLM stats ('llm', see 'LLMRegistry.stats').
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    pending = []
+    for topic in topics:
+        path = report_path(out_dir, topic)
+        if os.path.exists(path) and not force:
+            results.append({"topic": topic, "status": "skipped", "seconds": 0.0, "report": path, "error": None})
+        else:
+            pending.append((topic, path))
+    if results:
+        log.info(f"Batch: Resuming, {len(results)} of {len(topics)} topics already have a report.")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(research_topic, topic, path, run_mode, use_cache) for topic, path in pending]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            log.info(f"Batch: [{done}/{len(pending)}] {result['status']} in {result['seconds']:.1f}s: "
+                     f"'{result['topic']}'")
+    wall_seconds = time.perf_counter() - start
+
+    completed = sum(1 for r in results if r["status"] == "done")
+    order = {topic: i for i, topic in enumerate(topics)}
+    return {
+        "run_mode": run_mode,
+        "workers": workers,
+        "topics": len(topics),
+        "done": completed,
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "wall_seconds": wall_seconds,
+        "topics_per_hour": completed / wall_seconds * 3600 if wall_seconds > 0 else 0.0,
+        "results": sorted(results, key=lambda r: order[r["topic"]]),
+        "llm": llm_stats(),
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\n{'Topic':<60}{'Status':>9}{'Seconds':>10}")
+    for r in summary["results"]:
+        topic = r["topic"] if len(r["topic"]) <= 58 else r["topic"][:55] + "..."
+        print(f"{topic:<60}{r['status']:>9}{r['seconds']:>10.1f}")
+    print(f"\n{summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['wall_seconds']:.1f}s with {summary['workers']} workers "
+          f"({summary['topics_per_hour']:.1f} topics/hour)")
+    roles = summary["llm"]["roles"]
+    if roles:
+        print(f"\n{'LLM role':<14}{'Calls':>7}{'Errors':>8}{'p50 (s)':>9}{'p90 (s)':>9}{'Peak':>6}")
+        for role, m in {**roles, "all": summary["llm"]["all"]}.items():
+            print(f"{role:<14}{m['calls']:>7}{m['errors']:>8}{m['p50_seconds']:>9.2f}{m['p90_seconds']:>9.2f}"
+                  f"{m['peak_in_flight']:>6}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics_file", help="Text file with one research topic per line")
+    parser.add_argument("--out", default=REPORTS_DIR, help="Folder for the reports (default: REPORTS_DIR)")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS,
+                        help="Topics researched concurrently (default: BATCH_MAX_WORKERS)")
+    parser.add_argument("--run-mode", choices=("hybrid", "agent"), default=RUN_MODE)
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse cached plans and reports")
+    parser.add_argument("--force", action="store_true", help="Redo topics that already have a report")
+    args = parser.parse_args(argv)
+
+    topics = read_topics(args.topics_file)
+    if not topics:
+        print(f"No topics in '{args.topics_file}'.")
+        return 1
+    summary = run_batch(topics, out_dir=args.out, workers=args.workers, run_mode=args.run_mode,
+                        use_cache=not args.no_cache, force=args.force)
+    print_summary(summary)
+
+    summary_path = os.path.join(args.out, f"batch-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Summary written to {summary_path}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file so every setting below
+# can be overridden without touching the code.
+load_dotenv()
+
+# Project root (the folder that contains 'src/')
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# --- Cache Settings ---
+# All persistent caches live under this folder (it is git-ignored).
+CACHE_DIR = os.getenv("AUTORESEARCH_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+# --- Embedding Settings ---
+# Which embedding backend the RAG tool uses: 'openai', 'google' or 'hashing'
+# ('hashing' is a local, CPU-only backend that needs no network).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+# Overrides the backend's default model (e.g. 'text-embedding-3-small')
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+# Vector size of the local 'hashing' backend
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "2048"))
+# Max number of vectors kept on disk before least-recently-used ones are evicted
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+# --- Run Mode Settings ---
+# 'hybrid': mechanical steps (search, scrape, bundling, RAG lookups,
+#           References) run in code; the LLM only plans, summarizes and writes.
+# 'agent':  the original 4-task crew, where agents drive every tool call.
+RUN_MODE = os.getenv("RUN_MODE", "hybrid")
+
+# --- LLM Cache Settings ---
+# 'on':     reuse completions for identical prompts (same model + parameters)
+# 'record': always call the LLM and overwrite the stored completions
+# 'replay': only serve stored completions; a missing one is an error
+# 'off':    no caching
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "on")
+# How long (seconds) a completion is reused; 0 keeps it until evicted
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Max total size of the (compressed) completions before LRU eviction
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# --- LLM Client Settings ---
+# Gemini model of every agent (a role's entry in 'LLM_CONFIGS' can override it)
+LLM_MODEL = os.getenv("LLM_MODEL", "models/gemini-2.5-flash-preview-09-2025")
+# Transport all LLM clients share: 'grpc' (one multiplexed channel) or 'rest'
+# (one pooled HTTP session)
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT", "grpc")
+
+# --- LLM Limits ---
+# Shared by every agent and every concurrent run in the process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# Max LLM calls started per minute (0 = no limit), e.g. a free-tier quota
+LLM_MAX_RPM = int(os.getenv("LLM_MAX_RPM", "0"))
+
+# --- Token Budget Settings ---
+# Max tokens each stage hands to the LLM. Inputs are compacted (boilerplate,
+# whitespace and repeats removed) and, if still too long, trimmed: the budget
+# is shared by relevance, so the least relevant text is cut first.
+TOKEN_BUDGETS = {
+    # All scraped sources together, before they are indexed / given to an agent
+    "sources": int(os.getenv("TOKEN_BUDGET_SOURCES", "12000")),
+    # The retrieved snippets the summarizer reads
+    "summarize": int(os.getenv("TOKEN_BUDGET_SUMMARIZE", "4000")),
+    # The summary the writer reads (only logged: it is the LLM's own output)
+    "draft": int(os.getenv("TOKEN_BUDGET_DRAFT", "4000")),
+}
+# Local tokenizer used to count tokens (a tiktoken encoding; '' = estimate
+# from the length). tiktoken downloads it once, then works offline.
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+# --- Batch Settings ---
+# Where the batch CLI (python -m src.main) writes its reports
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(PROJECT_ROOT, "reports"))
+# Max number of topics researched concurrently
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "3"))
+
+# --- Job Queue Settings ---
+# Research runs executed at once by the job queue (HTTP API)
+JOBS_MAX_CONCURRENT = int(os.getenv("JOBS_MAX_CONCURRENT", "2"))
+# Max jobs waiting for a worker; further submissions are rejected (HTTP 429)
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED", "20"))
+# Finished jobs (status and report) kept in memory before the oldest are dropped
+JOBS_KEEP_FINISHED = int(os.getenv("JOBS_KEEP_FINISHED", "200"))
+
+# --- Semantic Cache Settings ---
+# Reuse plans and finished reports of near-identical topics (by topic embedding)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Min cosine similarity between two topics for a cached plan / report to be reused.
+# Tuned for dense embedding models; the 'hashing' backend scores paraphrases lower.
+SEMANTIC_CACHE_PLAN_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_PLAN_THRESHOLD", "0.90"))
+SEMANTIC_CACHE_REPORT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_REPORT_THRESHOLD", "0.95"))
+# How long (seconds) a cached plan / report stays eligible
+SEMANTIC_CACHE_PLAN_TTL = int(os.getenv("SEMANTIC_CACHE_PLAN_TTL", str(30 * 24 * 3600)))
+SEMANTIC_CACHE_REPORT_TTL = int(os.getenv("SEMANTIC_CACHE_REPORT_TTL", str(3 * 24 * 3600)))
+
+# --- Search Stage Settings ---
+# Max number of sub-questions searched + scraped concurrently
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "4"))
+
+# --- HTTP Client Settings ---
+# Max pooled (keep-alive) connections per host
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+# Max number of distinct hosts whose connection pools are kept
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+# Max number of requests in flight at once, across all hosts
+HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# --- HTTP Resilience Settings ---
+# Once a host's latency is known, its read timeout is this many times its p95
+# latency, but never below HTTP_MIN_READ_TIMEOUT (nor above HTTP_READ_TIMEOUT)
+HTTP_TIMEOUT_FACTOR = float(os.getenv("HTTP_TIMEOUT_FACTOR", "3"))
+HTTP_MIN_READ_TIMEOUT = float(os.getenv("HTTP_MIN_READ_TIMEOUT", "2"))
+# Send a duplicate (hedged) scrape when the first one is slower than this
+# percentile of the host's latency (0 = never hedge)
+HTTP_HEDGE_PERCENTILE = float(os.getenv("HTTP_HEDGE_PERCENTILE", "0.95"))
+# Retries of a 429 / 503 response, with jittered exponential backoff (seconds)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+# After this many failures in a row (timeouts, connection errors, 429 / 5xx),
+# requests to the host fail at once for HTTP_BREAKER_COOLDOWN seconds
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+
+# --- External API Endpoints ---
+# Overridable so the offline benchmarks can point them at local stand-ins
+GOOGLE_CSE_URL = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+
+# --- HTTP Response Cache Settings ---
+# How long (seconds) a cached response is served without asking the origin again
+HTTP_CACHE_TTLS = {
+    "google": int(os.getenv("HTTP_CACHE_TTL_GOOGLE", str(24 * 3600))),
+    "arxiv": int(os.getenv("HTTP_CACHE_TTL_ARXIV", str(7 * 24 * 3600))),
+    "scrape": int(os.getenv("HTTP_CACHE_TTL_SCRAPE", str(3 * 24 * 3600))),
+}
+# Max total size of the (compressed) cached bodies before LRU eviction
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# --- Scrape Settings ---
+# Stop downloading a page after this many bytes. 15k chars of text
+# (MAX_CHARS_TO_SCRAPE) rarely need more than a few hundred KB of HTML.
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(1024 * 1024)))
+
+# --- ArXiv Settings ---
+# arXiv asks API users for at most one request every 3 seconds
+ARXIV_MIN_INTERVAL = float(os.getenv("ARXIV_MIN_INTERVAL", "3"))
+# Max ids per 'id_list' lookup (one API request)
+ARXIV_BATCH_SIZE = int(os.getenv("ARXIV_BATCH_SIZE", "100"))
+
+# --- Retrieval Settings ---
+# 'hybrid':  BM25 + vector search, merged by reciprocal-rank fusion
+# 'vector':  FAISS similarity search only
+# 'lexical': BM25 only (no embedding calls at all, lowest latency)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# --- Chunking Settings ---
+# 'fast' (offset-based, see src/tools/chunking.py) or 'langchain' (RecursiveCharacterTextSplitter)
+CHUNK_SPLITTER = os.getenv("CHUNK_SPLITTER", "fast")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+# Texts whose chunk boundaries are kept in memory (a few dozen bytes per chunk)
+CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "1024"))
+
+# --- Research Corpus Settings ---
+# Keep every indexed source (text, chunks, vectors) on disk and reuse it in later
+# runs: RAG lookups also search it, and well-covered sub-questions skip the web search
+CORPUS_ENABLED = os.getenv("CORPUS_ENABLED", "true").lower() in ("1", "true", "yes")
+CORPUS_DIR = os.getenv("CORPUS_DIR", os.path.join(CACHE_DIR, "corpus"))
+# How long (seconds) a stored source is used before it expires
+CORPUS_TTL = int(os.getenv("CORPUS_TTL", str(7 * 24 * 3600)))
+# Min cosine similarity of a stored chunk to a question, to count for it (and to be retrieved).
+# Tuned for dense embedding models; the 'hashing' backend scores paraphrases lower.
+CORPUS_MIN_SIMILARITY = float(os.getenv("CORPUS_MIN_SIMILARITY", "0.5"))
+# Stored chunks at CORPUS_MIN_SIMILARITY a sub-question needs to skip its web search (0 = never skip)
+CORPUS_MIN_HITS = int(os.getenv("CORPUS_MIN_HITS", "3"))
+
+# --- Dedup Settings ---
+# Drop near-duplicate sources (syndicated copies) and chunks before they are
+# budgeted, chunked or embedded (MinHash over word 5-grams, see src/tools/dedup.py)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Estimated Jaccard similarity from which a text counts as a copy of an earlier one
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+
+# --- Tracing Settings ---
+# Trace every run (spans for stages, Tasks, LLM and tool calls) and log a profile
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+# One JSON-lines file per run is written here
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(CACHE_DIR, "traces"))
@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import arxiv
+
+from src.settings import ARXIV_API_URL, ARXIV_BATCH_SIZE, ARXIV_MIN_INTERVAL, CACHE_DIR, HTTP_CACHE_TTLS
+from src.tools.http_cache import normalize_query
+from src.tracing import record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+_VERSION_RE = re.compile(r"v\d+$")
+
+
+def normalize_arxiv_id(paper_id: str) -> str:
+    """Turns 'http://arxiv.org/abs/2105.09492v2' (or '2105.09492v2') into '2105.09492'."""
+    paper_id = paper_id.strip().rstrip("/")
+    if "/abs/" in paper_id:
+        paper_id = paper_id.split("/abs/", 1)[1]
+    return _VERSION_RE.sub("", paper_id)
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 'min_interval' seconds apart across all threads.
+    Callers block (queue up) until their slot comes, instead of being throttled.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PaperStore:
+    """
+    A local, indexed SQLite store of arXiv paper metadata.
+
+    - 'papers' holds one row per paper (keyed by version-less arXiv id).
+      Abstracts don't change, so papers never expire.
+    - 'queries' maps a normalized search query to the ids it returned,
+      and expires after the 'arxiv' TTL so new papers are picked up.
+    """
+
+    def __init__(self, path: str, query_ttl: int = HTTP_CACHE_TTLS["arxiv"]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.query_ttl = query_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " id TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " published TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " authors TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " query TEXT PRIMARY KEY,"
+            " ids TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_published ON papers (published)")
+        self._conn.commit()
+
+    def get_papers(self, ids: List[str]) -> Dict[str, dict]:
+        """Returns the stored papers for the given (normalized) ids."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT id, title, published, summary, url, authors FROM papers WHERE id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for pid, title, published, summary, url, authors in rows:
+                    found[pid] = {
+                        "id": pid,
+                        "title": title,
+                        "published": published,
+                        "summary": summary,
+                        "url": url,
+                        "authors": json.loads(authors),
+                    }
+        return found
+
+    def put_papers(self, papers: List[dict]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers (id, title, published, summary, url, authors, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(p["id"], p["title"], p["published"], p["summary"], p["url"],
+                  json.dumps(p["authors"]), now) for p in papers],
+            )
+            self._conn.commit()
+
+    def get_query(self, query_key: str) -> Optional[List[str]]:
+        """Returns the paper ids of a cached search, or None if missing/expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ids, fetched_at FROM queries WHERE query = ?", (query_key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.query_ttl:
+            return None
+        return json.loads(row[0])
+
+    def put_query(self, query_key: str, ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries (query, ids, fetched_at) VALUES (?, ?, ?)",
+                (query_key, json.dumps(ids), time.time()),
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()
+        return n
+
+
+def _to_paper(result) -> dict:
+    return {
+        "id": normalize_arxiv_id(result.entry_id),
+        "title": result.title,
+        "published": str(result.published.date()),
+        "summary": result.summary,
+        "url": result.entry_id,
+        "authors": [a.name for a in result.authors],
+    }
+
+
+class ArxivService:
+    """
+    The process-wide arXiv client.
+
+    All requests go through one 'arxiv.Client' and one central rate limiter,
+    so concurrent callers (e.g. the parallel search stage) queue up instead
+    of getting throttled. Papers already in the local store are served
+    without a network call, and missing ids are fetched in 'id_list'
+    batches of up to ARXIV_BATCH_SIZE per request.
+    """
+
+    def __init__(self, store: PaperStore, min_interval: float = ARXIV_MIN_INTERVAL,
+                 batch_size: int = ARXIV_BATCH_SIZE):
+        self.store = store
+        self.batch_size = batch_size
+        self.rate_limiter = RateLimiter(min_interval)
+        self.client = arxiv.Client(page_size=batch_size, delay_seconds=min_interval, num_retries=3)
+        self.client.query_url_format = ARXIV_API_URL + "?{}"
+        # 'arxiv.Client' keeps per-instance state and is not thread-safe
+        self._client_lock = threading.Lock()
+        self.requests = 0
+        self.store_hits = 0
+
+    def _fetch(self, search: arxiv.Search) -> List[dict]:
+        self.rate_limiter.wait()
+        with self._client_lock:
+            self.requests += 1
+            return [_to_paper(r) for r in self.client.results(search)]
+
+    def get_papers(self, ids: List[str]) -> List[dict]:
+        """
+        Bulk lookup of papers by arXiv id.
+
+        Args:
+            ids (List[str]): arXiv ids or abs URLs (versions are ignored).
+
+        Returns:
+            List[dict]: The papers found, in the order of 'ids'.
+        """
+        wanted = list(dict.fromkeys(normalize_arxiv_id(i) for i in ids))
+        papers = self.store.get_papers(wanted)
+        self.store_hits += len(papers)
+
+        missing = [i for i in wanted if i not in papers]
+        record(cache_hits=len(papers), cache_misses=len(missing))
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            log.info(f"ArXiv Client: Fetching {len(batch)} papers in one id_list request.")
+            fetched = self._fetch(arxiv.Search(id_list=batch, max_results=len(batch)))
+            self.store.put_papers(fetched)
+            papers.update((p["id"], p) for p in fetched)
+
+        return [papers[i] for i in wanted if i in papers]
+
+    def search(self, query: str, max_results: int = 3) -> List[dict]:
+        """
+        Searches arXiv by relevance, using the local store when possible.
+
+        Args:
+            query (str): The search query string.
+            max_results (int): Maximum number of papers to return.
+
+        Returns:
+            List[dict]: One dict per paper with 'id', 'title', 'published',
+                        'summary', 'url' and 'authors'.
+        """
+        query_key = f"{normalize_query(query)}|max_results={max_results}"
+        ids = self.store.get_query(query_key)
+        if ids is not None:
+            log.info(f"ArXiv Client: Serving '{query}' from the local paper store.")
+            return self.get_papers(ids)
+
+        record(cache_misses=1)
+        papers = self._fetch(arxiv.Search(
+            query=query,
+            max_results=max_results,
+            sort_by=arxiv.SortCriterion.Relevance
+        ))
+        self.store.put_papers(papers)
+        self.store.put_query(query_key, [p["id"] for p in papers])
+        return papers
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "store_hits": self.store_hits,
+            "papers_stored": self.store.count(),
+        }
+
+
+# --- Shared Service Instance ---
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_arxiv_service() -> ArxivService:
+    """Returns the process-wide arXiv service (created on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ArxivService(PaperStore(os.path.join(CACHE_DIR, "arxiv.sqlite3")))
+        return _service
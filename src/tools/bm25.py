@@ -0,0 +1,96 @@
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for keyword matching in sub-questions
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how in into is it its "
+    "of on or that the their this to was what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases and splits text into alphanumeric terms, dropping stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    A compact in-memory inverted index with Okapi BM25 scoring.
+
+    Each term maps to two small NumPy arrays (document ids and term
+    frequencies), so scoring a query is a handful of vectorized
+    scatter-adds and needs no embedding call at all.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(texts)
+
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            terms = tokenize(text)
+            lengths[doc_id] = len(terms)
+            for term in terms:
+                counts = postings[term]
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        self.doc_lengths = lengths
+        self.avg_doc_length = float(lengths.mean()) if self.num_docs else 0.0
+        self._docs: Dict[str, np.ndarray] = {}
+        self._tfs: Dict[str, np.ndarray] = {}
+        self._idf: Dict[str, float] = {}
+        for term, counts in postings.items():
+            self._docs[term] = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            self._tfs[term] = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            df = len(counts)
+            self._idf[term] = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """Returns the BM25 score of every document for the query."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term in set(tokenize(query)):
+            docs = self._docs.get(term)
+            if docs is None:
+                continue
+            tfs = self._tfs[term]
+            scores[docs] += self._idf[term] * tfs * (self.k1 + 1) / (tfs + norm[docs])
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Returns the top-k (doc_id, score) pairs. Documents that share no
+        term with the query are never returned.
+        """
+        scores = self.scores(query)
+        if k < self.num_docs:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(self.num_docs)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[int]:
+    """
+    Merges several ranked lists of document ids with reciprocal-rank fusion:
+    each id scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Returns:
+        List[int]: All ids, best first (ties keep first-seen order).
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
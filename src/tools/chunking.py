@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from src.settings import CHUNK_CACHE_MAX_ENTRIES, CHUNK_OVERLAP, CHUNK_SIZE, CHUNK_SPLITTER
+from src.tools.embedding_cache import chunk_hash
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# 'fast':      offset-based splitter below (str.rfind on the raw text, no intermediate pieces)
+# 'langchain': LangChain's RecursiveCharacterTextSplitter, mapped back to offsets
+SPLITTERS = ("fast", "langchain")
+
+# Break points, coarsest first (the same order as RecursiveCharacterTextSplitter)
+_SEPARATORS = ("\n\n", "\n", " ")
+_NON_SPACE_RE = re.compile(r"\S")
+_SPACE_RE = re.compile(r"\s")
+
+
+# --- Splitters ---
+def _skip_space(text: str, pos: int) -> int:
+    match = _NON_SPACE_RE.search(text, pos)
+    return match.start() if match else len(text)
+
+
+def fast_split(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> np.ndarray:
+    """
+    Splits a text into chunks of at most 'chunk_size' characters and returns
+    their (start, end) offsets.
+
+    Like the LangChain splitter, a chunk ends at the coarsest break point
+    available (paragraph, then line, then word) and the next chunk repeats
+    up to 'chunk_overlap' characters, starting at a word. Break points are
+    only looked for in the second half of the window, so no chunk is cut
+    short, and each is found with one 'str.rfind': nothing is copied but
+    the offsets.
+
+    Returns:
+        np.ndarray: An (n, 2) int64 array of chunk offsets, whitespace-trimmed.
+    """
+    spans = []
+    length = len(text)
+    start = _skip_space(text, 0)
+    while start < length:
+        end = start + chunk_size
+        if end >= length:
+            end = length
+        else:
+            floor = start + chunk_size // 2
+            for separator in _SEPARATORS:
+                cut = text.rfind(separator, floor, end)
+                if cut != -1:
+                    end = cut
+                    break
+        spans.append((start, start + len(text[start:end].rstrip())))
+        if end >= length:
+            break
+        # The next chunk starts up to 'chunk_overlap' characters back, at the start of a word
+        resume = end
+        if chunk_overlap > 0 and end - chunk_overlap > start:
+            space = _SPACE_RE.search(text, end - chunk_overlap, end)
+            if space is not None:
+                resume = space.end()
+        start = _skip_space(text, max(resume, start + 1))
+    return np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+
+
+def langchain_split(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> np.ndarray:
+    """The chunks of LangChain's RecursiveCharacterTextSplitter, as (start, end) offsets (see 'fast_split')."""
+    # Imported here: only needed when CHUNK_SPLITTER is 'langchain' (and by the benchmark)
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    spans = []
+    cursor = 0
+    for chunk in splitter.split_text(text):
+        # Chunks are whitespace-trimmed substrings in order; overlapping ones start after the previous start
+        start = text.find(chunk, cursor)
+        if start == -1:
+            start = text.find(chunk)
+        spans.append((start, start + len(chunk)))
+        cursor = start + 1
+    return np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+
+
+_SPLIT_FUNCTIONS = {"fast": fast_split, "langchain": langchain_split}
+
+
+# --- Chunk Cache ---
+class ChunkedText:
+    """
+    The chunk boundaries of one text under one splitter config. Only the
+    offsets are kept (16 bytes per chunk), not the chunk strings; the
+    chunks' content hashes, the embedding cache's keys, are computed once
+    on first use.
+    """
+
+    __slots__ = ("spans", "_hashes")
+
+    def __init__(self, spans: np.ndarray):
+        self.spans = spans
+        self._hashes: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def texts(self, content: str) -> List[str]:
+        """The chunk strings, sliced from the text these offsets were computed for."""
+        return [content[start:end] for start, end in self.spans.tolist()]
+
+    def hashes(self, content: str) -> List[str]:
+        """The content hash of every chunk (see 'chunk_hash'), computed once."""
+        if self._hashes is None:
+            self._hashes = [chunk_hash(text) for text in self.texts(content)]
+        return self._hashes
+
+
+class ChunkCache:
+    """
+    Chunk boundaries by (content hash, splitter config), so every text is
+    split once per process, however many sessions or corpora it is part
+    of. The least recently used entries are dropped beyond 'max_entries'.
+    """
+
+    def __init__(self, max_entries: int = CHUNK_CACHE_MAX_ENTRIES, splitter: str = CHUNK_SPLITTER):
+        if splitter not in SPLITTERS:
+            raise ValueError(f"Unknown chunk splitter '{splitter}'. Choose one of: {', '.join(SPLITTERS)}.")
+        self.max_entries = max_entries
+        self.splitter = splitter
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, ChunkedText]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def chunk(self, content: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> ChunkedText:
+        """Returns the chunks of a text, splitting it only if this text and config were not seen before."""
+        key = (hashlib.sha256(content.encode("utf-8")).hexdigest(), self.splitter, chunk_size, chunk_overlap)
+        with self._lock:
+            chunked = self._entries.get(key)
+            if chunked is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return chunked
+            self.misses += 1
+
+        # Split outside the lock; a concurrent split of the same text just stores an equal entry
+        chunked = ChunkedText(_SPLIT_FUNCTIONS[self.splitter](content, chunk_size, chunk_overlap))
+        with self._lock:
+            self._entries[key] = chunked
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return chunked
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"splitter": self.splitter, "hits": self.hits, "misses": self.misses,
+                    "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+# --- Shared Cache Instance ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chunk_cache() -> ChunkCache:
+    """Returns the process-wide chunk cache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChunkCache()
+        return _cache
@@ -0,0 +1,165 @@
+import logging
+import re
+import zlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.crew.run_stats import current_run_stats
+from src.crew.tasks import ConsolidatedData
+from src.crew.token_budget import count_tokens
+from src.settings import DEDUP_ENABLED, DEDUP_THRESHOLD
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+# Words per shingle: long enough that shared phrasing, not shared vocabulary, makes texts similar
+SHINGLE_WORDS = 5
+# MinHash signature length, split into LSH bands of ROWS_PER_BAND values. With
+# 16 bands of 4, pairs at 0.8 similarity are compared with ~99.9% probability,
+# pairs below 0.3 almost never.
+NUM_PERM = 64
+ROWS_PER_BAND = 4
+# Shingles hashed per block (a block's hash matrix is BLOCK_SHINGLES x NUM_PERM x 8 bytes)
+BLOCK_SHINGLES = 1 << 15
+
+# Fixed seed: the same text gets the same signature in every process
+_rng = np.random.default_rng(0x5EED)
+# Multiply-shift hashing: (a * x + b) mod 2^64, top 32 bits; 'a' must be odd
+_PERM_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+# Polynomial hashing of a window of word hashes into one shingle hash
+_SHINGLE_POWERS = _rng.integers(1, 2 ** 63, SHINGLE_WORDS, dtype=np.uint64)
+_BAND_POWERS = _rng.integers(1, 2 ** 63, ROWS_PER_BAND, dtype=np.uint64)
+
+
+# --- MinHash ---
+def shingle_hashes(texts: Sequence[str]) -> List[np.ndarray]:
+    """
+    The hashes of each text's word 5-grams (lower-cased). Every distinct
+    word is hashed once for all texts; a text shorter than a shingle is one
+    shingle, an empty text has none.
+    """
+    vocab = {}
+    word_ids = [[vocab.setdefault(w, len(vocab)) for w in _WORD_RE.findall(text.lower())] for text in texts]
+    word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in vocab), dtype=np.uint64, count=len(vocab))
+
+    shingles = []
+    for ids in word_ids:
+        if not ids:
+            shingles.append(np.empty(0, dtype=np.uint64))
+            continue
+        hashes = word_hashes[ids]
+        if len(hashes) < SHINGLE_WORDS:
+            hashes = np.pad(hashes, (0, SHINGLE_WORDS - len(hashes)))
+        windows = np.lib.stride_tricks.sliding_window_view(hashes, SHINGLE_WORDS)
+        with np.errstate(over="ignore"):
+            shingles.append(windows @ _SHINGLE_POWERS)
+    return shingles
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    MinHash signatures of many texts, NUM_PERM values each. The shingles of
+    all texts are hashed together, a block at a time, and reduced to each
+    text's minimum with one 'np.minimum.reduceat' per block.
+
+    Returns:
+        np.ndarray: A (len(texts), NUM_PERM) uint64 array. Texts without any
+                    word get all-max rows (see 'near_duplicates').
+    """
+    shingles = shingle_hashes(texts)
+    signatures = np.full((len(texts), NUM_PERM), np.iinfo(np.uint64).max, dtype=np.uint64)
+    present = [i for i, s in enumerate(shingles) if len(s)]
+
+    start = 0
+    while start < len(present):
+        # Whole texts per block, at least one (a single huge text is hashed on its own)
+        end, size = start, 0
+        while end < len(present) and (end == start or size + len(shingles[present[end]]) <= BLOCK_SHINGLES):
+            size += len(shingles[present[end]])
+            end += 1
+        block = present[start:end]
+        values = np.concatenate([shingles[i] for i in block])
+        offsets = np.cumsum([0] + [len(shingles[i]) for i in block[:-1]])
+        with np.errstate(over="ignore"):
+            hashed = (values[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+        signatures[block] = np.minimum.reduceat(hashed, offsets, axis=0)
+        start = end
+    return signatures
+
+
+def near_duplicates(texts: Sequence[str], threshold: float = DEDUP_THRESHOLD) -> List[Optional[int]]:
+    """
+    Finds texts that are near-copies of an earlier one: their estimated
+    Jaccard similarity (over word 5-grams) is at least 'threshold'.
+
+    Candidates come from LSH banding of the MinHash signatures, so only
+    texts that share a band are compared, not every pair.
+
+    Returns:
+        List[Optional[int]]: For each text, the index of the earlier text it
+                             duplicates, or None if it is kept.
+    """
+    duplicate_of: List[Optional[int]] = [None] * len(texts)
+    if len(texts) < 2:
+        return duplicate_of
+
+    signatures = minhash_signatures(texts)
+    empty = (signatures == np.iinfo(np.uint64).max).all(axis=1)
+    bands = signatures.reshape(len(texts), NUM_PERM // ROWS_PER_BAND, ROWS_PER_BAND)
+    with np.errstate(over="ignore"):
+        band_keys = (bands @ _BAND_POWERS).tolist()
+
+    buckets = [dict() for _ in range(NUM_PERM // ROWS_PER_BAND)]
+    for i, keys in enumerate(band_keys):
+        if empty[i]:
+            continue
+        # Only kept texts are in the buckets, so a duplicate always points at an original
+        candidates = sorted({j for bucket, key in zip(buckets, keys) for j in bucket.get(key, ())})
+        if candidates:
+            similarity = (signatures[candidates] == signatures[i]).mean(axis=1)
+            best = int(np.argmax(similarity))  # the earliest of equally similar texts
+            if similarity[best] >= threshold:
+                duplicate_of[i] = candidates[best]
+                continue
+        for bucket, key in zip(buckets, keys):
+            bucket.setdefault(key, []).append(i)
+    return duplicate_of
+
+
+# --- Reporting ---
+def record_dedup(level: str, total: int, removed: List[str], embeddings_avoided: int = 0) -> None:
+    """Logs what de-duplication removed at one level and adds it to the run's stats."""
+    tokens = sum(count_tokens(text) for text in removed)
+    if removed:
+        log.info(f"Dedup: Dropped {len(removed)} of {total} {level} as near-duplicates "
+                 f"({tokens:,} tokens, {embeddings_avoided} embeddings avoided).")
+    stats = current_run_stats()
+    if stats is not None:
+        stats.record_dedup(level, total, len(removed), tokens, embeddings_avoided)
+
+
+# --- Sources ---
+def dedupe_sources(data: ConsolidatedData, threshold: float = DEDUP_THRESHOLD) -> ConsolidatedData:
+    """
+    Drops sources whose content nearly copies an earlier source's (e.g. the
+    same article syndicated on two sites), so they are neither budgeted,
+    chunked nor embedded. Sources keep their plan order; the first copy is
+    kept.
+    """
+    if not DEDUP_ENABLED or len(data.sources) < 2:
+        return data
+    duplicate_of = near_duplicates([item.content for item in data.sources], threshold)
+    kept = [item for item, dup in zip(data.sources, duplicate_of) if dup is None]
+    for item, dup in zip(data.sources, duplicate_of):
+        if dup is not None:
+            log.info(f"Dedup: '{item.source}' copies '{data.sources[dup].source}'.")
+    record_dedup("sources", len(data.sources),
+                 [item.content for item, dup in zip(data.sources, duplicate_of) if dup is not None])
+    if len(kept) == len(data.sources):
+        return data
+    return ConsolidatedData(plan=data.plan, sources=kept, no_results=data.no_results)
@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.settings import CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES
+from src.tracing import record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# SQLite has a limit on the number of '?' placeholders in one statement
+_SQL_BATCH = 500
+
+
+def chunk_hash(text: str) -> str:
+    """Returns the content address (SHA-256 hex digest) of a text chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    A persistent, size-bounded embedding store keyed by (model, chunk hash).
+
+    Vectors are stored as packed float32 blobs in a small SQLite file.
+    Every read refreshes the entry's 'last_used' time, and once the table
+    grows past 'max_entries' the least-recently-used rows are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " chunk_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, chunk_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Looks up the vectors for the given chunk hashes.
+
+        Args:
+            model (str): The embedding model name.
+            hashes (List[str]): Chunk hashes to look up.
+
+        Returns:
+            Dict[str, List[float]]: The cached vectors, keyed by chunk hash.
+                                    Missing hashes are simply absent.
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), _SQL_BATCH):
+                batch = unique[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND chunk_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND chunk_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        record(cache_hits=len(found), cache_misses=len(unique) - len(found))
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Stores new vectors, then evicts the LRU entries if over capacity."""
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, chunk_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model, h, array("f", v).tobytes(), now) for h, v in vectors.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller must hold the lock
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN ("
+                " SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            log.info(f"Embedding Cache: Evicted {overflow} least-recently-used vectors.")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current number of stored vectors."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self) -> None:
+        """Deletes every stored vector and resets the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain 'Embeddings' backend with the content-addressed cache.
+    Only chunks that are not already cached are sent to the backend.
+
+    'symmetric' backends embed a query exactly like a document, so several
+    uncached queries go to the backend in one 'embed_documents' call;
+    others (e.g. Google, which uses a query task type) get one
+    'embed_query' call per query.
+    """
+
+    def __init__(self, backend: Embeddings, model: str, cache: Optional[EmbeddingCache] = None,
+                 symmetric: bool = False):
+        self.backend = backend
+        self.model = model
+        self.cache = cache or get_embedding_cache()
+        self.symmetric = symmetric
+        # Queries live in their own namespace, since some backends embed
+        # queries differently from documents. ('query-v2': older 'query'
+        # entries of asymmetric backends may hold document vectors.)
+        self.query_namespace = f"{model}:query-v2"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_hashed(texts, [chunk_hash(t) for t in texts])
+
+    def embed_hashed(self, texts: List[str], hashes: List[str]) -> List[List[float]]:
+        """
+        Embeds chunks whose content hashes are already known (the chunk cache
+        keeps them with the chunk boundaries, see 'src/tools/chunking.py').
+        """
+        vectors = self.cache.get_many(self.model, hashes)
+
+        # Send each missing chunk to the backend exactly once
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = t
+
+        if missing:
+            log.info(f"Embedding Cache: Embedding {len(missing)} new chunks "
+                     f"({len(texts) - len(missing)} served from cache).")
+            new_vectors = self.backend.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(self.model, fresh)
+            vectors.update(fresh)
+
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds several queries, with one backend call for all uncached ones
+        if the backend is symmetric (else one 'embed_query' call each).
+        Used by the retrieval session to answer a whole plan at once.
+        """
+        hashes = [chunk_hash(t) for t in texts]
+        vectors = self.cache.get_many(self.query_namespace, hashes)
+        missing = {h: t for h, t in zip(hashes, texts) if h not in vectors}
+        if missing:
+            if self.symmetric and len(missing) > 1:
+                # LangChain has no batched 'embed_query': for symmetric backends it is 'embed_documents'
+                new_vectors = self.backend.embed_documents(list(missing.values()))
+            else:
+                new_vectors = [self.backend.embed_query(t) for t in missing.values()]
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(self.query_namespace, fresh)
+            vectors.update(fresh)
+        return [vectors[h] for h in hashes]
+
+
+# --- Shared Cache Instance ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Returns the process-wide embedding cache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+        return _cache
@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from src.settings import EMBEDDING_BACKEND, EMBEDDING_MODEL, HASHING_EMBEDDING_DIM
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    A CPU-only, network-free embedding backend.
+
+    Each text becomes a bag of word unigrams and bigrams, which are mapped
+    into a fixed-size vector with signed feature hashing (CRC32, so vectors
+    are stable across processes). Counts are sublinearly scaled (1 + log tf)
+    and every vector is L2-normalized, so FAISS's L2 distance ranks by
+    cosine similarity. Tokenizing is plain Python; everything after that
+    is a single vectorized NumPy scatter-add over the whole batch.
+    """
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM, ngram_range: Tuple[int, int] = (1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self._feature_cache: Dict[str, Tuple[int, float]] = {}
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        lo, hi = self.ngram_range
+        features = []
+        for n in range(lo, hi + 1):
+            if n == 1:
+                features.extend(tokens)
+            else:
+                features.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return features
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        cached = self._feature_cache.get(feature)
+        if cached is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            # The lowest bit picks the sign, so colliding features tend to cancel out
+            cached = (h >> 1) % self.dim, (1.0 if h & 1 else -1.0)
+            if len(self._feature_cache) < 500_000:
+                self._feature_cache[feature] = cached
+        return cached
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                col, sign = self._hash(feature)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+
+        # Sublinear term frequency, keeping the sign of each bucket
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# --- Backend Registry ---
+# Each factory takes an optional model name and returns (embeddings, model_id).
+# The model id namespaces the on-disk embedding cache.
+
+def _openai_backend(model: Optional[str]):
+    from langchain_openai import OpenAIEmbeddings
+
+    model = model or "text-embedding-3-small"
+    return OpenAIEmbeddings(model=model, openai_api_key=os.getenv("OPENAI_API_KEY")), model
+
+
+def _google_backend(model: Optional[str]):
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    model = model or "models/embedding-001"
+    return GoogleGenerativeAIEmbeddings(model=model, google_api_key=os.getenv("GEMINI_API_KEY")), model
+
+
+def _hashing_backend(model: Optional[str]):
+    return HashingEmbeddings(), f"hashing-{HASHING_EMBEDDING_DIM}"
+
+
+EMBEDDING_BACKENDS: Dict[str, Callable] = {
+    "openai": _openai_backend,
+    "google": _google_backend,
+    "hashing": _hashing_backend,
+}
+
+# Local backends are cheaper to recompute than to look up on disk
+LOCAL_BACKENDS = {"hashing"}
+# Backends whose 'embed_query' equals 'embed_documents' on one text, so queries
+# can be embedded in batches (Google embeds queries with another task type)
+SYMMETRIC_BACKENDS = {"openai", "hashing"}
+
+
+def register_embedding_backend(name: str, factory: Callable, local: bool = False, symmetric: bool = False) -> None:
+    """
+    Adds an embedding backend that can then be selected with EMBEDDING_BACKEND.
+
+    Args:
+        name (str): The backend name.
+        factory (Callable): Takes an optional model name, returns (embeddings, model_id).
+        local (bool): True if the backend needs no network (skips the disk cache).
+        symmetric (bool): True if queries are embedded like documents (batches queries).
+    """
+    EMBEDDING_BACKENDS[name] = factory
+    if local:
+        LOCAL_BACKENDS.add(name)
+    if symmetric:
+        SYMMETRIC_BACKENDS.add(name)
+
+
+def create_embeddings(backend: str = EMBEDDING_BACKEND, model: Optional[str] = EMBEDDING_MODEL):
+    """
+    Builds the configured embedding backend.
+
+    Returns:
+        Tuple[Embeddings, str]: The backend and its model id.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    factory = EMBEDDING_BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"Unknown embedding backend '{backend}'. "
+                         f"Choose one of: {', '.join(sorted(EMBEDDING_BACKENDS))}.")
+    embeddings, model_id = factory(model)
+    log.info(f"Embeddings: Using backend '{backend}' ({model_id}).")
+    return embeddings, model_id
@@ -0,0 +1,149 @@
+from html.parser import HTMLParser
+from typing import List, Optional, Union
+
+# Elements whose whole subtree is boilerplate (or not text at all)
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "footer", "aside", "select",
+}
+# Page chrome only at page level: inside an <article> or <main>, a <header> holds the title
+PAGE_SKIP_TAGS = {"header"}
+# Elements that hold the page's content, never inside page chrome
+CONTENT_TAGS = {"article", "main"}
+# Elements without an end tag
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "main",
+    "blockquote", "pre", "dd", "dt", "figcaption", "hr",
+}
+
+# How much HTML is handed to the parser at once; lets us stop early
+FEED_SIZE = 64 * 1024
+
+
+class TextExtractor(HTMLParser):
+    """
+    A streaming, event-based HTML-to-text extractor.
+
+    Unlike BeautifulSoup it never builds a DOM: text is collected as the
+    parser walks the tags, boilerplate subtrees (nav, footer, script, ...)
+    are skipped as they are encountered, and parsing stops as soon as
+    'max_chars' characters of text have been collected.
+
+    A skipped element that is never closed ends with the element around
+    it, or where a <main> starts (which page chrome can't contain), so it
+    doesn't hide the rest of the document.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.lines: List[str] = []
+        self.length = 0
+        self.done = False
+        self._current: List[str] = []
+        # The open elements, and the positions in it of the skipped ones
+        self._open: List[str] = []
+        self._skips: List[int] = []
+        self._content_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "main" and self._skips:
+            self._close_from(self._skips[0])
+        if tag in VOID_TAGS:
+            self.handle_startendtag(tag, attrs)
+            return
+        self._open.append(tag)
+        if tag in CONTENT_TAGS:
+            self._content_depth += 1
+        if tag in SKIP_TAGS or (tag in PAGE_SKIP_TAGS and not self._content_depth):
+            self._skips.append(len(self._open) - 1)
+        elif tag in BLOCK_TAGS:
+            self._break_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._break_line()
+
+    def handle_endtag(self, tag):
+        # Closes the innermost open element of that name, and any unclosed ones inside it
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i] == tag:
+                self._close_from(i)
+                break
+        if tag in BLOCK_TAGS:
+            self._break_line()
+
+    def _close_from(self, index: int):
+        self._content_depth -= sum(1 for tag in self._open[index:] if tag in CONTENT_TAGS)
+        del self._open[index:]
+        while self._skips and self._skips[-1] >= index:
+            self._skips.pop()
+
+    def handle_data(self, data):
+        if self._skips or self.done:
+            return
+        # Collapse runs of whitespace, as the old 'split lines / split on "  "' did
+        text = " ".join(data.split())
+        if text:
+            self._current.append(text)
+            self.length += len(text) + 1
+            if self.max_chars is not None and self.length >= self.max_chars:
+                self.done = True
+
+    def _break_line(self):
+        if self._current:
+            self.lines.append(" ".join(self._current))
+            self._current = []
+
+    def text(self) -> str:
+        self._break_line()
+        return "\n".join(self.lines)
+
+
+def _decode(content: Union[bytes, str], encoding: Optional[str]) -> str:
+    if isinstance(content, str):
+        return content
+    return content.decode(encoding or "utf-8", errors="replace")
+
+
+def extract_text(content: Union[bytes, str], max_chars: Optional[int] = None,
+                 encoding: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """
+    Extracts readable text from an HTML (or plain text) document.
+
+    Args:
+        content (bytes | str): The raw document.
+        max_chars (int, optional): Stop once this many characters were extracted
+                                   (the result is truncated to exactly this size).
+        encoding (str, optional): Charset of 'content' if it is bytes (default utf-8).
+        content_type (str, optional): The response Content-Type. 'text/plain'
+                                      documents skip HTML parsing entirely.
+
+    Returns:
+        str: The extracted text, one block of text per line.
+    """
+    document = _decode(content, encoding)
+
+    if content_type and content_type.split(";")[0].strip().lower() == "text/plain":
+        lines = (" ".join(line.split()) for line in document.splitlines())
+        text = "\n".join(line for line in lines if line)
+    else:
+        parser = TextExtractor(max_chars=max_chars)
+        for start in range(0, len(document), FEED_SIZE):
+            parser.feed(document[start:start + FEED_SIZE])
+            if parser.done:
+                break
+        else:
+            parser.close()
+        text = parser.text()
+
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max_chars]
+    return text
@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.settings import CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTLS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Tracking parameters, which never change the response
+TRACKING_PARAMS = {"fbclid", "gclid"}
+# Cache sources that are search APIs: their API key is never stored, and
+# their 'q' search parameter is case-insensitive (Google Custom Search)
+SEARCH_API_SOURCES = {"google"}
+SEARCH_API_SECRETS = {"key"}
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases a search query and collapses its whitespace."""
+    return " ".join(query.lower().split())
+
+
+def normalize_url(url: str, params: Optional[dict] = None, source: Optional[str] = None) -> str:
+    """
+    Returns a canonical cache key for a URL (plus optional query params).
+
+    The scheme and host are lower-cased, the fragment is dropped, query
+    parameters are sorted and tracking parameters (utm_*, fbclid, gclid)
+    are removed. Any other parameter may change a page, so it is kept as
+    is, except for search API requests ('source' in SEARCH_API_SOURCES):
+    their API key is removed and their 'q' search parameter is normalized
+    with 'normalize_query'.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items() if v is not None)
+
+    search_api = source in SEARCH_API_SOURCES
+    cleaned = []
+    for k, v in query:
+        if k in TRACKING_PARAMS or k.startswith("utm_") or (search_api and k in SEARCH_API_SECRETS):
+            continue
+        if search_api and k == "q":
+            v = normalize_query(v)
+        cleaned.append((k, v))
+
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(cleaned)), ""))
+
+
+class HttpCache:
+    """
+    A persistent HTTP response cache for the search and scrape tools.
+
+    - Entries are keyed by normalized URL/query and tagged with a source
+      ('google', 'arxiv', 'scrape') that decides their TTL.
+    - Bodies are stored zlib-compressed in SQLite.
+    - Stale entries that carry an ETag / Last-Modified can be revalidated
+      with a conditional request instead of being downloaded again.
+    - Once the compressed bodies exceed 'max_bytes', the least-recently-used
+      entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = HTTP_CACHE_MAX_BYTES, ttls: Optional[dict] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or HTTP_CACHE_TTLS)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " body_size INTEGER NOT NULL,"
+            " stored_size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " truncated INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Caches written before bodies cut at a byte budget were flagged
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "truncated" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+
+    def ttl_for(self, source: str) -> int:
+        return self.ttls.get(source, self.ttls.get("scrape", 0))
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached entry for 'key', fresh or stale, or None.
+
+        The returned dict has 'status', 'headers', 'body' (decompressed),
+        'fresh' (bool), 'truncated' (bool: the body was cut at a byte
+        budget), 'etag' and 'last_modified'.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, expires_at, truncated FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        status, headers, body, expires_at, truncated = row
+        headers = json.loads(headers)
+        lowered = {k.lower(): v for k, v in headers.items()}
+        return {
+            "status": status,
+            "headers": headers,
+            "body": zlib.decompress(body),
+            "fresh": expires_at > time.time(),
+            "truncated": bool(truncated),
+            "etag": lowered.get("etag"),
+            "last_modified": lowered.get("last-modified"),
+        }
+
+    def store(self, key: str, source: str, status: int, headers: dict, body: bytes,
+              truncated: bool = False) -> None:
+        """
+        Stores (or replaces) a response, then evicts LRU entries if over the
+        size cap. 'truncated' marks a body cut at a byte budget.
+        """
+        # Only keep the headers we need to rebuild / revalidate the response.
+        # ('requests' has already decoded the body, so Content-Encoding is dropped.)
+        kept = {k: v for k, v in headers.items()
+                if k.lower() in ("content-type", "etag", "last-modified")}
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, source, status, headers, body, body_size, stored_size, expires_at, last_used, truncated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, status, json.dumps(kept), compressed, len(body), len(compressed),
+                 now + self.ttl_for(source), now, int(truncated)),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key: str, source: str) -> None:
+        """Extends the lifetime of an entry after a successful revalidation (304)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?",
+                (time.time() + self.ttl_for(source), time.time(), key),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller must hold the lock
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, stored_size FROM responses ORDER BY last_used ASC"
+        ).fetchall():
+            if total - freed <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            freed += size
+            evicted += 1
+        log.info(f"HTTP Cache: Evicted {evicted} responses ({freed} bytes).")
+
+    # --- Stats ---
+    def record_hit(self, body_size: int, revalidated: bool = False) -> None:
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+            self.bytes_saved += body_size
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        """Returns hit ratio, bytes saved and current size of the cache."""
+        with self._lock:
+            entries, stored, raw = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_size), 0), COALESCE(SUM(body_size), 0) FROM responses"
+            ).fetchone()
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_ratio": ((self.hits + self.revalidated) / lookups) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": entries,
+                "stored_bytes": stored,
+                "uncompressed_bytes": raw,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = self.revalidated = self.misses = self.bytes_saved = 0
+
+
+# --- Shared Cache Instance ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Returns the process-wide HTTP response cache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(os.path.join(CACHE_DIR, "http.sqlite3"))
+        return _cache
@@ -0,0 +1,393 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.settings import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONCURRENCY,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT,
+)
+from src.tools.http_cache import get_http_cache, normalize_url
+from src.tools.resilience import CircuitOpen, HostHealth, HostRegistry, backoff_delay
+from src.tracing import propagate_context, record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+class UnsupportedContentType(requests.exceptions.RequestException):
+    """Raised when a streamed response has a Content-Type the caller did not accept."""
+
+
+# Throttling / overload responses worth retrying after a backoff
+RETRY_STATUSES = (429, 503)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
+}
+
+
+class HttpClient:
+    """
+    A shared HTTP client with keep-alive connection pooling.
+
+    - One 'requests.Session' is reused for every call, so TLS handshakes
+      and TCP connections are reused across Google CSE calls and scrapes.
+    - Each host gets at most 'pool_maxsize' connections (callers beyond
+      that wait for a free connection instead of opening new ones).
+    - At most 'max_concurrency' requests are in flight at once overall.
+
+    Against slow or throttled hosts (see 'src/tools/resilience.py'):
+
+    - The read timeout adapts to the host's observed latency
+      (HTTP_TIMEOUT_FACTOR x its p95) instead of a fixed HTTP_READ_TIMEOUT.
+    - With 'hedge=True' (scrapes; never billed APIs like Google CSE), a
+      request slower than the host's HTTP_HEDGE_PERCENTILE latency gets a
+      duplicate (hedged) request; the first response wins. Hedges only use
+      idle concurrency slots.
+    - 429 / 503 responses are retried up to 'max_retries' times, with
+      jittered exponential backoff (or the server's Retry-After).
+    - A host failing HTTP_BREAKER_FAILURES times in a row is skipped for
+      HTTP_BREAKER_COOLDOWN seconds: requests raise 'CircuitOpen' at once.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        pool_hosts: int = HTTP_POOL_HOSTS,
+        max_concurrency: int = HTTP_MAX_CONCURRENCY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.hosts = HostRegistry(read_timeout=read_timeout)
+        # Runs the first and the hedged request of a hedged GET side by side
+        self._hedge_pool = ThreadPoolExecutor(max_workers=2 * max_concurrency, thread_name_prefix="http-hedge")
+        self._stats_lock = threading.Lock()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fast_failures = 0
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+            timeout=None, cache: Optional[str] = None, max_bytes: Optional[int] = None,
+            accept: Optional[Tuple[str, ...]] = None, hedge: bool = False, **kwargs) -> requests.Response:
+        """
+        Sends a GET request over the pooled session.
+
+        Args:
+            url (str): The URL to fetch.
+            params (dict, optional): Query string parameters.
+            headers (dict, optional): Extra headers (merged with the defaults).
+            timeout: Overrides the default (connect, read) timeout.
+            cache (str, optional): Source name ('google', 'arxiv', 'scrape').
+                                   If given, the response cache is used with
+                                   that source's TTL. A body cut at
+                                   'max_bytes' is stored as 'truncated' and
+                                   only served to requests whose budget it
+                                   covers.
+            max_bytes (int, optional): Stream the body and stop reading once this
+                                       many bytes arrived ('truncated' is set on
+                                       the response when the budget was hit).
+            accept (tuple, optional): Allowed Content-Type prefixes. Other types
+                                      raise 'UnsupportedContentType' before the
+                                      body is downloaded.
+            hedge (bool): Send a duplicate request if this one is slower than
+                          the host usually is. Off by default: only for idempotent
+                          requests that cost nothing twice (not billed APIs).
+
+        Returns:
+            requests.Response: The response (status is *not* checked here).
+                               Responses served from the cache have
+                               'from_cache' set to True.
+        """
+        if cache is None:
+            return self._send(url, params=params, headers=headers, timeout=timeout,
+                              max_bytes=max_bytes, accept=accept, hedge=hedge, **kwargs)
+
+        http_cache = get_http_cache()
+        key = normalize_url(url, params, source=cache)
+        entry = http_cache.lookup(key)
+        if entry is not None and entry["truncated"]:
+            if max_bytes is None or max_bytes > len(entry["body"]):
+                # Only the start of the page is stored, and this request wants more of it
+                entry = None
+            else:
+                entry["body"] = entry["body"][:max_bytes]
+
+        if entry is not None and entry["fresh"]:
+            http_cache.record_hit(len(entry["body"]))
+            record(cache_hits=1)
+            return _cached_response(url, entry)
+
+        # Stale entry: ask the origin whether it changed instead of re-downloading
+        conditional = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                conditional["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        response = self._send(url, params=params, headers=conditional, timeout=timeout,
+                              max_bytes=max_bytes, accept=accept, hedge=hedge, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            log.info(f"HTTP Cache: Revalidated '{key}' (not modified).")
+            http_cache.refresh(key, cache)
+            http_cache.record_hit(len(entry["body"]), revalidated=True)
+            record(cache_hits=1)
+            return _cached_response(url, entry)
+
+        http_cache.record_miss()
+        record(cache_misses=1)
+        if response.status_code == 200:
+            http_cache.store(key, cache, response.status_code, dict(response.headers), response.content,
+                             truncated=response.truncated)
+        return response
+
+    def _send(self, url: str, params=None, headers=None, timeout=None,
+              max_bytes: Optional[int] = None, accept: Optional[Tuple[str, ...]] = None,
+              hedge: bool = False, **kwargs) -> requests.Response:
+        health = self.hosts.get(urlsplit(url).netloc.lower())
+        try:
+            # Retries of an admitted request don't need to pass the breaker again
+            trial = health.check()
+        except CircuitOpen:
+            self._count("fast_failures")
+            raise
+        try:
+            return self._send_admitted(health, url, params=params, headers=headers, timeout=timeout,
+                                       max_bytes=max_bytes, accept=accept, hedge=hedge, **kwargs)
+        finally:
+            # However the trial request ended (e.g. an unwanted content type), the next one may try
+            if trial:
+                health.end_trial()
+
+    def _send_admitted(self, health: HostHealth, url: str, timeout=None, hedge: bool = False,
+                       **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            request_timeout = timeout or (self.timeout[0], self.hosts.read_timeout_for(health))
+            send = self._hedged if hedge else self._attempt
+            try:
+                response = send(health, url, timeout=request_timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError):
+                health.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                log.warning(f"HTTP Client: '{health.host}' answered {response.status_code}, "
+                            f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries}).")
+                response.close()
+                self._count("retries")
+                record(retries=1)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if response.status_code in RETRY_STATUSES or response.status_code >= 500:
+                health.record_failure()
+            break
+        record(bytes_fetched=len(response.content))
+        return response
+
+    def _hedged(self, health: HostHealth, url: str, **kwargs) -> requests.Response:
+        """
+        Sends the request; if it takes longer than the host's hedge delay,
+        sends a duplicate on an idle slot and returns whichever answers first.
+        """
+        delay = self.hosts.hedge_delay(health)
+        if delay is None:
+            return self._attempt(health, url, **kwargs)
+
+        first = self._hedge_pool.submit(self._attempt, health, url, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        second = self._hedge_pool.submit(self._attempt, health, url, block=False, **kwargs)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result() is not None:
+                    for other in pending:
+                        other.add_done_callback(_close_response)
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+        # Both failed (or no slot was free for the hedge): report the first request's outcome
+        return first.result()
+
+    def _attempt(self, health: HostHealth, url: str, params=None, headers=None, timeout=None,
+                 max_bytes: Optional[int] = None, accept: Optional[Tuple[str, ...]] = None,
+                 block: bool = True, **kwargs) -> Optional[requests.Response]:
+        # A hedge ('block=False') is only sent if a concurrency slot is free right now
+        if not self._slots.acquire(blocking=block):
+            return None
+        if not block:
+            self._count("hedges")
+            log.info(f"HTTP Client: '{url}' is slow, sending a hedged request.")
+        try:
+            start = time.perf_counter()
+            response = self.session.get(
+                url, params=params, headers=headers, timeout=timeout or self.timeout,
+                stream=max_bytes is not None or bool(accept), **kwargs
+            )
+            response.from_cache = False
+            response.truncated = False
+            if max_bytes is not None or accept:
+                _read_limited(response, max_bytes, accept)
+            if response.status_code not in RETRY_STATUSES and response.status_code < 500:
+                self.hosts.record_success(health, time.perf_counter() - start)
+            return response
+        finally:
+            self._slots.release()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> dict:
+        """Retries, hedges and fast failures so far, and each host's latency and breaker state."""
+        with self._stats_lock:
+            counts = {"retries": self.retries, "hedges": self.hedges, "hedge_wins": self.hedge_wins,
+                      "fast_failures": self.fast_failures}
+        return {**counts, "hosts": self.hosts.stats()}
+
+    def fetch_many(self, urls: List[str], headers: Optional[dict] = None, timeout=None,
+                   cache: Optional[str] = None, **kwargs) -> List[Union[requests.Response, Exception]]:
+        """
+        Fetches many URLs concurrently, bounded by the global concurrency cap.
+
+        Args:
+            urls (List[str]): The URLs to fetch.
+            headers (dict, optional): Extra headers for every request.
+            timeout: Overrides the default (connect, read) timeout.
+            cache (str, optional): Source name for the response cache (see 'get').
+            **kwargs: Passed on to 'get' (e.g. 'max_bytes', 'accept', 'hedge').
+
+        Returns:
+            List[Union[requests.Response, Exception]]: One entry per URL, in input
+            order. Failed fetches (including 4xx/5xx) hold the raised exception.
+        """
+        if not urls:
+            return []
+
+        def _fetch(url):
+            try:
+                response = self.get(url, headers=headers, timeout=timeout, cache=cache, **kwargs)
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                log.warning(f"HTTP Client: Error fetching '{url}': {e}")
+                return e
+
+        workers = min(len(urls), self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http") as pool:
+            return list(pool.map(propagate_context(_fetch), urls))
+
+    async def afetch_many(self, urls: List[str], headers: Optional[dict] = None, timeout=None,
+                          cache: Optional[str] = None, **kwargs) -> List[Union[requests.Response, Exception]]:
+        """Async version of 'fetch_many' (runs the batch off the event loop)."""
+        return await asyncio.to_thread(
+            functools.partial(self.fetch_many, urls, headers, timeout, cache, **kwargs)
+        )
+
+    def close(self) -> None:
+        self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+
+
+def _close_response(future) -> None:
+    """Done-callback of the losing request of a hedged GET: frees its connection."""
+    if future.exception() is None and future.result() is not None:
+        future.result().close()
+
+
+def _read_limited(response: requests.Response, max_bytes: Optional[int],
+                  accept: Optional[Tuple[str, ...]]) -> None:
+    """
+    Reads a streamed body up to 'max_bytes', then closes the connection.
+    Rejects unwanted content types from the headers alone, before any body
+    bytes are downloaded.
+    """
+    try:
+        if accept and response.status_code == 200:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(accept):
+                raise UnsupportedContentType(
+                    f"Skipping '{response.url}': unsupported content type '{content_type}'",
+                    response=response,
+                )
+
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            body.extend(chunk)
+            if max_bytes is not None and len(body) >= max_bytes:
+                response.truncated = True
+                del body[max_bytes:]
+                log.info(f"HTTP Client: Stopped reading '{response.url}' at the {max_bytes}-byte budget.")
+                break
+        response._content = bytes(body)
+        response._content_consumed = True
+    finally:
+        response.close()
+
+
+def _cached_response(url: str, entry: dict) -> requests.Response:
+    """Rebuilds a 'requests.Response' from a cache entry."""
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"]
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    response.truncated = entry["truncated"]
+    return response
+
+
+# --- Shared Client Instance ---
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the process-wide pooled HTTP client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def fetch_many(urls: List[str], **kwargs) -> List[Union[requests.Response, Exception]]:
+    """Fetches many URLs concurrently with the shared client. See 'HttpClient.fetch_many'."""
+    return get_http_client().fetch_many(urls, **kwargs)
@@ -1,113 +1,126 @@
 from crewai_tools import tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-import os
+from src.crew.token_budget import SUB_QUESTIONS_PER_PLAN, budget_snippets
+from src.settings import EMBEDDING_BACKEND, TOKEN_BUDGETS
+from src.tools.embedding_cache import CachedEmbeddings, get_embedding_cache
+from src.tools.embeddings import LOCAL_BACKENDS, SYMMETRIC_BACKENDS, create_embeddings
+from src.tools.retrieval import get_corpus_session
+from src.tracing import traced
 import logging
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# The embeddings client is built once and reused across tool calls (and concurrent runs)
+_embeddings = None
+_embeddings_model_id = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings():
+    """
+    Returns the shared embeddings client for the configured backend
+    (EMBEDDING_BACKEND: 'openai', 'google' or the local 'hashing').
+    For remote backends, chunks that were embedded before (in this run or
+    a previous one) are served from the on-disk cache instead of the API.
+    """
+    global _embeddings, _embeddings_model_id
+    with _embeddings_lock:
+        if _embeddings is None:
+            backend, model_id = create_embeddings(EMBEDDING_BACKEND)
+            if EMBEDDING_BACKEND in LOCAL_BACKENDS:
+                embeddings = backend
+            else:
+                embeddings = CachedEmbeddings(backend, model=model_id,
+                                              symmetric=EMBEDDING_BACKEND in SYMMETRIC_BACKENDS)
+            _embeddings, _embeddings_model_id = embeddings, model_id
+        return _embeddings
+
+def get_embedding_model_id() -> str:
+    """Returns the id of the model behind 'get_embeddings()' (e.g. 'text-embedding-3-small')."""
+    get_embeddings()
+    with _embeddings_lock:
+        return _embeddings_model_id
+
 @tool("rag_query_tool")
-def rag_query_tool(question: str, context_list: list[dict]) -> str:
+@traced("rag_query_tool")
+def rag_query_tool(question: str, corpus_id: str) -> str:
     """
-    Performs in-memory RAG on a list of source dictionaries.
-    This tool is metadata-aware. It attaches the 'source' URL to
-    each text chunk *before* indexing, ensuring that retrieved
-    snippets can be properly attributed.
+    Performs RAG over the sources found by the search stage.
+    The sources are identified by their corpus id (the 'corpus_id' field
+    of the search results); their text is looked up by the tool, so it
+    never needs to be passed in. Every retrieved snippet carries the
+    'source' URL it came from.
     
     Args:
         question (str): The specific query or sub-question to find information for.
-        context_list (list[dict]): A list of source objects, where each object
-                                   is a dictionary with 'source' (URL) and
-                                   'content' (scraped text).
+        corpus_id (str): The id of the sources, e.g. 'corpus-3f9a0c1b2d4e'.
                                    
     Returns:
         str: A string of the most relevant text snippets, each followed
              by its [Source: ...] tag.
     """
-    log.info(f"RAG Tool: Received query: '{question}'")
-    log.info(f"RAG Tool: Processing {len(context_list)} source documents.")
-
-    # 1. Initialize Embeddings Model
-    try:#USe any 1 embeddings model
-        # embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        from langchain_openai import OpenAIEmbeddings
-
-        embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-
-    except Exception as e:
-        log.error(f"RAG Tool: Failed to load embeddings model. Error: {e}")
-        return "Error: Could not load embeddings model."
-
-    # 2. Create lists of texts and their corresponding metadatas
-    texts = []
-    metadatas = []
-    
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    
-    for item in context_list:
-        # *** FIX 1: Make key-checking flexible (as you suggested) ***
-        # Check for multiple variations of the keys
-        content = item.get('content') or item.get('Content')
-        source = item.get('source') or item.get('Source') or item.get('URL')
-        
-        # *** FIX 2: Make content validation more lenient (as you suggested) ***
-        # Only skip if content is truly missing or too short to be useful
-        if not content or len(content.strip()) < 50:
-            log.warning(f"RAG Tool: Skipping item with missing/short content or source: {item}")
-            continue
-            
-        # Split the content into chunks
-        chunks = text_splitter.split_text(content)
-        
-        # Add the chunks to the texts list
-        texts.extend(chunks)
-        
-        # Create a metadata dictionary for each chunk, pointing to its source
-        metadatas.extend([{"source": source}] * len(chunks))
+    log.info(f"RAG Tool: Received query: '{question}' on '{corpus_id}'")
 
-    # 3. Build the FAISS index with metadata
-    if not texts:
-        log.warning("RAG Tool: No valid text chunks found to index after filtering.")
-        return "No valid content was found to search for this sub-question."
-        
+    # 1. Get the retrieval session of this corpus.
+    # The indexes are built once per corpus, not once per sub-question.
     try:
-        log.info(f"RAG Tool: Creating FAISS index with {len(texts)} text chunks...")
-        vectordb = FAISS.from_texts(texts, embeddings, metadatas=metadatas)
-        log.info("RAG Tool: FAISS index created successfully.")
+        session = get_corpus_session(corpus_id)
+        if session is None:
+            return f"Error: Unknown corpus_id '{corpus_id}'. Use the 'corpus_id' given with the search results."
+        if not session.build():
+            return "No valid content was found to search for this sub-question."
     except Exception as e:
-        log.error(f"RAG Tool: Failed to create FAISS index. Error: {e}")
+        log.error(f"RAG Tool: Failed to create RAG index. Error: {e}")
         return "Error: Failed to build RAG index."
 
-    # 4. Perform similarity search
+    # 2. Perform the search (served from the prefetched answers when possible)
     log.info(f"RAG Tool: Performing similarity search for: '{question}'")
-    results = vectordb.similarity_search(question, k=4) # Get top 4 relevant chunks
+    result = session.query(question, k=4) # Get top 4 relevant chunks
+    # One sub-question's share of the summarizer's token budget
+    result = budget_snippets({question: result}, TOKEN_BUDGETS["summarize"] // SUB_QUESTIONS_PER_PLAN)[question]
 
-    # 5. Format the results with their sources (the final fix)
-    snippets = []
-    seen_sources = set()
-    
-    for r in results:
-        # Get the source from the metadata we preserved
-        src = r.metadata.get("source", "Unknown Source")
-        
-        # Format the snippet
-        snippet_text = f"{r.page_content.strip()} [Source: {src}]"
-        
-        # Simple de-duplication
-        if snippet_text not in snippets:
-            snippets.append(snippet_text)
-            seen_sources.add(src)
-
-    if not snippets:
+    if not result:
         log.warning(f"RAG Tool: No relevant snippets found for query: '{question}'")
         return "No relevant information found for this sub-question."
 
-    log.info(f"RAG Tool: Returning {len(snippets)} snippets from {len(seen_sources)} sources.")
-    return "\n---\n".join(snippets)
+    log.info(f"RAG Tool: Returning {result.count('[Source: ')} snippets.")
+    log.info(f"RAG Tool: Embedding cache stats: {get_embedding_cache().stats()}")
+    return result
+
+
+@tool("rag_batch_query_tool")
+@traced("rag_batch_query_tool")
+def rag_batch_query_tool(questions: list[str], corpus_id: str) -> str:
+    """
+    Answers *all* sub-questions at once against the same sources.
+    The sources are indexed once, the questions are embedded in a single
+    batch, and one multi-query search retrieves the snippets for all of them.
+
+    Args:
+        questions (list[str]): Every sub-question from the research plan.
+        corpus_id (str): The id of the sources (the 'corpus_id' field of the
+                         search results), e.g. 'corpus-3f9a0c1b2d4e'.
+
+    Returns:
+        str: For each question, a '### <question>' header followed by the
+             most relevant snippets, each with its [Source: ...] tag.
+    """
+    log.info(f"RAG Batch Tool: Received {len(questions)} questions on '{corpus_id}'.")
+    try:
+        session = get_corpus_session(corpus_id)
+        if session is None:
+            return f"Error: Unknown corpus_id '{corpus_id}'. Use the 'corpus_id' given with the search results."
+        if not session.build():
+            return "No valid content was found to search for these sub-questions."
+        answers = budget_snippets(session.query_many(questions, k=4))
+    except Exception as e:
+        log.error(f"RAG Batch Tool: Failed to query the RAG index. Error: {e}")
+        return "Error: Failed to build or query RAG index."
 
+    sections = []
+    for q in questions:
+        body = answers.get(q) or "No relevant information found for this sub-question."
+        sections.append(f"### {q}\n{body}")
+    log.info(f"RAG Tool: Embedding cache stats: {get_embedding_cache().stats()}")
+    return "\n\n".join(sections)
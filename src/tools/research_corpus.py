@@ -0,0 +1,518 @@
+import glob
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock, so one process per corpus directory
+    fcntl = None
+
+from src.settings import (
+    CORPUS_DIR,
+    CORPUS_ENABLED,
+    CORPUS_MIN_HITS,
+    CORPUS_MIN_SIMILARITY,
+    CORPUS_TTL,
+    RETRIEVAL_MODE,
+)
+from src.tracing import record
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Vector rows scored per matrix product (bounds the memory a search touches at once)
+SEARCH_BLOCK = 65536
+# Compact the vectors file once this share of its rows belongs to deleted / expired sources
+COMPACT_RATIO = 0.25
+# Seconds between two expiry passes (searches skip expired sources in between anyway)
+EXPIRE_INTERVAL = 600
+
+
+class ResearchCorpus:
+    """
+    Every source indexed by earlier runs, kept on disk with its chunks and
+    their vectors. Knowledge fetched for one topic is then reused by later
+    runs instead of being searched, scraped and embedded again.
+
+    One directory per embedding model holds:
+
+    - 'corpus.sqlite3': the sources (URL, text, expiry, deleted flag) and
+      their chunks as (source, start, end) offsets. A chunk's id is its
+      row in the vectors file.
+    - 'vectors-<generation>.f32': the L2-normalized chunk vectors, one
+      float32 row per chunk. New sources are appended; searches read the
+      file through 'np.memmap', so it is never loaded whole.
+
+    Deleting a source, or its expiry after 'ttl' seconds, only marks it;
+    searches skip its rows. 'compact' writes the live rows to the next
+    generation's file once COMPACT_RATIO of the rows are dead.
+
+    The API, the batch CLI and the Streamlit worker share one directory,
+    so every access holds an flock on 'corpus.lock': shared for searches,
+    exclusive for writes and compaction. Under the lock, each process
+    first catches up with the others' writes (the meta 'version' and
+    'generation'), and new chunk ids continue from the stored chunks.
+
+    The corpus is best effort (a failed search is a miss, a failed write
+    is skipped).
+    """
+
+    def __init__(self, directory: str, embeddings, model_id: str, ttl: float = CORPUS_TTL,
+                 min_similarity: float = CORPUS_MIN_SIMILARITY, min_hits: int = CORPUS_MIN_HITS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self.min_hits = min_hits
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._lock_file = open(os.path.join(directory, "corpus.lock"), "a+b")
+        self._lock_mode: Optional[str] = None
+        self._conn = sqlite3.connect(os.path.join(directory, "corpus.sqlite3"), check_same_thread=False)
+        with self._locked(exclusive=True):
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " deleted INTEGER NOT NULL DEFAULT 0);"
+                "CREATE INDEX IF NOT EXISTS idx_sources_url ON sources (url, deleted);"
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id INTEGER PRIMARY KEY,"
+                " source_id INTEGER NOT NULL,"
+                " start INTEGER NOT NULL,"
+                " end INTEGER NOT NULL);"
+            )
+            self._conn.commit()
+            self._matrix_cache = None
+            self._last_expiry = float("-inf")
+            self._load()
+            self._remove_stale_generations()
+            self._truncate_vectors(len(self._chunk_sources))
+
+    # --- Locking ---
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """
+        Holds the corpus for this thread and, across processes, the flock
+        on 'corpus.lock' (shared, or exclusive for writes). Nested calls
+        reuse the outer lock, so a write must not nest inside a read.
+        """
+        with self._lock:
+            outer = self._lock_mode is None
+            if outer:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._lock_mode = "exclusive" if exclusive else "shared"
+            elif exclusive and self._lock_mode != "exclusive":
+                raise RuntimeError("Research Corpus: A write can't run inside a read.")
+            try:
+                yield
+            finally:
+                if outer:
+                    self._lock_mode = None
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    # --- State ---
+    def _meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump_version(self) -> None:
+        """Marks a write (in its transaction), so other processes re-read the corpus."""
+        self._version = str(int(self._meta("version", "0")) + 1)
+        self._set_meta("version", self._version)
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"vectors-{generation}.f32")
+
+    def _load(self) -> None:
+        """Reads the generation, the chunk -> source map and the live sources (call with the corpus locked)."""
+        self.generation = int(self._meta("generation", "0"))
+        self._version = self._meta("version", "0")
+        dim = self._meta("dim")
+        self.dim = int(dim) if dim is not None else None
+        self._chunk_sources = np.fromiter(
+            (source_id for (source_id,) in self._conn.execute("SELECT source_id FROM chunks ORDER BY id")),
+            dtype=np.int64,
+        )
+        self._refresh_live()
+
+    def _sync(self) -> None:
+        """Catches up with the writes of other processes (call with the corpus locked)."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta WHERE key IN ('generation', 'version', 'dim')"))
+        if int(meta.get("generation", "0")) != self.generation:
+            self._load()
+        elif meta.get("version", "0") != self._version:
+            # Only appends and deletes happen within a generation: read the new chunks, then the live sources
+            appended = np.fromiter(
+                (source_id for (source_id,) in self._conn.execute(
+                    "SELECT source_id FROM chunks WHERE id >= ? ORDER BY id", (len(self._chunk_sources),))),
+                dtype=np.int64,
+            )
+            self._chunk_sources = np.concatenate([self._chunk_sources, appended])
+            self.dim = int(meta["dim"]) if "dim" in meta else None
+            self._version = meta["version"]
+            self._refresh_live()
+
+    def _remove_stale_generations(self) -> None:
+        """Removes the vectors files of earlier generations (call with the corpus locked exclusively)."""
+        path = self._vectors_path(self.generation)
+        for stale in glob.glob(os.path.join(self.directory, "vectors-*.f32")):
+            if stale != path:
+                try:
+                    # Processes that still map the file keep reading it (and re-open the new one after their sync)
+                    os.remove(stale)
+                except OSError as e:
+                    log.warning(f"Research Corpus: Could not remove '{stale}': {e}")
+
+    def _truncate_vectors(self, rows: int) -> None:
+        """Drops vector rows appended without their chunks being committed (call with the corpus locked exclusively)."""
+        path = self._vectors_path(self.generation)
+        size = rows * (self.dim or 0) * 4
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _refresh_live(self) -> None:
+        rows = self._conn.execute(
+            "SELECT id, url FROM sources WHERE deleted = 0 AND expires_at > ?", (time.time(),)
+        ).fetchall()
+        self._live_sources: Dict[str, int] = {url: source_id for source_id, url in rows}
+        self._live = np.isin(self._chunk_sources, np.fromiter(self._live_sources.values(), dtype=np.int64))
+        self._matrix_cache = None
+
+    def _matrix(self) -> Optional[np.ndarray]:
+        """The vectors file, memory-mapped read-only (re-opened after every write)."""
+        if self._matrix_cache is None and len(self._chunk_sources) and self.dim:
+            self._matrix_cache = np.memmap(self._vectors_path(self.generation), dtype=np.float32, mode="r",
+                                           shape=(len(self._chunk_sources), self.dim))
+        return self._matrix_cache
+
+    def __len__(self) -> int:
+        with self._locked():
+            self._sync()
+            return int(self._live.sum())
+
+    def has_source(self, url: str) -> bool:
+        """True if the corpus holds a live (not deleted, not expired) copy of this source."""
+        with self._locked():
+            self._sync()
+            return url in self._live_sources
+
+    # --- Writes ---
+    def add(self, url: str, content: str, spans: np.ndarray, vectors: np.ndarray) -> bool:
+        """
+        Appends a source with its chunks' (start, end) offsets and vectors.
+        A source already live in the corpus is kept as is.
+
+        Returns:
+            bool: True if the source was added.
+        """
+        return self.add_many([(url, content, spans, vectors)]) == 1
+
+    def add_many(self, sources: Sequence[Tuple[str, str, np.ndarray, np.ndarray]]) -> int:
+        """
+        Appends several (url, content, spans, vectors) sources with one write
+        to the vectors file and one transaction (see 'add').
+
+        Returns:
+            int: The number of sources added.
+        """
+        with self._locked(exclusive=True):
+            self._sync()
+            new, seen = [], set()
+            for url, content, spans, vectors in sources:
+                if not len(spans) or url in self._live_sources or url in seen:
+                    continue
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(len(spans), -1)
+                if vectors.shape[1] != (self.dim or vectors.shape[1]):
+                    log.warning(f"Research Corpus: Not adding '{url}': vectors have {vectors.shape[1]} "
+                                f"dimensions, the corpus {self.dim}.")
+                    continue
+                self.dim = self.dim or vectors.shape[1]
+                seen.add(url)
+                new.append((url, content, np.asarray(spans), vectors))
+            if not new:
+                return 0
+
+            matrix = np.concatenate([vectors for _, _, _, vectors in new])
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+            # New rows continue from the stored chunks; rows past them were left by an interrupted write
+            (row,) = self._conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM chunks").fetchone()
+            self._truncate_vectors(row)
+            # Vectors first: rows without committed chunks are truncated by the next writer
+            with open(self._vectors_path(self.generation), "ab") as f:
+                f.write(matrix.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            now = time.time()
+            chunk_sources = []
+            for url, content, spans, _ in new:
+                source_id = self._conn.execute(
+                    "INSERT INTO sources (url, content, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (url, content, now, now + self.ttl),
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO chunks (id, source_id, start, end) VALUES (?, ?, ?, ?)",
+                    [(row + j, source_id, start, end) for j, (start, end) in enumerate(spans.tolist())],
+                )
+                row += len(spans)
+                chunk_sources.append(np.full(len(spans), source_id, dtype=np.int64))
+                self._live_sources[url] = source_id
+            self._set_meta("dim", self.dim)
+            self._bump_version()
+            self._conn.commit()
+
+            self._chunk_sources = np.concatenate([self._chunk_sources, *chunk_sources])
+            self._live = np.concatenate([self._live, np.ones(len(matrix), dtype=bool)])
+            self._matrix_cache = None
+        return len(new)
+
+    def delete(self, url: str) -> bool:
+        """Marks every copy of a source as deleted. Returns True if a live copy was found."""
+        with self._locked(exclusive=True):
+            self._sync()
+            found = url in self._live_sources
+            self._conn.execute("UPDATE sources SET deleted = 1 WHERE url = ?", (url,))
+            self._bump_version()
+            self._conn.commit()
+            self._refresh_live()
+        return found
+
+    def expire_if_due(self) -> None:
+        """Runs 'expire' if it has not run for EXPIRE_INTERVAL seconds (called after every write)."""
+        if time.monotonic() - self._last_expiry >= EXPIRE_INTERVAL:
+            self.expire()
+
+    def _mark_expired(self) -> int:
+        expired = self._conn.execute(
+            "UPDATE sources SET deleted = 1 WHERE deleted = 0 AND expires_at <= ?", (time.time(),)
+        ).rowcount
+        if expired:
+            self._bump_version()
+        self._conn.commit()
+        self._refresh_live()
+        return expired
+
+    def expire(self) -> int:
+        """
+        Marks sources past their expiry as deleted, then compacts the vectors
+        file if enough of it is dead.
+
+        Returns:
+            int: The number of sources that expired.
+        """
+        with self._locked(exclusive=True):
+            self._sync()
+            self._last_expiry = time.monotonic()
+            expired = self._mark_expired()
+            total = len(self._chunk_sources)
+            if total and (total - int(self._live.sum())) / total >= COMPACT_RATIO:
+                self.compact()
+        if expired:
+            log.info(f"Research Corpus: {expired} sources expired.")
+        return expired
+
+    def compact(self) -> None:
+        """
+        Drops the rows of deleted sources: the live rows are copied to the
+        next generation's vectors file and renumbered in one transaction, so
+        an interrupted compaction leaves the previous generation intact.
+        """
+        with self._locked(exclusive=True):
+            self._sync()
+            # Live rows must be exactly the rows of sources not marked deleted
+            self._mark_expired()
+            matrix = self._matrix()
+            if matrix is None:
+                return
+            keep = np.flatnonzero(self._live)
+            path = self._vectors_path(self.generation + 1)
+            with open(path, "wb") as f:
+                for start in range(0, len(keep), SEARCH_BLOCK):
+                    f.write(np.ascontiguousarray(matrix[keep[start:start + SEARCH_BLOCK]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._matrix_cache = matrix = None
+
+            dead = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] - len(keep)
+            self._conn.execute("DELETE FROM chunks WHERE source_id IN (SELECT id FROM sources WHERE deleted = 1)")
+            self._conn.execute("DELETE FROM sources WHERE deleted = 1")
+            # Ascending, so a chunk's new id is always free (dead rows are gone, earlier ones moved)
+            self._conn.executemany("UPDATE chunks SET id = ? WHERE id = ?",
+                                   [(new, old) for new, old in enumerate(keep.tolist()) if new != old])
+            self._set_meta("generation", self.generation + 1)
+            self._bump_version()
+            self._conn.commit()
+            self._load()
+            self._remove_stale_generations()
+        log.info(f"Research Corpus: Compacted {dead} dead chunk rows (generation {self.generation}).")
+
+    # --- Search ---
+    def embed_queries(self, questions: List[str]) -> Optional[np.ndarray]:
+        """The L2-normalized query vectors of some questions, or None if they can't be embedded."""
+        try:
+            if hasattr(self.embeddings, "embed_queries"):
+                vectors = self.embeddings.embed_queries(questions)
+            else:
+                vectors = [self.embeddings.embed_query(q) for q in questions]
+        except Exception as e:
+            log.warning(f"Research Corpus: Could not embed the questions: {e}")
+            return None
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+    def search(self, query_vectors: np.ndarray, k: int,
+               exclude: Optional[Set[str]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        The k most similar live chunks (cosine similarity) for each query
+        vector, skipping the sources in 'exclude' (URLs).
+
+        Returns:
+            List[List[Tuple[int, float]]]: (chunk id, similarity) pairs per query, best first.
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True).clip(min=1e-12)
+        with self._locked():
+            self._sync()
+            matrix = self._matrix()
+            if matrix is None or not self._live.any() or query_vectors.shape[1] != self.dim:
+                return [[] for _ in query_vectors]
+            mask = self._live.copy()
+            if exclude:
+                excluded = [self._live_sources[url] for url in exclude if url in self._live_sources]
+                mask &= ~np.isin(self._chunk_sources, excluded)
+
+            scores = np.empty((len(query_vectors), len(mask)), dtype=np.float32)
+            for start in range(0, len(mask), SEARCH_BLOCK):
+                scores[:, start:start + SEARCH_BLOCK] = query_vectors @ matrix[start:start + SEARCH_BLOCK].T
+        scores[:, ~mask] = -np.inf
+
+        k = min(k, int(mask.sum()))
+        results = []
+        for row in scores:
+            if k <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([(int(i), float(row[i])) for i in top])
+        return results
+
+    def search_chunks(self, query_vectors: np.ndarray, k: int,
+                      exclude: Optional[Set[str]] = None) -> List[List[Tuple[str, str, float]]]:
+        """
+        Like 'search', but with each chunk's text and source URL, read under
+        the same lock (a compaction by another process renumbers chunk ids).
+
+        Returns:
+            List[List[Tuple[str, str, float]]]: (text, source URL, similarity) per query, best first.
+        """
+        with self._locked():
+            return [[(*self._chunk(chunk_id), similarity) for chunk_id, similarity in hits]
+                    for hits in self.search(query_vectors, k, exclude)]
+
+    def _chunk(self, chunk_id: int) -> Tuple[str, str]:
+        """The (text, source URL) of a chunk (call with the corpus locked)."""
+        url, text = self._conn.execute(
+            "SELECT s.url, substr(s.content, c.start + 1, c.end - c.start) "
+            "FROM chunks c JOIN sources s ON s.id = c.source_id WHERE c.id = ?", (chunk_id,)
+        ).fetchone()
+        return text, url
+
+    def covered_sources(self, questions: Sequence[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        The stored source that answers each well-covered question: one with
+        at least 'min_hits' chunks at 'min_similarity' or more among its top
+        matches. For those questions, the web search can be skipped.
+
+        Returns:
+            Dict[str, Tuple[str, str]]: (URL, text) of the best-matching source, by question.
+        """
+        if self.min_hits <= 0 or not questions:
+            return {}
+        vectors = self.embed_queries(list(questions))
+        if vectors is None:
+            return {}
+
+        covered = {}
+        with self._locked():
+            for question, hits in zip(questions, self.search(vectors, max(self.min_hits, 8))):
+                good = [chunk_id for chunk_id, similarity in hits if similarity >= self.min_similarity]
+                if len(good) < self.min_hits:
+                    continue
+                # The source of the best hit answers the question
+                covered[question] = self._conn.execute(
+                    "SELECT url, content FROM sources WHERE id = ?", (int(self._chunk_sources[good[0]]),)
+                ).fetchone()
+            self.hits += len(covered)
+            self.misses += len(questions) - len(covered)
+        record(cache_hits=len(covered), cache_misses=len(questions) - len(covered))
+        return covered
+
+    # --- Stats ---
+    def stats(self) -> dict:
+        with self._locked():
+            self._sync()
+            (sources,) = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()
+            path = self._vectors_path(self.generation)
+            lookups = self.hits + self.misses
+            return {
+                "sources": sources,
+                "live_sources": len(self._live_sources),
+                "chunks": len(self._chunk_sources),
+                "live_chunks": int(self._live.sum()),
+                "vector_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+                "covered": self.hits,
+                "coverage_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# --- Shared Corpus Instance ---
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def get_research_corpus() -> Optional[ResearchCorpus]:
+    """
+    Returns the process-wide research corpus of the current embedding model
+    (opened on first use), or None if CORPUS_ENABLED is off, retrieval is
+    'lexical' (no vectors) or no embedding backend is usable.
+    """
+    global _corpus
+    if not CORPUS_ENABLED or RETRIEVAL_MODE == "lexical":
+        return None
+    with _corpus_lock:
+        if _corpus is None:
+            # Imported here: the RAG tools pull in the embedding backends
+            from src.tools.rag_tools import get_embedding_model_id, get_embeddings
+            try:
+                model_id = get_embedding_model_id()
+                directory = os.path.join(CORPUS_DIR, re.sub(r"[^A-Za-z0-9._-]+", "_", model_id))
+                _corpus = ResearchCorpus(directory, get_embeddings(), model_id)
+                _corpus.expire()
+            except Exception as e:
+                log.warning(f"Research Corpus: Disabled, it could not be opened: {e}")
+                return None
+        return _corpus
@@ -0,0 +1,219 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+
+from src.settings import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_BREAKER_COOLDOWN,
+    HTTP_BREAKER_FAILURES,
+    HTTP_HEDGE_PERCENTILE,
+    HTTP_MIN_READ_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_TIMEOUT_FACTOR,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Latencies kept per host (the most recent requests)
+LATENCY_WINDOW = 64
+# A host's own latencies are used once it has this many; before that, all hosts' are
+MIN_SAMPLES = 8
+# Never hedge sooner than this (seconds), however fast the host usually is
+MIN_HEDGE_DELAY = 0.05
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+
+def _percentile(ordered: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyWindow:
+    """The latencies of the most recent requests (thread-safe)."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self._samples)
+        return _percentile(ordered, q) if ordered else None
+
+
+class HostHealth:
+    """
+    What the HTTP client knows about one host: its recent latencies and its
+    circuit breaker.
+
+    The breaker opens after 'failures' failed requests in a row; while open,
+    'check' raises 'CircuitOpen' at once, so callers fall back (e.g. to the
+    search snippet) instead of waiting for another timeout. After 'cooldown'
+    seconds one trial request is let through: success closes the breaker,
+    failure opens it again, and a trial ending without either (e.g. an
+    unwanted content type) lets the next request try.
+    """
+
+    def __init__(self, host: str, failures: int = HTTP_BREAKER_FAILURES, cooldown: float = HTTP_BREAKER_COOLDOWN):
+        self.host = host
+        self.latency = LatencyWindow()
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def check(self) -> bool:
+        """
+        Returns:
+            bool: True if this request is the half-open breaker's trial (the
+                  caller must then call 'end_trial' when it is done).
+
+        Raises:
+            CircuitOpen: If the breaker is open (or half open with its trial request already out).
+        """
+        if self.max_failures <= 0:
+            return False
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining <= 0 and not self._trial:
+                self._trial = True
+                log.info(f"HTTP Client: Trying '{self.host}' again after its cooldown.")
+                return True
+        raise CircuitOpen(f"Skipping '{self.host}': {self.failures} failed requests in a row "
+                          f"(retrying in {max(0.0, remaining):.0f}s).")
+
+    def record_success(self, seconds: Optional[float] = None) -> None:
+        if seconds is not None:
+            self.latency.add(seconds)
+        with self._lock:
+            if self.opened_at is not None:
+                log.info(f"HTTP Client: '{self.host}' is back, closing its circuit breaker.")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def end_trial(self) -> None:
+        """Ends the trial request; if it recorded neither a success nor a failure, the next request tries."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            reopen = self._trial
+            self._trial = False
+            if self.max_failures > 0 and (reopen or (self.opened_at is None and self.failures >= self.max_failures)):
+                self.opened_at = time.monotonic()
+                log.warning(f"HTTP Client: Opening the circuit breaker of '{self.host}' "
+                            f"after {self.failures} failures, for {self.cooldown:.0f}s.")
+
+    def to_dict(self) -> dict:
+        p50, p95 = self.latency.percentile(0.50), self.latency.percentile(0.95)
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "samples": len(self.latency),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class HostRegistry:
+    """
+    'HostHealth' per host, plus the latencies of all hosts together (used
+    for hosts seen too rarely to have their own, e.g. most scraped sites).
+    """
+
+    def __init__(self, read_timeout: float = HTTP_READ_TIMEOUT, min_read_timeout: float = HTTP_MIN_READ_TIMEOUT,
+                 timeout_factor: float = HTTP_TIMEOUT_FACTOR, hedge_percentile: float = HTTP_HEDGE_PERCENTILE):
+        self.read_timeout = read_timeout
+        self.min_read_timeout = min(min_read_timeout, read_timeout)
+        self.timeout_factor = timeout_factor
+        self.hedge_percentile = hedge_percentile
+        self.overall = LatencyWindow(size=4 * LATENCY_WINDOW)
+        self._hosts: Dict[str, HostHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> HostHealth:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostHealth(host)
+            return self._hosts[host]
+
+    def record_success(self, health: HostHealth, seconds: float) -> None:
+        health.record_success(seconds)
+        self.overall.add(seconds)
+
+    def _latency(self, health: HostHealth, q: float) -> Optional[float]:
+        window = health.latency if len(health.latency) >= MIN_SAMPLES else self.overall
+        return window.percentile(q) if len(window) >= MIN_SAMPLES else None
+
+    def read_timeout_for(self, health: HostHealth) -> float:
+        """HTTP_TIMEOUT_FACTOR x the host's p95 latency, within [HTTP_MIN_READ_TIMEOUT, HTTP_READ_TIMEOUT]."""
+        p95 = self._latency(health, 0.95)
+        if p95 is None:
+            return self.read_timeout
+        return min(self.read_timeout, max(self.min_read_timeout, self.timeout_factor * p95))
+
+    def hedge_delay(self, health: HostHealth) -> Optional[float]:
+        """Seconds after which a duplicate request is sent (None: don't hedge)."""
+        if self.hedge_percentile <= 0:
+            return None
+        latency = self._latency(health, self.hedge_percentile)
+        return None if latency is None else max(MIN_HEDGE_DELAY, latency)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: health.to_dict() for host, health in hosts.items()}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None,
+                  base: float = HTTP_BACKOFF_BASE, cap: float = HTTP_BACKOFF_MAX) -> float:
+    """
+    Seconds to wait before retry 'attempt' (0-based) of a 429 / 503 response:
+    "full jitter" exponential backoff, random in [0, base * 2^attempt], so
+    concurrent callers don't retry in lockstep. A 'Retry-After' header
+    (seconds or an HTTP date) is honoured instead, up to 'cap'.
+    """
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(cap, max(0.0, seconds))
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,485 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.crew.outputs import output_to_dict
+from src.crew.tasks import ConsolidatedData
+from src.crew.token_budget import budget_sources
+from src.settings import CHUNK_OVERLAP, CHUNK_SIZE, DEDUP_ENABLED, RETRIEVAL_MODE
+from src.tools.bm25 import BM25Index, reciprocal_rank_fusion
+from src.tools.chunking import get_chunk_cache
+from src.tools.dedup import dedupe_sources, near_duplicates, record_dedup
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# How many retrieval sessions (i.e. distinct corpora) we keep alive at once
+MAX_SESSIONS = 4
+# How many corpora the corpus store keeps (a few per concurrent run is plenty)
+MAX_CORPORA = 16
+
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
+
+
+def _normalize_item(item: dict):
+    """Returns (source, content) with the same flexible key-checking the RAG tool always used."""
+    content = item.get('content') or item.get('Content')
+    source = item.get('source') or item.get('Source') or item.get('URL')
+    return source, content
+
+
+def corpus_fingerprint(context_list: List[dict]) -> str:
+    """Returns a stable id for a list of sources, independent of their order."""
+    digests = sorted(
+        hashlib.sha256(f"{source}\x00{content}".encode("utf-8")).hexdigest()
+        for source, content in map(_normalize_item, context_list)
+    )
+    return hashlib.sha256("".join(digests).encode("utf-8")).hexdigest()
+
+
+def corpus_id(context_list: List[dict]) -> str:
+    """The short id of a list of sources in the corpus store (e.g. 'corpus-3f9a0c1b2d4e')."""
+    return f"corpus-{corpus_fingerprint(context_list)[:12]}"
+
+
+def format_snippets(chunks) -> str:
+    """Formats retrieved (text, source) chunks with their [Source: ...] tags, de-duplicating repeats."""
+    snippets = []
+    for text, src in chunks:
+        snippet_text = f"{text.strip()} [Source: {src or 'Unknown Source'}]"
+        if snippet_text not in snippets:
+            snippets.append(snippet_text)
+    return "\n---\n".join(snippets)
+
+
+class RetrievalSession:
+    """
+    A run-scoped RAG index over one corpus of sources.
+
+    The corpus is chunked and indexed exactly once: a BM25 inverted index
+    and (unless in 'lexical' mode) a FAISS vector index over the same chunks.
+    All sub-questions of a plan can then be answered together with
+    'query_many', which embeds them in one batch and runs one multi-query
+    FAISS search instead of one index build + search per sub-question.
+
+    Chunk boundaries come from the process-wide chunk cache, so a source
+    seen before (in this corpus or another) is not split again, and its
+    chunk hashes are reused as embedding cache keys. Chunks are kept as
+    (document, start, end) offsets into the sources, not as strings.
+
+    In 'hybrid' mode the BM25 and vector rankings are merged with
+    reciprocal-rank fusion, so exact keyword matches are not lost. In
+    'lexical' mode no embedding call is made at all.
+
+    With a research corpus (see 'src/tools/research_corpus.py'), chunks of
+    sources stored by earlier runs are fused in as one more ranking, from
+    the same query vectors.
+    """
+
+    def __init__(self, context_list: List[dict], embeddings, chunk_size: int = CHUNK_SIZE,
+                 chunk_overlap: int = CHUNK_OVERLAP, mode: str = RETRIEVAL_MODE, corpus=None):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Choose one of: {', '.join(RETRIEVAL_MODES)}.")
+        self.context_list = context_list
+        self.embeddings = embeddings
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.mode = mode
+        # The persistent research corpus, searched alongside this session's own chunks
+        self.corpus = corpus if mode != "lexical" else None
+        self.fingerprint = corpus_fingerprint(context_list)
+        # The indexed sources, and one (document, start, end) row per chunk
+        self.documents: List[str] = []
+        self.document_sources: List[str] = []
+        self.chunks = np.empty((0, 3), dtype=np.int64)
+        self.index = None
+        self.bm25: Optional[BM25Index] = None
+        self.num_chunks = 0
+        # Answers computed ahead of time by 'prefetch', keyed by question
+        self.answers: Dict[str, str] = {}
+        self._built = False
+        self._lock = threading.Lock()
+
+    def chunk_text(self, i: int) -> str:
+        document, start, end = self.chunks[i].tolist()
+        return self.documents[document][start:end]
+
+    def chunk_source(self, i: int) -> str:
+        return self.document_sources[int(self.chunks[i, 0])]
+
+    def build(self) -> bool:
+        """
+        Chunks and indexes the corpus (only the first call does any work).
+
+        Returns:
+            bool: True if the index holds at least one chunk.
+        """
+        with self._lock:
+            if self._built:
+                return self.num_chunks > 0
+
+            chunk_cache = get_chunk_cache()
+            rows, hashes = [], []
+            for item in self.context_list:
+                source, content = _normalize_item(item)
+
+                # Only skip if content is truly missing or too short to be useful
+                if not content or len(content.strip()) < 50:
+                    log.warning(f"Retrieval: Skipping item with missing/short content or source: {item}")
+                    continue
+
+                chunked = chunk_cache.chunk(content, self.chunk_size, self.chunk_overlap)
+                document = len(self.documents)
+                self.documents.append(content)
+                self.document_sources.append(source)
+                rows.append(np.column_stack([np.full(len(chunked), document, dtype=np.int64), chunked.spans]))
+                if self.mode != "lexical":
+                    hashes.extend(chunked.hashes(content))
+
+            if rows:
+                self.chunks = np.concatenate(rows)
+            texts = [self.chunk_text(i) for i in range(len(self.chunks))]
+
+            if DEDUP_ENABLED and texts:
+                keep = self._drop_duplicate_chunks(texts)
+                texts = [texts[i] for i in keep]
+                hashes = [hashes[i] for i in keep] if hashes else hashes
+
+            self.num_chunks = len(texts)
+            if not texts:
+                log.warning("Retrieval: No valid text chunks found to index after filtering.")
+                self._built = True
+                return False
+
+            if self.mode != "vector":
+                self.bm25 = BM25Index(texts)
+                log.info(f"Retrieval: Built BM25 index over {self.num_chunks} chunks.")
+
+            if self.mode != "lexical":
+                # Imported here: not needed in 'lexical' mode, and slow to import
+                import faiss
+
+                # FAISS row i is chunk i, so results map straight back to self.chunks
+                log.info(f"Retrieval: Creating FAISS index with {self.num_chunks} text chunks...")
+                vectors = np.asarray(self._embed_documents(texts, hashes), dtype=np.float32)
+                self.index = faiss.IndexFlatL2(vectors.shape[1])
+                self.index.add(vectors)
+                log.info("Retrieval: FAISS index created successfully.")
+
+            self._built = True
+            return True
+
+    def _drop_duplicate_chunks(self, texts: List[str]) -> List[int]:
+        """
+        Drops chunks that nearly copy an earlier chunk (e.g. the same
+        abstract or paragraph in two sources), before anything is embedded.
+
+        Returns:
+            List[int]: The positions of the kept chunks in 'texts'.
+        """
+        duplicate_of = near_duplicates(texts)
+        keep = [i for i, dup in enumerate(duplicate_of) if dup is None]
+        removed = [text for text, dup in zip(texts, duplicate_of) if dup is not None]
+        if removed:
+            self.chunks = self.chunks[keep]
+        record_dedup("chunks", len(duplicate_of), removed,
+                     embeddings_avoided=len(removed) if self.mode != "lexical" else 0)
+        return keep
+
+    def _embed_documents(self, texts: List[str], hashes: List[str]) -> List[List[float]]:
+        # The cached client can skip re-hashing: the chunk cache already has the hashes
+        if hasattr(self.embeddings, "embed_hashed"):
+            return self.embeddings.embed_hashed(texts, hashes)
+        return self.embeddings.embed_documents(texts)
+
+    def _embed_queries(self, questions: List[str]) -> List[List[float]]:
+        # Use the batched query path when the embeddings client has one
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(questions)
+        return [self.embeddings.embed_query(q) for q in questions]
+
+    def _vector_rankings(self, vectors: np.ndarray, depth: int) -> List[List[int]]:
+        log.info(f"Retrieval: Running one FAISS search for {len(vectors)} questions.")
+        _, indices = self.index.search(vectors, depth)
+        return [[int(i) for i in row if i != -1] for row in indices]
+
+    def query_many(self, questions: List[str], k: int = 4,
+                   keywords: Optional[Dict[str, List[str]]] = None) -> Dict[str, str]:
+        """
+        Answers several questions with a single batched embedding call and
+        a single multi-query FAISS search (plus BM25, depending on the mode).
+
+        Args:
+            questions (List[str]): The sub-questions to retrieve snippets for.
+            k (int): Number of chunks to retrieve per question.
+            keywords (Dict[str, List[str]], optional): Extra search keywords per
+                question (e.g. the plan's 'keywords'), used by BM25.
+
+        Returns:
+            Dict[str, str]: Formatted snippets (with [Source: ...] tags) per question.
+                            Questions with no hits map to an empty string.
+        """
+        questions = list(dict.fromkeys(questions))
+        if not questions or not self.build():
+            return {q: "" for q in questions}
+
+        keywords = keywords or {}
+        # Fusion needs candidates beyond the top-k of each ranking
+        depth = min(self.num_chunks, k if self.mode != "hybrid" else k * 4)
+
+        vector_rankings = corpus_rankings = None
+        if self.index is not None:
+            vectors = np.asarray(self._embed_queries(questions), dtype=np.float32)
+            vector_rankings = self._vector_rankings(vectors, depth)
+            corpus_rankings = self._corpus_rankings(vectors, depth)
+
+        results = {}
+        for n, question in enumerate(questions):
+            rankings = []
+            if vector_rankings is not None:
+                rankings.append(vector_rankings[n])
+            if self.bm25 is not None:
+                lexical_query = " ".join([question, *keywords.get(question, [])])
+                rankings.append([i for i, _ in self.bm25.search(lexical_query, depth)])
+            if corpus_rankings and corpus_rankings[n]:
+                rankings.append(corpus_rankings[n])
+
+            ranked = reciprocal_rank_fusion(rankings) if len(rankings) > 1 else rankings[0]
+            results[question] = format_snippets(self._snippet(key) for key in ranked[:k])
+        return results
+
+    def _corpus_rankings(self, vectors: np.ndarray, depth: int) -> Optional[List[list]]:
+        """
+        Rankings of stored chunks from the research corpus, as ('corpus',
+        text, source) keys. Sources of this session and chunks below the
+        corpus's similarity threshold are left out, so the corpus only adds
+        knowledge.
+        """
+        if self.corpus is None:
+            return None
+        try:
+            hits = self.corpus.search_chunks(vectors, depth, exclude=set(self.document_sources))
+        except Exception as e:
+            log.warning(f"Retrieval: Research corpus search failed: {e}")
+            return None
+        return [[("corpus", text, source) for text, source, similarity in row
+                 if similarity >= self.corpus.min_similarity]
+                for row in hits]
+
+    def _snippet(self, key):
+        """The (text, source) of a ranked chunk: a row of this session or a ('corpus', text, source) key."""
+        if isinstance(key, tuple):
+            return key[1], key[2]
+        return self.chunk_text(key), self.chunk_source(key)
+
+    def persist(self) -> int:
+        """
+        Adds this session's sources to the research corpus, with their
+        chunk offsets and the vectors already in the FAISS index (nothing is
+        embedded again). Sources the corpus already holds are skipped.
+
+        Returns:
+            int: The number of sources added.
+        """
+        if self.corpus is None or self.index is None or not self.num_chunks:
+            return 0
+        vectors = self.index.reconstruct_n(0, self.num_chunks)
+        sources = []
+        for document, (content, source) in enumerate(zip(self.documents, self.document_sources)):
+            rows = np.flatnonzero(self.chunks[:, 0] == document)
+            if source:
+                sources.append((source, content, self.chunks[rows, 1:], vectors[rows]))
+        added = self.corpus.add_many(sources)
+        self.corpus.expire_if_due()
+        return added
+
+    def prefetch(self, questions: List[str], k: int = 4,
+                 keywords: Optional[Dict[str, List[str]]] = None) -> None:
+        """Answers all questions up front so later tool calls are just lookups."""
+        self.answers.update(self.query_many(questions, k=k, keywords=keywords))
+
+    def query(self, question: str, k: int = 4) -> str:
+        """Answers one question, using the prefetched answer when there is one."""
+        if question in self.answers:
+            log.info(f"Retrieval: Serving prefetched answer for: '{question}'")
+            return self.answers[question]
+        answer = self.query_many([question], k=k).get(question, "")
+        self.answers[question] = answer
+        return answer
+
+
+# --- Session Registry ---
+# Sessions are keyed by corpus fingerprint, so every call made with the same
+# 'sources' list (e.g. once per sub-question) reuses the same index.
+_sessions: "OrderedDict[str, RetrievalSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_session(context_list: List[dict], embeddings=None) -> RetrievalSession:
+    """
+    Returns the retrieval session for this corpus, creating it if needed.
+    Sessions with the default embeddings also search the research corpus.
+
+    Args:
+        context_list (List[dict]): The source objects ('source' + 'content').
+        embeddings: Embeddings client to use when a new session is created.
+                    Defaults to the shared, cache-backed client of the RAG tool.
+    """
+    fingerprint = corpus_fingerprint(context_list)
+    with _sessions_lock:
+        session = _sessions.get(fingerprint)
+        if session is not None:
+            _sessions.move_to_end(fingerprint)
+            return session
+
+        corpus = None
+        if embeddings is None and RETRIEVAL_MODE != "lexical":
+            from src.tools.rag_tools import get_embeddings
+            from src.tools.research_corpus import get_research_corpus
+            embeddings = get_embeddings()
+            # The corpus holds vectors of the shared client's model, so only its sessions use it
+            corpus = get_research_corpus()
+
+        session = RetrievalSession(context_list, embeddings, corpus=corpus)
+        _sessions[fingerprint] = session
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        return session
+
+
+# --- Corpus Store ---
+# In the 'agent' run mode, the summarizer used to pass the whole 'sources'
+# list to the RAG tools as a tool-call argument: the LLM re-emitted every
+# scraped document (up to 15k chars each) on every call. The search task
+# registers its sources here instead, and the tools only get the short id.
+class CorpusStore:
+    """
+    The sources of recent search stages, by corpus id.
+
+    Ids are derived from the content ('corpus_id'), so concurrent runs can
+    share the store without clashing, and a run that finds the same sources
+    again gets the same id (and the same retrieval session). The oldest
+    corpora are dropped beyond 'max_corpora'.
+    """
+
+    def __init__(self, max_corpora: int = MAX_CORPORA):
+        self.max_corpora = max_corpora
+        self._corpora: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, context_list: List[dict]) -> str:
+        """Stores the sources ('source' + 'content' dicts) and returns their corpus id."""
+        key = corpus_id(context_list)
+        with self._lock:
+            self._corpora[key] = context_list
+            self._corpora.move_to_end(key)
+            while len(self._corpora) > self.max_corpora:
+                self._corpora.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        with self._lock:
+            context_list = self._corpora.get(key.strip())
+            if context_list is not None:
+                self._corpora.move_to_end(key.strip())
+            return context_list
+
+
+corpus_store = CorpusStore()
+
+
+def get_corpus_session(key: str) -> Optional[RetrievalSession]:
+    """The retrieval session of a registered corpus, or None for an unknown corpus id."""
+    context_list = corpus_store.get(key)
+    return get_session(context_list) if context_list is not None else None
+
+
+def start_session(consolidated_data) -> Optional[RetrievalSession]:
+    """
+    Builds the run's retrieval session from the search stage output,
+    answers every sub-question of its plan in one batched search and adds
+    the sources to the research corpus for later runs.
+
+    Args:
+        consolidated_data: A 'ConsolidatedData' object, its dict/JSON form,
+                           or the search task's output.
+
+    Returns:
+        Optional[RetrievalSession]: The primed session, or None if the
+                                    data could not be read.
+    """
+    data = output_to_dict(consolidated_data)
+    if not data or "sources" not in data:
+        log.warning("Retrieval: Search output is not a ConsolidatedData object; skipping prefetch.")
+        return None
+
+    sources = [s.model_dump() if hasattr(s, "model_dump") else s for s in data["sources"]]
+    plan = data.get("plan") or {}
+    if hasattr(plan, "model_dump"):
+        plan = plan.model_dump()
+    questions = [sq["sub_question"] for sq in plan.get("research_plan", [])]
+    keywords = {sq["sub_question"]: sq.get("keywords", []) for sq in plan.get("research_plan", [])}
+
+    try:
+        corpus_store.register(sources)
+        session = get_session(sources)
+        session.prefetch(questions, keywords=keywords)
+    except Exception as e:
+        log.error(f"Retrieval: Failed to prime retrieval session. Error: {e}")
+        return None
+
+    if session.corpus is not None:
+        try:
+            added = session.persist()
+            log.info(f"Retrieval: Added {added} sources to the research corpus: {session.corpus.stats()}")
+        except Exception as e:
+            log.warning(f"Retrieval: Could not add the sources to the research corpus: {e}")
+
+    log.info(f"Retrieval: Session {session.fingerprint[:12]} ready "
+             f"({session.num_chunks} chunks, {len(questions)} prefetched questions).")
+    log.info(f"Retrieval: Chunk cache stats: {get_chunk_cache().stats()}")
+    return session
+
+
+def register_search_output(output) -> Optional[str]:
+    """
+    Callback of the 'agent' run mode's search Task.
+
+    Drops near-duplicate sources, compacts the rest to the 'sources' token
+    budget, registers them in the corpus store and primes their retrieval
+    session (see 'start_session'). Then it shrinks the Task's output, which the
+    summarize Task reads as its context, to the plan, the corpus id and the
+    source URLs: the summarizer passes the id to the RAG tools, and the
+    scraped text never goes through the LLM.
+
+    Returns:
+        Optional[str]: The corpus id, or None if the output was not a
+                       ConsolidatedData object (it is then left as is).
+    """
+    data = output_to_dict(output)
+    try:
+        # Drop syndicated copies, then compact the pages and fit them into the 'sources' token budget
+        data = budget_sources(dedupe_sources(ConsolidatedData.model_validate(data))) if data else None
+    except ValueError as e:
+        log.warning(f"Retrieval: Search output is not a ConsolidatedData object ({e}); leaving it as is.")
+        return None
+    session = start_session(data)
+    if session is None:
+        return None
+    key = corpus_id(session.context_list)
+    compact = {
+        "plan": data.plan.model_dump(),
+        "corpus_id": key,
+        "sources": [{"source": source, "chars": len(content or "")}
+                    for source, content in map(_normalize_item, session.context_list)],
+    }
+    if hasattr(output, "raw_output"):
+        output.raw_output = json.dumps(compact)
+    log.info(f"Retrieval: Registered {len(compact['sources'])} sources as '{key}'.")
+    return key
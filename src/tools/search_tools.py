@@ -1,16 +1,187 @@
 import os
-from chromadb import logger
+import threading
+from collections import OrderedDict
 import requests
 from crewai_tools import tool
-from bs4 import BeautifulSoup
 import json
 import logging
-import arxiv
+from src.tools.http_client import get_http_client
+from src.tools.extraction import extract_text as _extract_text
+from src.settings import GOOGLE_CSE_URL, SCRAPE_MAX_BYTES
+from src.tools.arxiv_client import get_arxiv_service
+from src.tracing import traced
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# *** THIS IS THE 503 FIX ***
+# Limit the content to a reasonable size to avoid overloading the embedding model
+MAX_CHARS_TO_SCRAPE = 15000
+
+# Don't download pages the server says aren't text (PDFs, images, ...)
+SCRAPE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Search snippets of recently seen result URLs, the scrape tool's fallback
+MAX_REMEMBERED_SNIPPETS = 512
+_snippets: "OrderedDict[str, str]" = OrderedDict()
+_snippets_lock = threading.Lock()
+
+# --- Plain Search / Scrape Functions ---
+# These do the actual work and raise on failure. The @tool wrappers below
+# format their results for the agents; the programmatic search stage
+# (src/crew/search_stage.py) calls them directly.
+
+@traced()
+def arxiv_search(query: str, max_results: int = 3) -> list[dict]:
+    """
+    Searches ArXiv for academic papers through the shared, rate-limited
+    arXiv service. Papers seen before are served from the local store.
+
+    Args:
+        query (str): The search query string.
+        max_results (int): Maximum number of papers to return.
+
+    Returns:
+        list[dict]: One dict per paper with 'title', 'published', 'summary' and 'url'.
+    """
+    return get_arxiv_service().search(query, max_results=max_results)
+
+
+@traced()
+def arxiv_lookup(ids: list[str]) -> list[dict]:
+    """
+    Bulk lookup of ArXiv papers by id (e.g. '2105.09492'), batched into as
+    few API requests as possible.
+
+    Args:
+        ids (list[str]): ArXiv ids or abs URLs.
+
+    Returns:
+        list[dict]: The papers found, in the order of 'ids'.
+    """
+    return get_arxiv_service().get_papers(ids)
+
+
+@traced()
+def google_search(query: str, num: int = 3) -> list[dict]:
+    """
+    Searches Google through the Custom Search JSON API.
+
+    Args:
+        query (str): The search query string.
+        num (int): Maximum number of results to return.
+
+    Returns:
+        list[dict]: One dict per result with 'title', 'snippet' and 'link'.
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    cse_id = os.getenv("GOOGLE_CSE_ID")
+    url = GOOGLE_CSE_URL
+    params = {'key': api_key, 'cx': cse_id, 'q': query, 'num': num}
+
+    # Not hedged: every CSE query is billed and counts against the daily quota
+    response = get_http_client().get(url, params=params, cache="google")
+    response.raise_for_status() # Raise error for bad responses
+    results = [
+        {"title": r.get('title', ''), "snippet": r.get('snippet', ''), "link": r['link']}
+        for r in response.json().get('items', [])
+    ]
+    _remember_snippets(results)
+    return results
+
+
+def _remember_snippets(results: list[dict]) -> None:
+    with _snippets_lock:
+        for r in results:
+            if r["snippet"]:
+                _snippets[r["link"]] = r["snippet"]
+                _snippets.move_to_end(r["link"])
+        while len(_snippets) > MAX_REMEMBERED_SNIPPETS:
+            _snippets.popitem(last=False)
+
+
+def search_snippet(url: str) -> str:
+    """The Google snippet of a URL from a recent search ('' if it wasn't a search result)."""
+    with _snippets_lock:
+        return _snippets.get(url, "")
+
+
+def extract_text(html, encoding: str = None, content_type: str = None) -> str:
+    """
+    Extracts the visible text of an HTML document, truncated to MAX_CHARS_TO_SCRAPE.
+    Navigation, footers, scripts and styles are skipped, and parsing stops
+    as soon as enough text has been collected (see src/tools/extraction.py).
+
+    Args:
+        html (bytes | str): The raw page content.
+        encoding (str, optional): Charset of the page, if known.
+        content_type (str, optional): The response Content-Type.
+
+    Returns:
+        str: The extracted text. Empty if the page had no text content.
+    """
+    return _extract_text(html, max_chars=MAX_CHARS_TO_SCRAPE, encoding=encoding, content_type=content_type)
+
+
+def _response_text(response) -> str:
+    content_type = response.headers.get("Content-Type", "")
+    # Only trust the charset if the server actually sent one
+    encoding = response.encoding if "charset" in content_type.lower() else None
+    return extract_text(response.content, encoding=encoding, content_type=content_type)
+
+
+@traced()
+def scrape_website(url: str) -> str:
+    """
+    Scrapes the visible text of a single webpage, truncated to MAX_CHARS_TO_SCRAPE.
+    At most SCRAPE_MAX_BYTES are downloaded, and non-text responses (PDFs,
+    images, ...) are rejected from their headers before the body is read.
+
+    Args:
+        url (str): The URL of the website to scrape.
+
+    Returns:
+        str: The extracted text. Empty if the page had no text content.
+
+    Raises:
+        requests.exceptions.RequestException: If the page could not be fetched.
+    """
+    response = get_http_client().get(
+        url, cache="scrape", max_bytes=SCRAPE_MAX_BYTES, accept=SCRAPE_CONTENT_TYPES, hedge=True
+    )
+    response.raise_for_status()
+    return _response_text(response)
+
+
+@traced()
+def scrape_many(urls: list[str]) -> dict:
+    """
+    Scrapes many webpages concurrently over the shared, pooled HTTP client.
+
+    Args:
+        urls (list[str]): The URLs to scrape.
+
+    Returns:
+        dict: Maps each URL to its extracted text, or to the Exception
+              raised while fetching it.
+    """
+    responses = get_http_client().fetch_many(
+        urls, cache="scrape", max_bytes=SCRAPE_MAX_BYTES, accept=SCRAPE_CONTENT_TYPES, hedge=True
+    )
+    results = {}
+    for url, response in zip(urls, responses):
+        if isinstance(response, Exception):
+            results[url] = response
+            continue
+        try:
+            results[url] = _response_text(response)
+        except Exception as e:
+            log.error(f"Scrape Tool: Unknown error scraping '{url}': {e}")
+            results[url] = e
+    return results
+
+
 # --- ArXiv Search Tool ---
 @tool("arxiv_search_tool")
 def arxiv_search_tool(query: str) -> str:
@@ -25,13 +196,7 @@ def arxiv_search_tool(query: str) -> str:
     """
     log.info(f"ArXiv Tool: Searching for '{query}'")
     try:
-        client = arxiv.Client()
-        search = arxiv.Search(
-            query=query,
-            max_results=3, # Get top 3 results
-            sort_by=arxiv.SortCriterion.Relevance
-        )
-        results = list(client.results(search))
+        results = arxiv_search(query, max_results=3) # Get top 3 results
         
         if not results:
             log.warning(f"ArXiv Tool: No results found for '{query}'")
@@ -40,10 +205,10 @@ def arxiv_search_tool(query: str) -> str:
         snippets = []
         for r in results:
             snippets.append(
-                f"Title: {r.title}\n"
-                f"Published: {r.published.date()}\n"
-                f"Summary: {r.summary}\n"
-                f"URL: {r.entry_id}"
+                f"Title: {r['title']}\n"
+                f"Published: {r['published']}\n"
+                f"Summary: {r['summary']}\n"
+                f"URL: {r['url']}"
             )
             
         log.info(f"ArXiv Tool: Found {len(snippets)} results.")
@@ -67,14 +232,7 @@ def google_search_tool(query: str) -> str:
     """
     log.info(f"Google Search Tool: Searching for '{query}'")
     try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        cse_id = os.getenv("GOOGLE_CSE_ID")
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {'key': api_key, 'cx': cse_id, 'q': query, 'num': 3}
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status() # Raise error for bad responses
-        results = response.json().get('items', [])
+        results = google_search(query, num=3)
 
         if not results:
             log.warning(f"Google Search Tool: No results found for '{query}'")
@@ -141,48 +299,35 @@ def google_search_tool(query: str) -> str:
 def scrape_website_tool(url: str) -> str:
     """
     Scrapes the text content of a single webpage.
+    If the page can't be scraped (403, timeout, a failing site, ...) and the
+    URL came from a Google search, the search snippet is returned instead.
     
     Args:
         url (str): The URL of the website to scrape.
         
     Returns:
-        str: The extracted text content, or an error message.
+        str: The extracted text content, the search snippet, or an error message.
     """
-    # *** THIS IS THE 503 FIX ***
-    # Limit the content to a reasonable size to avoid overloading the embedding model
-    MAX_CHARS_TO_SCRAPE = 15000 
-
     log.info(f"Scrape Tool: Scraping URL: '{url}'")
+    snippet = search_snippet(url)
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+        text = scrape_website(url)
         
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
-            
-        text = soup.get_text()
-        
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        if not text:
+        if not text or len(text) < len(snippet):
+            if snippet:
+                log.warning(f"Scrape Tool: Scrape of '{url}' was minimal. Returning snippet.")
+                return f"Scrape was minimal. Using snippet: {snippet}"
             log.warning(f"Scrape Tool: No text content found at '{url}'")
             return f"Error: No text content could be extracted from {url}."
-            
-        if len(text) > MAX_CHARS_TO_SCRAPE:
-            log.warning(f"Scrape Tool: Truncating scraped content from {len(text)} to {MAX_CHARS_TO_SCRAPE} chars.")
-            text = text[:MAX_CHARS_TO_SCRAPE]
         
         log.info(f"Scrape Tool: Successfully scraped {len(text)} characters.")
         return text
         
     except requests.exceptions.RequestException as e:
+        # Falling back here saves the agent an LLM round trip to retry or pick another URL
+        if snippet:
+            log.warning(f"Scrape Tool: Error scraping '{url}': {e}. Returning snippet.")
+            return f"Scrape failed. Using snippet: {snippet}"
         log.error(f"Scrape Tool: Error scraping '{url}': {e}")
         return f"Error: Failed to retrieve or scrape the URL {url}. Reason: {e}"
     except Exception as e:
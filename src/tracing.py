@@ -0,0 +1,328 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from src.settings import TRACE_DIR, TRACE_ENABLED
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Counters every span carries. They are recorded on the span where they
+# happen and rolled up to the parent spans in the profile.
+COUNTERS = ("tokens_in", "tokens_out", "bytes_fetched", "cache_hits", "cache_misses", "retries")
+
+
+class Span:
+    """
+    One timed unit of work: the whole run, a stage or Task, an LLM call or
+    a tool call. Spans form a tree through 'parent_id'.
+    """
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str] = None, **attributes):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self._perf_start = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        self.attributes = attributes
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.wall_seconds is None:
+            self.wall_seconds = time.perf_counter() - self._perf_start
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "span",
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "wall_seconds": round(self.wall_seconds, 4) if self.wall_seconds is not None else None,
+            "error": self.error,
+            **{k: v for k, v in self.counters.items() if v},
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Collects the spans of one run.
+
+    The tracer and the currently open span live in context variables, so
+    code anywhere below 'run_crew' can add spans ('span', 'traced') or
+    counters ('record') without the tracer being passed around.
+    """
+
+    def __init__(self, name: str, tasks: Optional[dict] = None,
+                 listener: Optional[Callable[[str, Span], None]] = None):
+        """
+        Args:
+            name (str): Name of the run (e.g. the research topic).
+            tasks (dict, optional): Span name -> crewai Task, used to name the
+                                    spans of Tasks run inside a Crew.
+            listener (callable, optional): Called with ('start' | 'end', span)
+                                           as spans open and close.
+        """
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.tasks = tasks or {}
+        self.listener = listener
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self.root = self.start_span(name, "run")
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span] = None, **attributes) -> Span:
+        span = Span(name, kind, parent.span_id if parent else None, **attributes)
+        with self._lock:
+            self.spans.append(span)
+        self._notify("start", span)
+        return span
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.finish(error)
+        self._notify("end", span)
+
+    def record(self, span: Span, **counters) -> None:
+        with self._lock:
+            for key, value in counters.items():
+                span.counters[key] = span.counters.get(key, 0) + value
+
+    def _notify(self, event: str, span: Span) -> None:
+        if self.listener is not None:
+            try:
+                self.listener(event, span)
+            except Exception as e:
+                log.warning(f"Tracing: Listener failed on '{event}' for '{span.name}': {e}")
+
+    # --- Export ---
+    def export_jsonl(self, path: str) -> str:
+        """Writes one JSON line per span, then one line with the profile."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.spans:
+                f.write(json.dumps({"trace_id": self.trace_id, **span.to_dict()}, default=str) + "\n")
+            f.write(json.dumps({"trace_id": self.trace_id, "type": "profile", **self.profile()}) + "\n")
+        return path
+
+    # --- Profile ---
+    def _rollup(self) -> Dict[str, dict]:
+        """Inclusive totals per span id (own counters plus all descendants')."""
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in self.spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        totals: Dict[str, dict] = {}
+
+        def visit(span: Span) -> dict:
+            total = dict(span.counters)
+            total["llm_calls"] = 1 if span.kind == "llm" else 0
+            total["tool_calls"] = 1 if span.kind == "tool" else 0
+            total["llm_seconds"] = (span.wall_seconds or 0.0) if span.kind == "llm" else 0.0
+            for child in children.get(span.span_id, []):
+                for key, value in visit(child).items():
+                    total[key] = total.get(key, 0) + value
+            totals[span.span_id] = total
+            return total
+
+        visit(self.root)
+        return totals
+
+    def profile(self) -> dict:
+        """
+        Where time and tokens went: one row per top-level stage or Task,
+        plus the slowest LLM and tool calls.
+        """
+        totals = self._rollup()
+        run_seconds = self.root.wall_seconds or (time.perf_counter() - self.root._perf_start)
+        stages = []
+        for span in self.spans:
+            if span.parent_id != self.root.span_id:
+                continue
+            total = totals.get(span.span_id, {})
+            stages.append({
+                "name": span.name,
+                "kind": span.kind,
+                "wall_seconds": round(span.wall_seconds or 0.0, 2),
+                "share": round((span.wall_seconds or 0.0) / run_seconds, 3) if run_seconds else 0.0,
+                **{k: int(v) if k != "llm_seconds" else round(v, 2) for k, v in total.items()},
+            })
+        slowest = sorted(
+            (s for s in self.spans if s.kind in ("llm", "tool") and s.wall_seconds is not None),
+            key=lambda s: s.wall_seconds, reverse=True
+        )[:5]
+        run_total = totals.get(self.root.span_id, {})
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "wall_seconds": round(run_seconds, 2),
+            "totals": {k: int(v) if k != "llm_seconds" else round(v, 2) for k, v in run_total.items()},
+            "stages": stages,
+            "slowest": [{"name": s.name, "kind": s.kind, "wall_seconds": round(s.wall_seconds, 2)} for s in slowest],
+        }
+
+    def format_profile(self) -> str:
+        """Renders 'profile()' as a plain-text table for the log."""
+        profile = self.profile()
+        header = (f"{'stage':<14}{'kind':<7}{'wall s':>8}{'% run':>7}{'llm':>5}{'tok in':>9}"
+                  f"{'tok out':>9}{'tools':>7}{'KB fetched':>12}{'cache hit':>11}{'retries':>9}")
+        lines = [f"Run profile '{profile['name']}' (trace {profile['trace_id']}, "
+                 f"{profile['wall_seconds']:.1f}s)", header]
+        for s in profile["stages"] + [{"name": "total", "kind": "", "wall_seconds": profile["wall_seconds"],
+                                       "share": 1.0, **profile["totals"]}]:
+            lines.append(
+                f"{s['name'][:13]:<14}{s['kind']:<7}{s['wall_seconds']:>8.2f}{s['share'] * 100:>6.0f}%"
+                f"{s.get('llm_calls', 0):>5}{s.get('tokens_in', 0):>9}{s.get('tokens_out', 0):>9}"
+                f"{s.get('tool_calls', 0):>7}{s.get('bytes_fetched', 0) / 1024:>12.0f}"
+                f"{s.get('cache_hits', 0):>11}{s.get('retries', 0):>9}"
+            )
+        if profile["slowest"]:
+            lines.append("Slowest calls: " + ", ".join(
+                f"{s['name']} ({s['kind']}) {s['wall_seconds']:.2f}s" for s in profile["slowest"]))
+        return "\n".join(lines)
+
+
+# --- Current Trace ---
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("tracer", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _current_tracer.get()
+
+
+def start_trace(name: str, tasks: Optional[dict] = None,
+                listener: Optional[Callable[[str, Span], None]] = None) -> Optional[Tracer]:
+    """
+    Starts tracing a run in the current context.
+
+    With TRACE_ENABLED off, a run is still traced in memory when a
+    'listener' wants its spans (e.g. to report progress), but nothing is
+    exported or logged.
+
+    Returns:
+        Optional[Tracer]: The tracer, or None if TRACE_ENABLED is off and
+                          there is no listener.
+    """
+    if not TRACE_ENABLED and listener is None:
+        return None
+    tracer = Tracer(name, tasks=tasks, listener=listener)
+    _current_tracer.set(tracer)
+    _current_span.set(tracer.root)
+    return tracer
+
+
+def finish_trace(tracer: Optional[Tracer], error: Optional[BaseException] = None) -> Optional[dict]:
+    """
+    Closes the run's root span, exports the trace to TRACE_DIR as JSON
+    lines and logs the profile.
+
+    Returns:
+        Optional[dict]: The profile, or None if there was no tracer.
+    """
+    if tracer is None:
+        return None
+    tracer.end_span(tracer.root, error)
+    if not TRACE_ENABLED:
+        _clear_current(tracer)
+        return tracer.profile()
+    try:
+        path = tracer.export_jsonl(os.path.join(TRACE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{tracer.trace_id}.jsonl"))
+        log.info(f"Tracing: Wrote {len(tracer.spans)} spans to '{path}'.")
+    except OSError as e:
+        log.warning(f"Tracing: Could not export trace {tracer.trace_id}: {e}")
+    log.info(tracer.format_profile())
+    _clear_current(tracer)
+    return tracer.profile()
+
+
+def _clear_current(tracer: Tracer) -> None:
+    if _current_tracer.get() is tracer:
+        _current_tracer.set(None)
+        _current_span.set(None)
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attributes):
+    """
+    Opens a child span of the current span for the duration of the block.
+    Does nothing (yields None) when no trace is running.
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    current = tracer.start_span(name, kind, _current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        tracer.end_span(current, e)
+        raise
+    else:
+        tracer.end_span(current)
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: Optional[str] = None, kind: str = "tool"):
+    """Decorator form of 'span' (the span is named after the function by default)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__name__, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(**counters) -> None:
+    """Adds counters (see COUNTERS) to the current span, if a trace is running."""
+    tracer = _current_tracer.get()
+    current = _current_span.get()
+    if tracer is not None and current is not None:
+        tracer.record(current, **counters)
+
+
+def propagate_context(fn):
+    """
+    Wraps 'fn' so that, when it runs on a worker thread, it sees the trace
+    (and any other context variables) of the thread that wrapped it.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Each call gets its own copy: one Context can't be entered by two threads at once
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+# --- LangChain / crewai Integration ---
+def attach_tracing(agent) -> None:
+    """
+    Adds the tracing handler to a crewai agent: to its executor callbacks
+    (Task spans) and to its LLM's callbacks (LLM spans). Safe to call twice.
+    """
+    # Imported here: the handler is a LangChain callback, and langchain_core is slow to import
+    from src.tracing_callbacks import tracing_handler
+
+    callbacks = list(agent.callbacks or [])
+    if tracing_handler not in callbacks:
+        agent.callbacks = callbacks + [tracing_handler]
+    llm_callbacks = agent.llm.callbacks if isinstance(agent.llm.callbacks, list) else []
+    if tracing_handler not in llm_callbacks:
+        agent.llm.callbacks = llm_callbacks + [tracing_handler]
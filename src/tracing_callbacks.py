@@ -0,0 +1,155 @@
+import threading
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The trace's context variables: the handler opens and closes Task spans itself
+from src.tracing import _current_span, current_tracer
+
+# The LangChain side of the tracing (see 'src/tracing.py'). It lives apart so
+# that importing the tracing doesn't import langchain_core.
+
+
+def _count_tokens(texts: List[str]) -> int:
+    """Counts tokens with the stage budgets' counter (TOKEN_ENCODING), so traces and budgets agree."""
+    # Imported here: the token budgets import the crew's schemas and run stats
+    from src.crew.token_budget import count_tokens
+    return sum(count_tokens(t) for t in texts)
+
+
+def _token_usage(response) -> Optional[tuple]:
+    """Reads (tokens_in, tokens_out) reported by the provider, if any."""
+    usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata")
+    if usage:
+        tokens_in = usage.get("prompt_tokens", usage.get("input_tokens"))
+        tokens_out = usage.get("completion_tokens", usage.get("output_tokens"))
+        if tokens_in is not None and tokens_out is not None:
+            return int(tokens_in), int(tokens_out)
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return int(metadata.get("input_tokens", 0)), int(metadata.get("output_tokens", 0))
+    return None
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into spans:
+
+    - a crewai agent executor run (one per Task) becomes a 'task' span,
+      named after the matching entry of the tracer's 'tasks';
+    - every LLM call becomes an 'llm' span with tokens in/out (as reported
+      by the provider, or counted like the token budgets when it reports nothing);
+    - LangChain tool calls and retries are recorded too.
+    """
+
+    def __init__(self):
+        self._open: Dict = {}
+        self._lock = threading.Lock()
+
+    # --- Tasks ---
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        tracer = current_tracer()
+        # Only the top-level executor run of a Task, not the runnables inside it
+        if tracer is None or parent_run_id is not None or not isinstance(inputs, dict) or "tool_names" not in inputs:
+            return
+        prompt = str(inputs.get("input", ""))
+        name = next((n for n, task in tracer.tasks.items() if prompt.startswith(task.description)), "task")
+        parent = _current_span.get()
+        task_span = tracer.start_span(name, "task", parent)
+        # Tool and LLM spans opened while the Task runs nest under it
+        token = _current_span.set(task_span)
+        with self._lock:
+            self._open[run_id] = (tracer, task_span, parent, token)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close_task(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close_task(run_id, error)
+
+    def _close_task(self, run_id, error=None):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        tracer, task_span, parent, token = entry
+        tracer.end_span(task_span, error)
+        # Ended or failed, the Task's parent is the current span again
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # The Task ended in another context than it started in
+            _current_span.set(parent)
+
+    # --- LLM Calls ---
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start_llm(serialized, prompts, run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompts = [str(m.content) for batch in messages for m in batch]
+        self._start_llm(serialized, prompts, run_id)
+
+    def _start_llm(self, serialized, prompts, run_id):
+        tracer = current_tracer()
+        if tracer is None:
+            return
+        with self._lock:
+            if run_id in self._open:
+                return
+            name = (serialized or {}).get("kwargs", {}).get("model") or ((serialized or {}).get("id") or ["llm"])[-1]
+            llm_span = tracer.start_span(str(name), "llm", _current_span.get())
+            self._open[run_id] = (tracer, llm_span, prompts)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        tracer, llm_span, prompts = entry
+        usage = _token_usage(response)
+        if usage is None:
+            outputs = [g.text for generations in response.generations for g in generations]
+            usage = (_count_tokens(prompts), _count_tokens(outputs))
+            llm_span.attributes["tokens_estimated"] = True
+        tracer.record(llm_span, tokens_in=usage[0], tokens_out=usage[1])
+        tracer.end_span(llm_span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is not None:
+            tracer, llm_span, _ = entry
+            tracer.end_span(llm_span, error)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.get(run_id)
+        if entry is not None:
+            tracer, open_span = entry[0], entry[1]
+            tracer.record(open_span, retries=1)
+
+    # --- LangChain Tools ---
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        tracer = current_tracer()
+        if tracer is None:
+            return
+        tool_span = tracer.start_span((serialized or {}).get("name", "tool"), "tool", _current_span.get())
+        with self._lock:
+            self._open[run_id] = (tracer, tool_span, None)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._close_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close_tool(run_id, error)
+
+    def _close_tool(self, run_id, error=None):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is not None:
+            entry[0].end_span(entry[1], error)
+
+
+tracing_handler = TracingCallbackHandler()
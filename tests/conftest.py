@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path so we can import 'src'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Keep the tests' caches (embeddings, HTTP responses, corpus, ...) out of the project's .cache/
+os.environ["AUTORESEARCH_CACHE_DIR"] = tempfile.mkdtemp(prefix="autoresearch-tests-")
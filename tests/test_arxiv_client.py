@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.tools.arxiv_client import ArxivService, PaperStore, RateLimiter, normalize_arxiv_id
+
+
+def fake_result(paper_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id=f"http://arxiv.org/abs/{paper_id}v2",
+        title=f"Paper {paper_id}",
+        published=datetime(2024, 5, 1),
+        summary=f"The abstract of {paper_id}.",
+        authors=[SimpleNamespace(name="A. Author")],
+    )
+
+
+class FakeClient:
+    """Stands in for 'arxiv.Client', recording each request's id list or query."""
+
+    def __init__(self):
+        self.calls = []
+
+    def results(self, search):
+        if search.id_list:
+            self.calls.append(list(search.id_list))
+            return [fake_result(i) for i in search.id_list]
+        self.calls.append(search.query)
+        return [fake_result(f"2401.0000{n}") for n in range(search.max_results)]
+
+
+def open_service(tmp_path, query_ttl=3600) -> ArxivService:
+    service = ArxivService(PaperStore(str(tmp_path / "arxiv.sqlite3"), query_ttl=query_ttl),
+                           min_interval=0, batch_size=2)
+    service.client = FakeClient()
+    return service
+
+
+def test_ids_are_normalized():
+    assert normalize_arxiv_id("http://arxiv.org/abs/2105.09492v2/") == "2105.09492"
+    assert normalize_arxiv_id(" 2105.09492v10 ") == "2105.09492"
+    assert normalize_arxiv_id("cs/0112017") == "cs/0112017"
+
+
+def test_missing_papers_are_fetched_in_batches_and_stored(tmp_path):
+    service = open_service(tmp_path)
+    service.store.put_papers([{"id": "2301.00001", "title": "Stored", "published": "2023-01-01",
+                               "summary": "", "url": "", "authors": []}])
+
+    ids = ["2301.00001v3", "2401.00001", "http://arxiv.org/abs/2401.00002v1", "2401.00003", "2401.00001v2"]
+    papers = service.get_papers(ids)
+    assert [p["id"] for p in papers] == ["2301.00001", "2401.00001", "2401.00002", "2401.00003"]
+    # The stored paper is not fetched; the other three go in batches of two
+    assert service.client.calls == [["2401.00001", "2401.00002"], ["2401.00003"]]
+    assert service.stats() == {"requests": 2, "store_hits": 1, "papers_stored": 4}
+
+    assert len(open_service(tmp_path).get_papers(ids)) == 4
+    assert service.client.calls == [["2401.00001", "2401.00002"], ["2401.00003"]]
+
+
+def test_repeated_searches_are_served_from_the_store(tmp_path):
+    service = open_service(tmp_path)
+    first = service.search("LLM  Agents", max_results=2)
+    assert service.search("llm agents", max_results=2) == first
+    assert service.client.calls == ["LLM  Agents"]
+    # More results is another query
+    service.search("llm agents", max_results=3)
+    assert len(service.client.calls) == 2
+
+
+def test_expired_searches_are_fetched_again(tmp_path):
+    service = open_service(tmp_path, query_ttl=60)
+    service.search("llm agents", max_results=2)
+    service.store._conn.execute("UPDATE queries SET fetched_at = ?", (time.time() - 120,))
+    service.search("llm agents", max_results=2)
+    assert service.client.calls == ["llm agents", "llm agents"]
+
+
+def test_rate_limiter_spaces_concurrent_callers():
+    limiter = RateLimiter(min_interval=0.05)
+    times = []
+
+    def call():
+        limiter.wait()
+        times.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # The n-th caller waits for its slot, n intervals after the first
+    assert all(t - start >= n * 0.05 - 0.005 for n, t in enumerate(sorted(times)))
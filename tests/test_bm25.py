@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from src.tools.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    "Retrieval augmented generation retrieves passages for the model.",
+    "The model plans, then the model acts.",
+    "Cooking pasta takes ten minutes.",
+]
+
+
+def reference_score(query, docs, k1=1.5, b=0.75):
+    """Okapi BM25 written out term by term."""
+    tokenized = [tokenize(d) for d in docs]
+    avg = sum(map(len, tokenized)) / len(docs)
+    scores = []
+    for terms in tokenized:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in t for t in tokenized)
+            if not df:
+                continue
+            tf = terms.count(term)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(terms) / avg))
+        scores.append(score)
+    return scores
+
+
+def test_scores_match_okapi_bm25():
+    query = "How does the model retrieve passages?"
+    assert BM25Index(DOCS).scores(query).tolist() == pytest.approx(reference_score(query, DOCS), rel=1e-5)
+
+
+def test_search_ranks_matches_and_skips_documents_without_a_shared_term():
+    index = BM25Index(DOCS)
+    assert [doc for doc, _ in index.search("model", k=3)] == [1, 0]
+    assert index.search("the what how", k=3) == []
+    assert BM25Index([]).search("model", k=3) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    # 'b' is second in both lists, 'a' and 'c' are first in one list only
+    assert reciprocal_rank_fusion([["a", "b"], ["c", "b"]]) == ["b", "a", "c"]
+    assert reciprocal_rank_fusion([[3, 1, 2]], k=60) == [3, 1, 2]
+    assert reciprocal_rank_fusion([]) == []
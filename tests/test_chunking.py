@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.tools.chunking import ChunkCache, fast_split, langchain_split
+
+WORDS = ["agents", "plan", "retrieval", "augmented", "generation", "a", "benchmark", "of", "reasoning"]
+
+
+def make_text(seed: int = 1, paragraphs: int = 30) -> str:
+    rng = random.Random(seed)
+    return "\n\n".join(
+        "\n".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(rng.randint(1, 4)))
+        for _ in range(paragraphs)
+    )
+
+
+def covered(text: str, spans: np.ndarray) -> np.ndarray:
+    mask = np.zeros(len(text), dtype=bool)
+    for start, end in spans.tolist():
+        mask[start:end] = True
+    return mask
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_fast_split_chunks_are_bounded_trimmed_words_with_bounded_overlap(seed):
+    text = make_text(seed)
+    spans = fast_split(text, chunk_size=300, chunk_overlap=50)
+    for (start, end), (next_start, _) in zip(spans.tolist(), spans[1:].tolist()):
+        assert next_start > start and end - next_start <= 50
+    for start, end in spans.tolist():
+        chunk = text[start:end]
+        assert 0 < len(chunk) <= 300 and chunk == chunk.strip()
+        assert start == 0 or text[start - 1].isspace()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_fast_split_covers_the_text_like_langchain(seed):
+    text = make_text(seed)
+    fast = fast_split(text, chunk_size=300, chunk_overlap=50)
+    reference = langchain_split(text, chunk_size=300, chunk_overlap=50)
+    non_space = np.array([not c.isspace() for c in text])
+    # Every non-space character is in some chunk, with both splitters
+    assert (covered(text, fast) | ~non_space).all()
+    assert (covered(text, reference) | ~non_space).all()
+    assert abs(len(fast) - len(reference)) <= 0.15 * len(reference)
+    assert (reference[:, 1] - reference[:, 0]).max() <= 300
+
+
+def test_chunks_end_at_the_paragraph_break_like_langchain():
+    text = ("first paragraph " * 12).strip() + "\n\n" + ("second paragraph " * 11).strip()
+    fast, reference = fast_split(text, 300, 50), langchain_split(text, 300, 50)
+    assert fast[:, 1].tolist() == reference[:, 1].tolist() == [text.index("\n\n"), len(text)]
+    # Unlike LangChain, the next chunk repeats the end of the previous paragraph
+    assert reference[1, 0] > reference[0, 1] and 0 < fast[0, 1] - fast[1, 0] <= 50
+
+
+def test_text_without_break_points_is_cut_at_the_chunk_size():
+    spans = fast_split("x" * 700, chunk_size=300, chunk_overlap=50)
+    assert spans.tolist() == [[0, 300], [300, 600], [600, 700]]
+    assert fast_split("   ", 300, 50).shape == (0, 2)
+
+
+def test_chunk_cache_splits_each_text_once():
+    cache = ChunkCache(max_entries=4)
+    text = make_text()
+    first = cache.chunk(text, 300, 50)
+    assert cache.chunk(text, 300, 50) is first
+    assert cache.chunk(text, 200, 50) is not first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+    assert first.texts(text)[0] == text[first.spans[0, 0]:first.spans[0, 1]]
@@ -0,0 +1,37 @@
+from src.crew.run_stats import start_run_stats
+from src.crew.tasks import ConsolidatedData, ResearchPlan, SourceItem, SubQuestion
+from src.tools.dedup import dedupe_sources, near_duplicates
+
+ARTICLE = ("Retrieval augmented generation grounds a language model in documents fetched at query time. "
+           "The retriever ranks passages by their similarity to the question, and the model reads the best "
+           "few before it answers. Benchmarks show fewer hallucinated facts when the passages are relevant, "
+           "and the index can be refreshed without retraining the model itself.")
+# The same article syndicated elsewhere, with one word changed
+COPY = ARTICLE.replace("fewer", "far fewer")
+OTHER = ("Chain of thought prompting asks a model to write out intermediate reasoning steps before the final "
+         "answer. It helps most on arithmetic and multi-step logic problems, and larger models benefit more "
+         "than small ones, which often produce fluent but wrong chains of reasoning.")
+
+
+def test_near_copies_point_at_the_first_text():
+    assert near_duplicates([ARTICLE, OTHER, COPY, ARTICLE]) == [None, None, 0, 0]
+
+
+def test_empty_and_distinct_texts_are_kept():
+    assert near_duplicates(["", "", OTHER, ARTICLE]) == [None, None, None, None]
+
+
+def test_dedupe_sources_keeps_the_first_copy_and_counts_the_rest():
+    stats = start_run_stats("hybrid")
+    plan = ResearchPlan(research_plan=[
+        SubQuestion(sub_question="What is RAG?", source_type="blogs", keywords=["rag"])])
+    data = ConsolidatedData(plan=plan, sources=[
+        SourceItem(source="https://a.example/rag", content=ARTICLE),
+        SourceItem(source="https://b.example/rag", content=COPY),
+        SourceItem(source="https://c.example/cot", content=OTHER),
+    ])
+
+    deduped = dedupe_sources(data)
+    assert [item.source for item in deduped.sources] == ["https://a.example/rag", "https://c.example/cot"]
+    assert deduped.plan == plan
+    assert stats.dedup["sources"]["total"] == 3 and stats.dedup["sources"]["removed"] == 1
@@ -0,0 +1,65 @@
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.tools.embedding_cache import CachedEmbeddings, EmbeddingCache, chunk_hash
+
+
+class AsymmetricEmbeddings(Embeddings):
+    """Embeds documents as [len, 0] and queries as [0, len], like a backend with query task types."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(("documents", list(texts)))
+        return [[float(len(t)), 0.0] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls.append(("query", text))
+        return [0.0, float(len(text))]
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=2)
+    cache.put_many("model", {"a": [1.0], "b": [2.0]})
+    time.sleep(0.01)
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get_many("model", ["a"]) == {"a": [1.0]}
+    time.sleep(0.01)
+    cache.put_many("model", {"c": [3.0]})
+
+    assert set(cache.get_many("model", ["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["entries"] == 2
+
+
+def test_documents_are_embedded_once_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    backend = AsymmetricEmbeddings()
+    CachedEmbeddings(backend, "model", cache=EmbeddingCache(path)).embed_documents(["one", "three", "one"])
+    assert backend.calls == [("documents", ["one", "three"])]
+
+    vectors = CachedEmbeddings(backend, "model", cache=EmbeddingCache(path)).embed_hashed(
+        ["three"], [chunk_hash("three")])
+    assert vectors == [[5.0, 0.0]] and len(backend.calls) == 1
+
+
+def test_asymmetric_backend_queries_use_embed_query(tmp_path):
+    backend = AsymmetricEmbeddings()
+    embeddings = CachedEmbeddings(backend, "model", cache=EmbeddingCache(str(tmp_path / "e.sqlite3")))
+    embeddings.embed_documents(["what is rag"])
+
+    assert embeddings.embed_queries(["what is rag", "why"]) == [[0.0, 11.0], [0.0, 3.0]]
+    assert backend.calls[1:] == [("query", "what is rag"), ("query", "why")]
+    # Served from the query namespace, never from the document vectors
+    assert embeddings.embed_query("what is rag") == [0.0, 11.0]
+    assert len(backend.calls) == 3
+
+
+def test_symmetric_backend_batches_queries(tmp_path):
+    backend = AsymmetricEmbeddings()
+    embeddings = CachedEmbeddings(backend, "model", cache=EmbeddingCache(str(tmp_path / "e.sqlite3")),
+                                  symmetric=True)
+    embeddings.embed_queries(["a", "bb"])
+    assert backend.calls == [("documents", ["a", "bb"])]
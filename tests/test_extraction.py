@@ -0,0 +1,27 @@
+from src.tools.extraction import extract_text
+
+
+def test_form_wrapped_page_keeps_its_body():
+    html = '<body><form id="aspnetForm"><p>Main article body text here.</p></form></body>'
+    assert extract_text(html) == "Main article body text here."
+
+
+def test_article_header_keeps_the_title_but_page_header_is_chrome():
+    html = ("<body><header><a href='/'>Site logo</a></header>"
+            "<article><header><h1>The Title</h1></header><p>Body.</p></article></body>")
+    assert extract_text(html) == "The Title\nBody."
+
+
+def test_unclosed_skip_tag_ends_with_its_parent():
+    html = '<body><div class="menu"><nav><a href="/">Home</a></div><p>Article text.</p></body>'
+    assert extract_text(html) == "Article text."
+
+
+def test_unclosed_skip_tag_ends_where_main_starts():
+    html = "<body><nav><a href='/'>Home</a><main><p>Article text.</p></main></body>"
+    assert extract_text(html) == "Article text."
+
+
+def test_max_chars_stops_the_extraction():
+    text = extract_text("<p>" + "word " * 10_000 + "</p>", max_chars=20)
+    assert len(text) == 20 and text.startswith("word word")
@@ -0,0 +1,106 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.tools import http_client
+from src.tools.http_cache import HttpCache, normalize_url
+from src.tools.http_client import HttpClient
+
+ETAG = '"v1"'
+BODY = b"<p>cached page</p>"
+BIG_BODY = b"<p>" + b"long page " * 1000 + b"</p>"
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """
+    Serves one page with an ETag, answering 304 to a matching If-None-Match,
+    and a large page without validators at /big.
+    """
+
+    def do_GET(self):
+        self.server.seen.append(self.headers.get("If-None-Match"))
+        if self.path == "/big":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(BIG_BODY)))
+            self.end_headers()
+            self.wfile.write(BIG_BODY)
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    httpd.seen = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_search_api_url_drops_the_api_key_and_folds_the_query():
+    assert (normalize_url("HTTPS://Example.com/p?utm_source=x&b=2#top", {"key": "secret", "q": "  LLM  Agents "},
+                          source="google")
+            == "https://example.com/p?b=2&q=llm+agents")
+
+
+def test_distinct_scrape_urls_do_not_collide():
+    keys = {normalize_url(url, source="scrape") for url in (
+        "https://x.example/page?key=1", "https://x.example/page?key=2",
+        "https://x.example/search?q=Foo", "https://x.example/search?q=foo")}
+    assert len(keys) == 4
+    # Only tracking parameters are dropped
+    assert (normalize_url("https://x.example/page?key=1&utm_medium=mail&fbclid=a&gclid=b#top", source="scrape")
+            == "https://x.example/page?key=1")
+
+
+def test_stale_entry_is_revalidated(server, tmp_path, monkeypatch):
+    # A TTL of 0: every stored response is stale at once
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttls={"scrape": 0})
+    monkeypatch.setattr(http_client, "get_http_cache", lambda: cache)
+    client = HttpClient()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+    first = client.get(url, cache="scrape")
+    assert first.content == BODY and not first.from_cache
+
+    second = client.get(url, cache="scrape")
+    assert second.content == BODY and second.from_cache
+    assert server.seen == [None, ETAG]
+    assert cache.stats()["revalidated"] == 1 and cache.stats()["misses"] == 1
+    client.close()
+
+
+def test_truncated_body_is_flagged_and_not_served_to_a_larger_budget(server, tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path / "http.sqlite3"))
+    monkeypatch.setattr(http_client, "get_http_cache", lambda: cache)
+    client = HttpClient()
+    url = f"http://127.0.0.1:{server.server_address[1]}/big"
+
+    first = client.get(url, cache="scrape", max_bytes=100)
+    assert first.truncated and len(first.content) == 100
+
+    replayed = client.get(url, cache="scrape", max_bytes=100)
+    assert replayed.from_cache and replayed.truncated and replayed.content == first.content
+
+    # The stored start of the page can't serve a request that wants all of it
+    full = client.get(url, cache="scrape")
+    assert not full.from_cache and not full.truncated and full.content == BIG_BODY
+    assert not client.get(url, cache="scrape").truncated
+    assert len(server.seen) == 2
+    client.close()
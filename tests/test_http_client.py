@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.tools.http_client import HttpClient, UnsupportedContentType
+from src.tools.resilience import CircuitOpen
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    /ok: HTML, /pdf: a PDF, /error: 500, /slow: HTML after 'slow_seconds',
+    /busy: 429 (Retry-After: 0) for the first 'busy_requests', then HTML,
+    /down: 503.
+    """
+
+    def do_GET(self):
+        self.server.requests[self.path] += 1
+        if self.path == "/error":
+            self._send(500, "text/plain", b"boom")
+        elif self.path == "/busy" and self.server.requests[self.path] <= self.server.busy_requests:
+            self._send(429, "text/plain", b"slow down", retry_after="0")
+        elif self.path == "/down":
+            self._send(503, "text/plain", b"overloaded")
+        elif self.path == "/pdf":
+            self._send(200, "application/pdf", b"%PDF-1.4")
+        else:
+            if self.path == "/slow":
+                time.sleep(self.server.slow_seconds)
+            self._send(200, "text/html", b"<p>hello</p>")
+
+    def _send(self, status: int, content_type: str, body: bytes, retry_after: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if retry_after is not None:
+            self.send_header("Retry-After", retry_after)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = Counter()
+    httpd.slow_seconds = 0.3
+    httpd.busy_requests = 2
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def base_url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_breaker_trial_ending_without_verdict_lets_the_next_request_try(server):
+    client = HttpClient(max_retries=0)
+    health = client.hosts.get(f"127.0.0.1:{server.server_address[1]}")
+    health.max_failures, health.cooldown = 2, 0.1
+
+    for _ in range(2):
+        assert client.get(base_url(server) + "/error").status_code == 500
+    assert health.state == "open"
+    with pytest.raises(CircuitOpen):
+        client.get(base_url(server) + "/ok")
+
+    time.sleep(0.15)
+    assert health.state == "half_open"
+    # The trial request is rejected for its content type: neither a success nor a failure
+    with pytest.raises(UnsupportedContentType):
+        client.get(base_url(server) + "/pdf", accept=("text/",))
+
+    assert client.get(base_url(server) + "/ok").status_code == 200
+    assert health.state == "closed"
+    client.close()
+
+
+def test_hedging_is_opt_in(server):
+    client = HttpClient(max_retries=0)
+    # Hedge after the p50, so the slow requests below don't raise the hedge delay
+    client.hosts.hedge_percentile = 0.5
+    for _ in range(10):
+        client.get(base_url(server) + "/ok")
+
+    client.get(base_url(server) + "/slow", hedge=True)
+    time.sleep(server.slow_seconds)
+    assert server.requests["/slow"] == 2 and client.hedges == 1
+
+    client.get(base_url(server) + "/slow")
+    time.sleep(server.slow_seconds)
+    assert server.requests["/slow"] == 3 and client.hedges == 1
+    client.close()
+
+
+def test_throttled_requests_are_retried_after_retry_after(server):
+    client = HttpClient(max_retries=2)
+    start = time.monotonic()
+    assert client.get(base_url(server) + "/busy").status_code == 200
+    assert time.monotonic() - start < 1
+    assert server.requests["/busy"] == 3 and client.stats()["retries"] == 2
+    assert client.hosts.get(f"127.0.0.1:{server.server_address[1]}").failures == 0
+    client.close()
+
+
+def test_overload_after_the_last_retry_counts_as_a_failure(server, monkeypatch):
+    monkeypatch.setattr("src.tools.http_client.backoff_delay", lambda attempt, retry_after=None: 0)
+    client = HttpClient(max_retries=1)
+    assert client.get(base_url(server) + "/down").status_code == 503
+    assert server.requests["/down"] == 2
+    # One failure for the request, not one per attempt
+    assert client.hosts.get(f"127.0.0.1:{server.server_address[1]}").failures == 1
+    client.close()
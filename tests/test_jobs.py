@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import create_app
+from src.jobs import JobQueue, QueueFull
+from src.tracing import finish_trace, span, start_trace
+
+
+def fake_runner(job):
+    job.on_output("plan", f"Plan for {job.topic}")
+    return f"# Report on {job.topic}"
+
+
+def failing_runner(job):
+    raise ValueError("no sources found")
+
+
+def wait_for(job, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running"):
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.01)
+    return job
+
+
+def test_submit_status_result():
+    jobs = JobQueue(runner=fake_runner).start()
+    job = wait_for(jobs.submit("agents"))
+    assert job.status == "done" and job.report == "# Report on agents"
+    assert jobs.get(job.job_id).to_dict(include_outputs=True)["outputs"] == {"plan": "Plan for agents"}
+    jobs.shutdown()
+
+
+def test_failure_is_recorded_on_the_job():
+    jobs = JobQueue(runner=failing_runner).start()
+    job = wait_for(jobs.submit("agents"))
+    assert job.status == "failed" and job.error == "ValueError: no sources found"
+    assert jobs.stats()["failed"] == 1
+    jobs.shutdown()
+
+
+def test_shutdown_cancels_queued_jobs_and_full_queue_pushes_back():
+    release = threading.Event()
+
+    def blocking_runner(job):
+        release.wait(5)
+        return "report"
+
+    jobs = JobQueue(runner=blocking_runner, max_workers=1, max_queued=1).start()
+    running = jobs.submit("first")
+    while running.status != "running":
+        time.sleep(0.01)
+    queued = jobs.submit("second")
+    with pytest.raises(QueueFull):
+        jobs.submit("third")
+
+    jobs.shutdown(wait=False)
+    assert queued.status == "cancelled"
+    release.set()
+    assert wait_for(running).status == "done"
+    time.sleep(0.05)
+    assert queued.status == "cancelled" and queued.started is None
+
+
+def test_api_submit_poll_report():
+    with TestClient(create_app(JobQueue(runner=fake_runner))) as client:
+        response = client.post("/jobs", json={"topic": "agents"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        deadline = time.monotonic() + 5
+        while client.get(f"/jobs/{job_id}").json()["status"] != "done":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert client.get(f"/jobs/{job_id}/report").json()["report"] == "# Report on agents"
+        assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_api_reports_a_failed_job():
+    with TestClient(create_app(JobQueue(runner=failing_runner))) as client:
+        job_id = client.post("/jobs", json={"topic": "agents"}).json()["job_id"]
+        deadline = time.monotonic() + 5
+        while client.get(f"/jobs/{job_id}").json()["status"] != "failed":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        response = client.get(f"/jobs/{job_id}/report")
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Job failed: ValueError: no sources found"
+
+
+def test_stage_progress_and_outputs_are_visible_while_the_job_runs():
+    in_search, release = threading.Event(), threading.Event()
+
+    def traced_runner(job):
+        tracer = start_trace(job.topic, listener=job.on_span)
+        with span("plan"):
+            with span("llm", kind="llm"):
+                pass
+        job.on_output("plan", "1. **How do agents plan?**")
+        with span("search"):
+            in_search.set()
+            release.wait(5)
+        finish_trace(tracer)
+        return "# Report"
+
+    jobs = JobQueue(runner=traced_runner).start()
+    job = jobs.submit("agents")
+    assert in_search.wait(5)
+    progress = job.to_dict(include_outputs=True)
+    assert progress["status"] == "running" and progress["stage"] == "search"
+    # Only the stages directly under the run are listed, not their LLM calls
+    assert [(s["name"], s["status"]) for s in progress["stages"]] == [("plan", "done"), ("search", "running")]
+    assert progress["outputs"] == {"plan": "1. **How do agents plan?**"}
+    assert "outputs" not in job.to_dict()
+
+    release.set()
+    assert wait_for(job).stage is None and job.stages["search"]["status"] == "done"
+    jobs.shutdown()
+
+
+def test_a_failed_stage_is_marked_failed():
+    def failing_stage_runner(job):
+        tracer = start_trace(job.topic, listener=job.on_span)
+        try:
+            with span("search"):
+                raise ValueError("no sources found")
+        finally:
+            finish_trace(tracer)
+
+    jobs = JobQueue(runner=failing_stage_runner).start()
+    job = wait_for(jobs.submit("agents"))
+    assert job.status == "failed" and job.stages["search"]["status"] == "failed"
+    jobs.shutdown()
+
+
+def test_api_returns_stage_outputs_on_request():
+    with TestClient(create_app(JobQueue(runner=fake_runner))) as client:
+        job_id = client.post("/jobs", json={"topic": "agents"}).json()["job_id"]
+        deadline = time.monotonic() + 5
+        while client.get(f"/jobs/{job_id}").json()["status"] != "done":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert "outputs" not in client.get(f"/jobs/{job_id}").json()
+        assert client.get(f"/jobs/{job_id}?outputs=true").json()["outputs"] == {"plan": "Plan for agents"}
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.outputs import Generation
+
+from src.llm_cache import LLMCache, LLMCacheMiss
+
+LLM = "model=gemini temperature=0.1"
+ANSWER = [Generation(text="A plan with three sub-questions.")]
+
+
+def open_cache(tmp_path, **kwargs) -> LLMCache:
+    return LLMCache(str(tmp_path / "llm.sqlite3"), **kwargs)
+
+
+def test_completions_persist_across_instances(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.lookup("plan it", LLM) is None
+    cache.update("plan it", LLM, ANSWER)
+
+    reopened = open_cache(tmp_path)
+    assert reopened.lookup("plan it", LLM) == ANSWER
+    # Other parameters are another completion
+    assert reopened.lookup("plan it", "model=gemini temperature=0.3") is None
+    assert reopened.stats()["hits"] == 1 and reopened.stats()["misses"] == 1
+
+
+def test_record_mode_always_calls_the_llm_and_overwrites(tmp_path):
+    open_cache(tmp_path).update("plan it", LLM, ANSWER)
+    cache = open_cache(tmp_path, mode="record")
+    assert cache.lookup("plan it", LLM) is None
+    cache.update("plan it", LLM, [Generation(text="A new plan.")])
+    assert open_cache(tmp_path).lookup("plan it", LLM)[0].text == "A new plan."
+
+
+def test_replay_mode_serves_hits_and_raises_on_a_miss(tmp_path):
+    open_cache(tmp_path).update("plan it", LLM, ANSWER)
+    cache = open_cache(tmp_path, mode="replay")
+    assert cache.lookup("plan it", LLM) == ANSWER
+    with pytest.raises(LLMCacheMiss):
+        cache.lookup("write it", LLM)
+
+
+def test_replay_reaches_the_chat_model_through_langchain(tmp_path):
+    model = FakeListChatModel(responses=["recorded answer"], cache=open_cache(tmp_path))
+    assert model.invoke("plan it").content == "recorded answer"
+
+    # The same model settings ('responses' is one of them); the model itself is never called
+    replay = FakeListChatModel(responses=["recorded answer"], cache=open_cache(tmp_path, mode="replay"))
+    assert replay.invoke("plan it").content == "recorded answer" and replay.i == 0
+    with pytest.raises(LLMCacheMiss):
+        replay.invoke("an unseen prompt")
+
+
+def test_expired_completions_are_misses(tmp_path):
+    cache = open_cache(tmp_path, ttl=60)
+    cache.update("plan it", LLM, ANSWER)
+    cache._conn.execute("UPDATE completions SET created_at = ?", (time.time() - 120,))
+    assert cache.lookup("plan it", LLM) is None
+
+
+def test_least_recently_used_completions_are_evicted(tmp_path):
+    cache = open_cache(tmp_path)
+    for prompt in ("one", "two"):
+        cache.update(prompt, LLM, ANSWER)
+        time.sleep(0.01)
+    cache.lookup("one", LLM)
+    time.sleep(0.01)
+    # Room for two entries: storing a third evicts 'two', the least recently used
+    cache.max_bytes = cache.stats()["stored_bytes"] + 10
+    cache.update("three", LLM, ANSWER)
+
+    assert cache.lookup("two", LLM) is None
+    assert cache.lookup("one", LLM) == ANSWER and cache.lookup("three", LLM) == ANSWER
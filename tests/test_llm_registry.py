@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src import llm_setup
+from src.llm_setup import LLMRegistry
+
+CONFIGS = {"planner": {"temperature": 0.1}, "writer": {"temperature": 0.3}}
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Builds fake chat models instead of Gemini clients, and records each build's settings."""
+    configs = []
+
+    def fake_create_llm(**config):
+        configs.append(config)
+        return FakeListChatModel(responses=[f"answer at {config['temperature']}"])
+
+    monkeypatch.setattr(llm_setup, "create_llm", fake_create_llm)
+    return configs
+
+
+def test_all_roles_are_built_once_on_first_use(built):
+    registry = LLMRegistry(CONFIGS)
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(registry.get("writer"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # One client per role, built together and then shared
+    assert built == [{"temperature": 0.1}, {"temperature": 0.3}]
+    assert all(client is clients[0] for client in clients)
+    assert registry.get("writer").invoke("write it").content == "answer at 0.3"
+    with pytest.raises(KeyError):
+        registry.get("critic")
+
+
+def test_set_replaces_a_role_and_stats_count_its_calls(built):
+    registry = LLMRegistry(CONFIGS)
+    stand_in = FakeListChatModel(responses=["stand-in"])
+    registry.set("planner", stand_in)
+    assert registry.get("planner") is stand_in and built == []
+
+    registry.get("planner").invoke("plan it")
+    registry.get("planner").invoke("plan it again")
+    registry.get("writer").invoke("write it")
+    # Only the missing role was built
+    assert built == [{"temperature": 0.3}]
+    stats = registry.stats()
+    assert stats["roles"]["planner"]["calls"] == 2 and stats["roles"]["writer"]["calls"] == 1
+    assert stats["all"]["calls"] == 3 and stats["all"]["in_flight"] == 0
+
+
+def test_stats_before_any_client_exists():
+    assert LLMRegistry(CONFIGS).stats()["all"] is None
+
+
+def test_missing_api_key_is_reported(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    with pytest.raises(EnvironmentError):
+        LLMRegistry(CONFIGS).get("planner")
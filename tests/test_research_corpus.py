@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.tools.research_corpus import ResearchCorpus
+
+DIM = 8
+
+
+def source_vectors(writer: int, n: int, chunks: int = 3) -> np.ndarray:
+    """Vectors that identify their writer and source: rows are [writer, n, chunk, 1, 0, ...]."""
+    vectors = np.zeros((chunks, DIM), dtype=np.float32)
+    vectors[:, 0] = writer + 1
+    vectors[:, 1] = n + 1
+    vectors[:, 2] = np.arange(chunks) + 1
+    vectors[:, 3] = 1
+    return vectors
+
+
+def add_sources(directory: str, writer: int, count: int) -> None:
+    corpus = ResearchCorpus(directory, embeddings=None, model_id="test")
+    for n in range(count):
+        content = f"writer {writer} source {n} " * 10
+        spans = np.array([[0, 10], [10, 20], [20, 30]], dtype=np.int64)
+        corpus.add(f"https://example.com/{writer}/{n}", content, spans, source_vectors(writer, n))
+
+
+def test_add_search_delete_and_compact(tmp_path):
+    corpus = ResearchCorpus(str(tmp_path), embeddings=None, model_id="test")
+    spans = np.array([[0, 5], [6, 11]], dtype=np.int64)
+    assert corpus.add("https://a", "alpha alpha", spans, source_vectors(0, 0, 2))
+    assert not corpus.add("https://a", "alpha alpha", spans, source_vectors(0, 0, 2))
+    assert corpus.add("https://b", "bravo bravo", spans, source_vectors(0, 1, 2))
+
+    [hits] = corpus.search_chunks(source_vectors(0, 1, 2)[:1], k=1)
+    assert hits[0][:2] == ("bravo", "https://b")
+    assert corpus.search_chunks(source_vectors(0, 1, 2)[:1], k=4, exclude={"https://b"})[0][0][1] == "https://a"
+
+    assert corpus.delete("https://a")
+    corpus.expire()
+    assert corpus.generation == 1
+    assert os.listdir(tmp_path).count("vectors-0.f32") == 0
+    assert [source for _, source, _ in corpus.search_chunks(source_vectors(0, 0, 2)[:1], k=4)[0]] == ["https://b"] * 2
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    corpus = ResearchCorpus(str(tmp_path), embeddings=None, model_id="test")
+    corpus.add("https://a", "alpha alpha", np.array([[0, 5]]), source_vectors(0, 0, 1))
+    with open(tmp_path / "vectors-0.f32", "ab") as f:
+        f.write(np.ones(DIM, dtype=np.float32).tobytes())
+
+    reopened = ResearchCorpus(str(tmp_path), embeddings=None, model_id="test")
+    assert os.path.getsize(tmp_path / "vectors-0.f32") == DIM * 4
+    assert reopened.add("https://b", "bravo bravo", np.array([[0, 5]]), source_vectors(0, 1, 1))
+    assert reopened.search_chunks(source_vectors(0, 1, 1), k=1)[0][0][1] == "https://b"
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_two_writer_processes(tmp_path):
+    directory = str(tmp_path)
+    # Both open the corpus at the same generation before either appends
+    ResearchCorpus(directory, embeddings=None, model_id="test")
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=add_sources, args=(directory, writer, 25)) for writer in range(2)]
+    for process in writers:
+        process.start()
+    for process in writers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    conn = sqlite3.connect(os.path.join(directory, "corpus.sqlite3"))
+    rows = conn.execute("SELECT c.id, s.url FROM chunks c JOIN sources s ON s.id = c.source_id ORDER BY c.id").fetchall()
+    assert [chunk_id for chunk_id, _ in rows] == list(range(2 * 25 * 3))
+
+    # Every vector row belongs to the chunk with its id
+    matrix = np.fromfile(os.path.join(directory, "vectors-0.f32"), dtype=np.float32).reshape(-1, DIM)
+    assert len(matrix) == len(rows)
+    for (chunk_id, url), vector in zip(rows, matrix):
+        writer, n = (int(part) for part in url.rsplit("/", 2)[1:])
+        assert np.allclose(vector[:2] / vector[3], [writer + 1, n + 1])
+
+
+def test_reader_follows_another_process_compaction(tmp_path):
+    reader = ResearchCorpus(str(tmp_path), embeddings=None, model_id="test")
+    writer = ResearchCorpus(str(tmp_path), embeddings=None, model_id="test")
+    spans = np.array([[0, 5]], dtype=np.int64)
+    writer.add("https://a", "alpha", spans, source_vectors(0, 0, 1))
+    writer.add("https://b", "bravo", spans, source_vectors(0, 1, 1))
+    assert reader.has_source("https://b")
+
+    writer.delete("https://a")
+    writer.compact()
+    assert writer.generation == 1
+    [hits] = reader.search_chunks(source_vectors(0, 1, 1), k=4)
+    assert [(text, source) for text, source, _ in hits] == [("bravo", "https://b")]
+    assert reader.generation == 1
@@ -0,0 +1,88 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from src.tools.resilience import CircuitOpen, HostHealth, HostRegistry, backoff_delay
+
+
+def test_breaker_opens_after_consecutive_failures_only():
+    health = HostHealth("example.org", failures=3, cooldown=60)
+    health.record_failure()
+    health.record_failure()
+    health.record_success(0.1)
+    health.record_failure()
+    health.record_failure()
+    assert health.state == "closed" and health.check() is False
+
+    health.record_failure()
+    assert health.state == "open"
+    with pytest.raises(CircuitOpen):
+        health.check()
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    health = HostHealth("example.org", failures=1, cooldown=0.05)
+    health.record_failure()
+    time.sleep(0.06)
+    assert health.state == "half_open"
+    assert health.check() is True
+    # Only one trial at a time
+    with pytest.raises(CircuitOpen):
+        health.check()
+
+    # A failed trial opens the breaker for another cooldown
+    health.record_failure()
+    assert health.state == "open"
+    time.sleep(0.06)
+    assert health.check() is True
+    health.record_success(0.1)
+    health.end_trial()
+    assert health.state == "closed" and health.failures == 0
+
+
+def test_trial_without_verdict_lets_the_next_request_try():
+    health = HostHealth("example.org", failures=1, cooldown=0.05)
+    health.record_failure()
+    time.sleep(0.06)
+    assert health.check() is True
+    health.end_trial()
+    assert health.state == "half_open" and health.check() is True
+
+
+def test_breaker_can_be_disabled():
+    health = HostHealth("example.org", failures=0, cooldown=60)
+    for _ in range(10):
+        health.record_failure()
+    assert health.state == "closed" and health.check() is False
+
+
+def test_backoff_honours_retry_after_within_the_cap():
+    assert backoff_delay(0, "2", cap=30) == 2.0
+    assert backoff_delay(0, "120", cap=30) == 30
+    assert 8 <= backoff_delay(0, formatdate(time.time() + 10, usegmt=True), cap=30) <= 10
+    # A date in the past means "now"
+    assert backoff_delay(0, formatdate(time.time() - 10, usegmt=True), cap=30) == 0.0
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(3, base=0.5, cap=30) for _ in range(200)]
+    assert all(0 <= d <= 4.0 for d in delays) and len(set(delays)) > 100
+    assert all(0 <= backoff_delay(10, base=0.5, cap=3) <= 3 for _ in range(50))
+    # An unreadable Retry-After falls back to the jittered backoff
+    assert 0 <= backoff_delay(0, "soon", base=0.5) <= 0.5
+
+
+def test_read_timeout_follows_the_hosts_latency():
+    hosts = HostRegistry(read_timeout=20, min_read_timeout=2, timeout_factor=3)
+    fast, slow, new = hosts.get("fast.org"), hosts.get("slow.org"), hosts.get("new.org")
+    assert hosts.read_timeout_for(new) == 20
+
+    for _ in range(10):
+        hosts.record_success(fast, 0.1)
+        hosts.record_success(slow, 5.0)
+    # 3 x p95, within [min_read_timeout, read_timeout]
+    assert hosts.read_timeout_for(fast) == 2
+    assert hosts.read_timeout_for(slow) == 15.0
+    # Hosts without enough samples of their own use all hosts' latencies
+    assert hosts.read_timeout_for(new) == 15.0
@@ -0,0 +1,37 @@
+from src.crew import search_stage
+from src.crew.mechanical import format_retrieved_snippets, format_sources
+from src.crew.tasks import ResearchPlan, SourceItem, SubQuestion
+from src.crew.token_budget import budget_sources
+from src.tools.dedup import dedupe_sources
+
+PLAN = ResearchPlan(research_plan=[
+    SubQuestion(sub_question="How do agents plan?", source_type="blogs", keywords=["agent planning"]),
+    SubQuestion(sub_question="What is zorblax?", source_type="blogs", keywords=["zorblax"]),
+])
+
+
+def fake_search(query):
+    if query == "zorblax":
+        return None
+    return SourceItem(source="https://x.example/plan", kind="page",
+                      content="Agents break a goal into steps and revise the plan as they act.")
+
+
+def test_sub_question_without_results_is_recorded(monkeypatch):
+    monkeypatch.setattr(search_stage, "_search_google", fake_search)
+    monkeypatch.setattr(search_stage, "_search_arxiv", fake_search)
+    monkeypatch.setattr(search_stage, "search_research_corpus", lambda sub_questions: {})
+
+    data = search_stage.run_search_stage(PLAN, max_workers=2)
+    assert [item.source for item in data.sources] == ["https://x.example/plan"]
+    assert data.no_results == ["What is zorblax?"]
+    # Carried through de-duplication and budgeting
+    assert budget_sources(dedupe_sources(data)).no_results == ["What is zorblax?"]
+    assert format_sources(data).splitlines()[-1] == "- No results for: What is zorblax?"
+
+
+def test_the_summarizer_is_told_about_the_gap():
+    answers = {"How do agents plan?": "Agents break a goal into steps. [Source: https://x.example/plan]"}
+    text = format_retrieved_snippets(PLAN, answers, no_results=["What is zorblax?"])
+    assert text.endswith("### What is zorblax?\nNo search results were found for this sub-question.")
+    assert "[Source: https://x.example/plan]" in text
@@ -0,0 +1,64 @@
+import math
+import time
+
+from src.crew.semantic_cache import SemanticCache
+from src.crew.tasks import ResearchPlan, SubQuestion
+
+PLAN = ResearchPlan(research_plan=[
+    SubQuestion(sub_question="What is chain of thought?", source_type="blogs", keywords=["chain of thought"])])
+
+
+def unit(similarity: float) -> list:
+    """A 2-d unit vector with the given cosine similarity to [1, 0]."""
+    return [similarity, math.sqrt(1 - similarity ** 2)]
+
+
+class TopicEmbeddings:
+    """Embeds each (normalized) topic as a fixed vector, so similarities are exact."""
+
+    VECTORS = {
+        "llm reasoning": unit(1.0),
+        "reasoning in llms": unit(0.97),
+        "llm reasoning benchmarks": unit(0.9),
+        "pasta recipes": unit(0.2),
+    }
+
+    def embed_query(self, text):
+        if text not in self.VECTORS:
+            raise ValueError("embedding service unavailable")
+        return self.VECTORS[text]
+
+
+def open_cache(tmp_path, model_id="model", ttls=None) -> SemanticCache:
+    return SemanticCache(str(tmp_path / "semantic.sqlite3"), TopicEmbeddings(), model_id,
+                         thresholds={"plans": 0.85, "reports": 0.95},
+                         ttls=ttls or {"plans": 3600, "reports": 3600})
+
+
+def test_each_level_has_its_own_threshold(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.store_plan("LLM reasoning", PLAN)
+    cache.store_report("LLM  Reasoning", "# Report")
+
+    assert cache.lookup_report("Reasoning in LLMs") == "# Report"
+    # Close enough to reuse the plan, not the finished report
+    assert cache.lookup_report("LLM reasoning benchmarks") is None
+    assert cache.lookup_plan("LLM reasoning benchmarks") == PLAN
+    assert cache.lookup_plan("Pasta recipes") is None
+    assert cache.stats()["reports"]["hits"] == 1 and cache.stats()["reports"]["misses"] == 1
+
+
+def test_stale_entries_and_other_models_miss(tmp_path):
+    cache = open_cache(tmp_path, ttls={"plans": 60, "reports": 3600})
+    cache.store_plan("LLM reasoning", PLAN)
+    assert open_cache(tmp_path, model_id="other-model").lookup_plan("LLM reasoning") is None
+
+    cache._conn.execute("UPDATE plans SET created_at = ?", (time.time() - 120,))
+    assert cache.lookup_plan("LLM reasoning") is None
+
+
+def test_embedding_failures_miss_and_store_nothing(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.store_report("an unknown topic", "# Report")
+    assert cache.lookup_report("an unknown topic") is None
+    assert cache.stats()["reports"]["entries"] == 0
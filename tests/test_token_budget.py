@@ -0,0 +1,124 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import arxiv
+import pytest
+
+from src.crew import search_stage
+from src.crew.tasks import ConsolidatedData, ResearchPlan, SourceItem, SubQuestion
+from src.crew.token_budget import budget_snippets, budget_sources, compact_text
+from src.tools import search_tools
+from src.tools.arxiv_client import _to_paper
+
+PAGE = b"""<html><head><title>T</title></head><body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<ul class="menu"><li>Products</li><li>Pricing</li></ul>
+<h1>Benchmark Results</h1>
+<p>The agents solved 42 of the 50 tasks when the retrieval step was enabled, up from 30 without it.</p>
+<p>Cookies are small files that a browser stores for a site.</p>
+<p>Share this</p>
+<p>Subscribe to our newsletter</p>
+<footer>Copyright 2024 Example</footer>
+</body></html>"""
+
+SNIPPET = "Sign in to the EU cookie consent portal"
+
+# arXiv abstracts come hard-wrapped, with short lines
+ABSTRACT = ("While large language models have demonstrated impressive\n"
+            "capabilities, their abilities for reasoning and acting\n"
+            "have been studied as\n"
+            "separate topics")
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """A Google CSE stand-in (/cse), a scrapable page (/page) and a blocked one (/blocked)."""
+
+    def do_GET(self):
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path.startswith("/cse"):
+            link = "/blocked" if "blocked" in self.path else "/page"
+            body = json.dumps({"items": [{"title": "Result", "snippet": SNIPPET, "link": base + link}]}).encode()
+            self._send(200, "application/json", body)
+        elif self.path == "/page":
+            self._send(200, "text/html", PAGE)
+        else:
+            self._send(403, "text/plain", b"forbidden")
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def search_server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(search_tools, "GOOGLE_CSE_URL", f"http://127.0.0.1:{httpd.server_address[1]}/cse")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GOOGLE_CSE_ID", "test")
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def budgeted(item):
+    plan = ResearchPlan(research_plan=[
+        SubQuestion(sub_question="How do agents reason?", source_type="blogs", keywords=["agents"])])
+    return budget_sources(ConsolidatedData(plan=plan, sources=[item])).sources[0].content
+
+
+def test_scraped_page_loses_its_chrome_but_keeps_titles_and_sentences(search_server):
+    item = search_stage._search_google("agents")
+    assert item.kind == "page"
+    assert budgeted(item).splitlines() == [
+        "Benchmark Results",
+        "The agents solved 42 of the 50 tasks when the retrieval step was enabled, up from 30 without it.",
+        "Cookies are small files that a browser stores for a site.",
+    ]
+
+
+def test_search_snippet_is_kept_whole(search_server):
+    item = search_stage._search_google("blocked")
+    assert item.content == SNIPPET and item.kind == "snippet"
+    assert budgeted(item) == SNIPPET
+
+
+def test_only_page_sources_are_stripped_whatever_was_scraped_before():
+    text = "Menu\nShare this\nAgents plan before they act."
+    assert budgeted(SourceItem(source="https://x.example", content=text, kind="page")) == "Agents plan before they act."
+    for kind in ("snippet", "abstract", "corpus"):
+        assert budgeted(SourceItem(source="https://x.example", content=text, kind=kind)) == text
+
+
+def test_arxiv_title_and_wrapped_abstract_are_kept(monkeypatch):
+    result = arxiv.Result("http://arxiv.org/abs/2210.03629v3", published=datetime(2022, 10, 6),
+                          title="ReAct", summary=ABSTRACT)
+    monkeypatch.setattr(search_stage, "arxiv_search", lambda query, max_results=3: [_to_paper(result)])
+    item = search_stage._search_arxiv("react")
+    assert item.kind == "abstract"
+    assert budgeted(item) == f"ReAct\n{ABSTRACT}"
+
+
+def test_rag_snippets_keep_short_lines_and_source_tags():
+    answers = {"q": f"ReAct\n{ABSTRACT} [Source: http://arxiv.org/abs/2210.03629v3]"}
+    assert budget_snippets(answers)["q"] == f"ReAct\n{ABSTRACT} [Source: http://arxiv.org/abs/2210.03629v3]"
+
+
+def test_compact_text_drops_repeats_and_whitespace_only():
+    assert compact_text("Read more\n  Read   more \n\nLogin") == "Read more\nLogin"
+
+
+def test_traced_tokens_are_counted_like_the_budgets():
+    from src.crew.token_budget import count_tokens
+    from src.tracing_callbacks import _count_tokens
+
+    texts = ["Summarize the sources.", "ReAct interleaves reasoning and acting."]
+    assert _count_tokens(texts) == sum(count_tokens(t) for t in texts)
@@ -0,0 +1,51 @@
+import contextvars
+import threading
+import uuid
+
+from src.crew.llm_call_counter import LLMCallCounter
+from src.crew.run_stats import start_run_stats
+from src.tracing import _current_span, span, start_trace
+from src.tracing_callbacks import TracingCallbackHandler
+
+TASK_INPUTS = {"input": "Plan the research", "tool_names": ""}
+
+
+def in_new_context(fn):
+    return contextvars.copy_context().run(fn)
+
+
+def test_failed_task_restores_the_parent_span():
+    def run():
+        tracer = start_trace("topic", listener=lambda event, s: None)
+        handler = TracingCallbackHandler()
+        with span("plan") as stage:
+            run_id = uuid.uuid4()
+            handler.on_chain_start({}, TASK_INPUTS, run_id=run_id)
+            assert _current_span.get().kind == "task"
+            handler.on_chain_error(ValueError("bad JSON"), run_id=run_id)
+            assert _current_span.get() is stage
+        assert _current_span.get() is tracer.root
+        task = next(s for s in tracer.spans if s.kind == "task")
+        assert task.parent_id == stage.span_id and task.error == "ValueError: bad JSON"
+
+    in_new_context(run)
+
+
+def test_llm_calls_of_concurrent_runs_are_counted_per_run():
+    counter = LLMCallCounter()
+
+    def run(results):
+        stats = start_run_stats("hybrid")
+        for _ in range(200):
+            run_id = uuid.uuid4()
+            counter.on_chat_model_start({}, [], run_id=run_id)
+            counter.on_llm_end(None, run_id=run_id)
+        results.append(stats.llm_calls)
+
+    results = []
+    threads = [threading.Thread(target=in_new_context, args=(lambda: run(results),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 4